@@ -0,0 +1,354 @@
+# === Standard Library ===
+import json
+import logging
+import sys
+import time
+import types
+# === Third-party Modules ===
+import keyboard
+import numpy as np
+# === PyQt6 ===
+from PyQt6.QtCore import QEvent, Qt
+from PyQt6.QtGui import QKeyEvent, QTextCursor, QTextDocument
+from PyQt6.QtWidgets import QApplication, QDialog, QMessageBox, QPlainTextEdit, QWidget
+# === Local Modules ===
+from final import (
+    LANGUAGE_TEMPLATES,
+    LARGE_DOCUMENT_CONFIG,
+    LAYOUT_LUMA,
+    CodeEditor,
+    CompletionIndex,
+    DialogMonitor,
+    DialogRegistry,
+    FrameBus,
+    InputPolicy,
+    ProcessMonitor,
+    VSCodeSyntaxHighlighter,
+    run_machine_benchmark,
+)
+
+# Developer benchmarks for the exam client. They live outside final.py so the
+# shipped executable has no benchmark entry point; run them from a source
+# checkout with: python -m benchmarks [name ...]
+
+# -----------------------------------------------------------------------------
+# Dialogs and Event Dispatch
+# -----------------------------------------------------------------------------
+def benchmark_dialog_registry(widgets=500, depth=8, rounds=2000):
+    """'Is a dialog open?' and 'is this widget in a dialog?': old scans vs registry lookups"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    windows = [QWidget() for _ in range(widgets)]
+    dialog = QDialog()
+    registry = DialogRegistry()
+    registry.shown(dialog)
+    leaf = dialog
+    for _ in range(depth):
+        leaf = QWidget(leaf)
+
+    def scan_for_open_dialog():
+        for widget in QApplication.topLevelWidgets():
+            if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
+                if widget.isVisible():
+                    return True
+            if hasattr(widget, 'isModal') and widget.isModal() and widget.isVisible():
+                return True
+        return False
+
+    def walk_parents(widget):
+        parent = widget.parent()
+        while parent:
+            if isinstance(parent, QDialog) or isinstance(parent, QMessageBox):
+                return True
+            parent = parent.parent()
+        return False
+
+    def per_call_us(func, *args):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            func(*args)
+        return round((time.perf_counter() - started) * 1e6 / rounds, 2)
+
+    results = {
+        "top_level_widgets": len(QApplication.topLevelWidgets()),
+        "scan_open_us": per_call_us(scan_for_open_dialog),
+        "registry_open_us": per_call_us(registry.any_open),
+        "parent_walk_us": per_call_us(walk_parents, leaf),
+        "registry_owns_us": per_call_us(registry.owns, leaf),
+    }
+    del windows
+    return results
+
+
+def benchmark_event_dispatch(keystrokes=300, keys_per_second=8):
+    """Per-event cost of the app-wide filter while typing into an editor"""
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    class TimedDialogMonitor(DialogMonitor):
+        def __init__(self, window):
+            super().__init__(window)
+            self.events = 0
+            self.handled = 0
+            self.filter_ns = 0
+
+        def eventFilter(self, obj, event):
+            started = time.perf_counter_ns()
+            result = DialogMonitor.eventFilter(self, obj, event)
+            self.filter_ns += time.perf_counter_ns() - started
+            self.events += 1
+            self.handled += event.type() in self.handlers
+            return result
+
+    editor = QPlainTextEdit()
+    editor.show()
+    editor.setFocus()
+    monitor = TimedDialogMonitor(editor)
+    try:
+        for i in range(keystrokes):
+            key = Qt.Key.Key_A.value + i % 26
+            text = chr(ord('a') + i % 26)
+            for kind in (QEvent.Type.KeyPress, QEvent.Type.KeyRelease):
+                QApplication.sendEvent(editor, QKeyEvent(kind, key, Qt.KeyboardModifier.NoModifier, text))
+            app.processEvents()
+    finally:
+        app.removeEventFilter(monitor)
+        editor.close()
+
+    events_per_key = monitor.events / keystrokes
+    ns_per_event = monitor.filter_ns / max(1, monitor.events)
+    return {
+        "keystrokes": keystrokes,
+        "events_per_keystroke": round(events_per_key, 1),
+        "dispatched_share": round(monitor.handled / max(1, monitor.events), 3),
+        "filter_us_per_event": round(ns_per_event / 1000, 3),
+        "filter_ms_per_typing_second": round(events_per_key * keys_per_second * ns_per_event / 1e6, 3),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Input Policy
+# -----------------------------------------------------------------------------
+def benchmark_input_policy(keystrokes=20000):
+    """Handler latency per synthetic keystroke for the hook and the Qt filter paths"""
+    policy = InputPolicy()
+    names = list("hello world") + ["shift", "a", "backspace", "tab", "f5", "ctrl", "c"]
+    events = []
+    for i in range(keystrokes):
+        name = names[i % len(names)]
+        scan_code = 30 + i % len(names)
+        events.append(types.SimpleNamespace(event_type=keyboard.KEY_DOWN, name=name, scan_code=scan_code))
+        events.append(types.SimpleNamespace(event_type=keyboard.KEY_UP, name=name, scan_code=scan_code))
+    started = time.perf_counter()
+    for event in events:
+        policy.handle_hook_event(event)
+    hook_us = (time.perf_counter() - started) * 1e6 / keystrokes
+
+    qt_events = [QKeyEvent(QEvent.Type.KeyPress, key.value, modifiers)
+                 for key, modifiers in ((Qt.Key.Key_H, Qt.KeyboardModifier.NoModifier),
+                                        (Qt.Key.Key_Tab, Qt.KeyboardModifier.NoModifier),
+                                        (Qt.Key.Key_C, Qt.KeyboardModifier.ControlModifier),
+                                        (Qt.Key.Key_F4, Qt.KeyboardModifier.AltModifier))]
+    started = time.perf_counter()
+    for i in range(keystrokes):
+        policy.qt_decision(qt_events[i % len(qt_events)])
+    qt_us = (time.perf_counter() - started) * 1e6 / keystrokes
+    return {
+        "keystrokes": keystrokes,
+        "hook_us_per_keystroke": round(hook_us, 3),
+        "qt_us_per_keystroke": round(qt_us, 3),
+        "blocked": sum(policy.blocked.values()),
+        "log_lines": len(policy.blocked),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Capture
+# -----------------------------------------------------------------------------
+def benchmark_process_monitor(cycles=50):
+    """Baseline scan vs incremental cycles on this machine"""
+    monitor = ProcessMonitor()
+    started = time.perf_counter()
+    monitor.scan()
+    baseline_ms = (time.perf_counter() - started) * 1000
+    cycle_ms = []
+    for _ in range(cycles):
+        started = time.perf_counter()
+        monitor.scan()
+        cycle_ms.append((time.perf_counter() - started) * 1000)
+    cycle_ms.sort()
+    return {
+        "processes": len(monitor.known_pids),
+        "baseline_scan_ms": round(baseline_ms, 2),
+        "cycle_ms_median": round(cycle_ms[len(cycle_ms) // 2], 3),
+        "cycle_ms_p95": round(cycle_ms[int(len(cycle_ms) * 0.95)], 3),
+        "cycle_cpu_ms_last": round(monitor.last_scan_ms, 3),
+    }
+
+
+def benchmark_frame_bus(frames=300, width=640, height=480, consumers=3):
+    """Copies per frame and CPU at 30 fps: one private copy per consumer vs the shared ring"""
+    rng = np.random.default_rng(0)
+    # A few distinct NV12 luma planes with a padded stride, like real camera buffers
+    stride = width + 64
+    planes = [rng.integers(0, 256, (height, stride), dtype=np.uint8) for _ in range(8)]
+
+    def consume(luma):
+        return float(luma[::8, ::8].mean())
+
+    # Baseline: each consumer takes its own copy of the frame
+    copies = 0
+    cpu_start = time.process_time()
+    for i in range(frames):
+        plane = planes[i % len(planes)]
+        for _ in range(consumers):
+            private = plane[:, :width].copy()
+            copies += 1
+            consume(private)
+    baseline_cpu = time.process_time() - cpu_start
+
+    # Frame bus: one copy into the ring, consumers share read-only views
+    bus = FrameBus({"ring_size": 4})
+    for _ in range(consumers):
+        bus.subscribe(lambda packet: consume(packet.luma()))
+    cpu_start = time.process_time()
+    for i in range(frames):
+        bus.frames_in += 1
+        bus.publish(planes[i % len(planes)], width, height, LAYOUT_LUMA, 0, i / 30.0)
+    bus_cpu = time.process_time() - cpu_start
+
+    def per_frame(cpu):
+        ms = cpu * 1000 / frames
+        return {"cpu_ms_per_frame": round(ms, 3), "cpu_percent_at_30fps": round(ms * 30 / 10, 2)}
+
+    return {
+        "frames": frames,
+        "resolution": f"{width}x{height}",
+        "consumers": consumers,
+        "per_consumer_copy": {"copies_per_frame": copies / frames, **per_frame(baseline_cpu)},
+        "frame_bus": {"copies_per_frame": bus.copies / frames, **per_frame(bus_cpu)},
+    }
+
+
+# -----------------------------------------------------------------------------
+# Code Editor
+# -----------------------------------------------------------------------------
+def benchmark_highlighter(lines=1000):
+    """Full-document highlight time per 1,000 lines for each language template"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = {}
+    for language, template in LANGUAGE_TEMPLATES.items():
+        template_lines = template.split("\n")
+        text = "\n".join(template_lines[i % len(template_lines)] for i in range(lines))
+        document = QTextDocument()
+        document.setPlainText(text)
+        highlighter = VSCodeSyntaxHighlighter(document, language)
+        started = time.perf_counter()
+        highlighter.rehighlight()
+        results[f"{language}_ms_per_1000_lines"] = round((time.perf_counter() - started) * 1000 * 1000 / lines, 2)
+    return results
+
+
+def benchmark_completion(lines=10000, queries=1000):
+    """Index build, per-keystroke update and prefix query times on a generated buffer"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    template_lines = LANGUAGE_TEMPLATES["python"].split("\n")
+    text = "\n".join(
+        f"{template_lines[i % len(template_lines)]}  # result_{i % 997} value_{i % 311}"
+        for i in range(lines)
+    )
+    document = QTextDocument()
+    document.setPlainText(text)
+
+    started = time.perf_counter()
+    index = CompletionIndex(document, "python")
+    build_ms = (time.perf_counter() - started) * 1000
+
+    cursor = QTextCursor(document.findBlockByNumber(lines // 2))
+    started = time.perf_counter()
+    for char in "counter_total = 1":
+        cursor.insertText(char)
+    update_us = (time.perf_counter() - started) * 1e6 / len("counter_total = 1")
+
+    prefixes = ["p", "pr", "res", "result_9", "val", "value_3", "cou", "def", "x"]
+    started = time.perf_counter()
+    for n in range(queries):
+        index.query(prefixes[n % len(prefixes)])
+    query_us = (time.perf_counter() - started) * 1e6 / queries
+
+    return {
+        "identifiers": len(index.identifiers),
+        "build_ms": round(build_ms, 1),
+        "update_us_per_keystroke": round(update_us, 1),
+        "query_us": round(query_us, 1),
+        "sample": index.query("res")[:5],
+    }
+
+
+def benchmark_code_editor(lines=10000, keystrokes='value = """doc""" + 1'):
+    """Keystroke-to-paint latency on a large file, with and without large-document mode"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    template_lines = LANGUAGE_TEMPLATES["python"].split("\n")
+    text = "\n".join(template_lines[i % len(template_lines)] for i in range(lines))
+    threshold = LARGE_DOCUMENT_CONFIG["threshold_blocks"]
+    results = {}
+    try:
+        for mode, mode_threshold in (("full", lines + 1), ("large", threshold)):
+            LARGE_DOCUMENT_CONFIG["threshold_blocks"] = mode_threshold
+            editor = CodeEditor()
+            editor.resize(900, 700)
+            editor.show()
+            started = time.perf_counter()
+            editor.setPlainText(text)
+            app.processEvents()
+            results[f"{mode}_load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            while editor.highlighter.sweep_block is not None:
+                app.processEvents()
+
+            # Type at the top of the file, where a triple quote restyles everything below it
+            cursor = editor.textCursor()
+            cursor.setPosition(0)
+            editor.setTextCursor(cursor)
+            app.processEvents()
+            latencies = []
+            for char in keystrokes:
+                started = time.perf_counter()
+                QApplication.sendEvent(editor, QKeyEvent(QEvent.Type.KeyPress, 0, Qt.KeyboardModifier.NoModifier, char))
+                editor.viewport().repaint()
+                editor.line_number_area.repaint()
+                latencies.append((time.perf_counter() - started) * 1000)
+                app.processEvents()  # idle time between keystrokes
+            results[f"{mode}_keystroke_ms_mean"] = round(sum(latencies) / len(latencies), 2)
+            results[f"{mode}_keystroke_ms_max"] = round(max(latencies), 2)
+            editor.close()
+            editor.deleteLater()
+    finally:
+        LARGE_DOCUMENT_CONFIG["threshold_blocks"] = threshold
+    return results
+
+
+# -----------------------------------------------------------------------------
+# Runner
+# -----------------------------------------------------------------------------
+BENCHMARKS = {
+    "frame_bus": benchmark_frame_bus,
+    "process_monitor": benchmark_process_monitor,
+    "dialogs": benchmark_dialog_registry,
+    "event_dispatch": benchmark_event_dispatch,
+    "input_policy": benchmark_input_policy,
+    "highlighter": benchmark_highlighter,
+    "code_editor": benchmark_code_editor,
+    "completion": benchmark_completion,
+    "machine": run_machine_benchmark,
+}
+
+
+def run_benchmarks(names=None):
+    """Run the named benchmarks (all by default) and print their results as JSON"""
+    results = {}
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            logging.warning(f"Unknown benchmark '{name}' - available: {', '.join(BENCHMARKS)}")
+            continue
+        logging.info(f"Running benchmark: {name}")
+        results[name] = BENCHMARKS[name]()
+    print(json.dumps(results, indent=2))
+    return 0
@@ -0,0 +1,9 @@
+# === Standard Library ===
+import logging
+import sys
+# === Local Modules ===
+from benchmarks import run_benchmarks
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(run_benchmarks(sys.argv[1:]))
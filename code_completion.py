@@ -0,0 +1,181 @@
+# === Standard Library ===
+import bisect
+import re
+# === Local Modules ===
+from code_highlighting import LANGUAGE_KEYWORDS
+
+# Keyword and identifier completion for the code editor in final.py. The index
+# listens to a QTextDocument's contentsChange but needs no widgets, so it can be
+# tested on a bare document.
+
+# -----------------------------------------------------------------------------
+# Completion
+# -----------------------------------------------------------------------------
+COMPLETION_CONFIG = {
+    "min_identifier_length": 3,  # shorter buffer words are not worth suggesting
+    "max_results": 20,
+    "popup_min_prefix": 2,       # typed characters before the popup opens on its own (Ctrl+Space forces it)
+}
+
+# Builtins offered next to each language's keywords
+LANGUAGE_BUILTINS = {
+    "python": [
+        "abs", "all", "any", "bin", "bool", "dict", "enumerate", "filter", "float",
+        "format", "input", "int", "isinstance", "len", "list", "map", "max", "min",
+        "open", "ord", "chr", "print", "range", "reversed", "round", "set", "sorted",
+        "str", "sum", "tuple", "type", "zip", "self", "__name__", "__main__",
+    ],
+    "javascript": [
+        "console", "log", "document", "window", "Math", "JSON", "Array", "Object",
+        "String", "Number", "Promise", "parseInt", "parseFloat", "setTimeout",
+        "length", "push", "map", "filter", "reduce", "forEach",
+    ],
+    "java": [
+        "String", "System", "out", "println", "print", "Math", "Integer", "Double",
+        "ArrayList", "HashMap", "List", "Map", "Scanner", "StringBuilder", "length",
+        "main", "args",
+    ],
+    "c++": [
+        "std", "cout", "cin", "endl", "string", "vector", "map", "set", "pair",
+        "size", "push_back", "begin", "end", "include", "iostream", "main",
+    ],
+    "c": [
+        "printf", "scanf", "malloc", "calloc", "free", "strlen", "strcpy", "strcmp",
+        "memset", "include", "stdio", "stdlib", "string", "main", "NULL",
+    ],
+    "html": [
+        "html", "head", "body", "title", "div", "span", "class", "style", "script",
+        "table", "form", "input", "button", "href", "src",
+    ],
+}
+
+_IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+class CompletionTrie:
+    """Prefix tree over one language's keywords and builtins, built once and shared"""
+
+    _cache = {}
+
+    def __init__(self, words):
+        self.root = {}
+        # Inserting in sorted order keeps every node's children sorted, so a
+        # depth-first walk yields matches alphabetically
+        for word in sorted(set(words)):
+            node = self.root
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = word
+
+    @classmethod
+    def for_language(cls, language):
+        trie = cls._cache.get(language)
+        if trie is None:
+            words = LANGUAGE_KEYWORDS.get(language, []) + LANGUAGE_BUILTINS.get(language, [])
+            trie = cls._cache[language] = cls(words)
+        return trie
+
+    def query(self, prefix, limit):
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        results = []
+        stack = [node]
+        while stack and len(results) < limit:
+            node = stack.pop()
+            if "" in node:
+                results.append(node[""])
+            stack.extend(child for key, child in reversed(node.items()) if key)
+        return results
+
+
+class CompletionIndex:
+    """Completion candidates for one document: the language trie plus the buffer's
+    identifiers, re-indexed only for the blocks each edit touches"""
+
+    def __init__(self, document, language="python"):
+        self.document = document
+        self.set_language(language)
+        self.block_words = []  # identifier set per block, by block number
+        self.counts = {}  # identifier -> number of blocks containing it
+        self.identifiers = []  # sorted, for bisect prefix lookups
+        self.reindex()
+        document.contentsChange.connect(self.on_contents_change)
+
+    def set_language(self, language):
+        self.trie = CompletionTrie.for_language(language.lower())
+
+    @staticmethod
+    def words_in(text):
+        min_length = COMPLETION_CONFIG["min_identifier_length"]
+        return {word for word in _IDENTIFIER_RE.findall(text) if len(word) >= min_length}
+
+    def reindex(self):
+        block = self.document.begin()
+        words = []
+        while block.isValid():
+            words.append(self.words_in(block.text()))
+            block = block.next()
+        self.replace(0, len(self.block_words), words)
+
+    def on_contents_change(self, position, removed, added):
+        document = self.document
+        first = document.findBlock(position)
+        last = document.findBlock(position + added)
+        if not last.isValid():
+            last = document.lastBlock()
+        start = first.blockNumber()
+        new_count = last.blockNumber() - start + 1
+        old_count = new_count + len(self.block_words) - document.blockCount()
+        if start < 0 or old_count < 0 or start + old_count > len(self.block_words):
+            self.reindex()
+            return
+
+        words = []
+        block = first
+        while True:
+            words.append(self.words_in(block.text()))
+            if block == last:
+                break
+            block = block.next()
+        self.replace(start, old_count, words)
+
+    def replace(self, start, old_count, new_words):
+        """Swap the word sets of old_count blocks at start for new_words"""
+        counts = self.counts
+        identifiers = self.identifiers
+        # Add before removing so a word that merely stays put never leaves the sorted list
+        for words in new_words:
+            for word in words:
+                if word in counts:
+                    counts[word] += 1
+                else:
+                    counts[word] = 1
+                    bisect.insort(identifiers, word)
+        for words in self.block_words[start:start + old_count]:
+            for word in words:
+                counts[word] -= 1
+                if not counts[word]:
+                    del counts[word]
+                    del identifiers[bisect.bisect_left(identifiers, word)]
+        self.block_words[start:start + old_count] = new_words
+
+    def query(self, prefix, limit=None):
+        """Keywords and builtins first, then buffer identifiers, all starting with prefix"""
+        if not prefix:
+            return []
+        limit = limit or COMPLETION_CONFIG["max_results"]
+        results = self.trie.query(prefix, limit)
+        seen = set(results)
+        identifiers = self.identifiers
+        index = bisect.bisect_left(identifiers, prefix)
+        while index < len(identifiers) and len(results) < limit:
+            word = identifiers[index]
+            if not word.startswith(prefix):
+                break
+            if word != prefix and word not in seen:
+                results.append(word)
+            index += 1
+        return results
@@ -0,0 +1,330 @@
+# === Standard Library ===
+import re
+import time
+# === PyQt6 ===
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QColor, QFont, QSyntaxHighlighter, QTextCharFormat
+
+# Language tables and the syntax highlighter for the code editor in final.py.
+# Needs only QtCore/QtGui, so the tokenizer and its cross-block state can be
+# tested without the rest of the app.
+
+# Large-document mode; the editor switches it on, the highlighter sweeps in idle slices
+LARGE_DOCUMENT_CONFIG = {
+    "threshold_blocks": 2000,   # switch to lazy highlighting at this many lines
+    "margin_blocks": 100,       # blocks above and below the viewport highlighted on edit
+    "idle_slice_ms": 4,         # budget for each idle highlighting slice
+    "undo_limit": 10000,        # undo steps before the history is reset in large-document mode
+}
+
+# -----------------------------------------------------------------------------
+# Syntax Highlighting
+# -----------------------------------------------------------------------------
+LANGUAGE_KEYWORDS = {
+    "python": [
+        "and", "as", "assert", "async", "await", "break", "class", "continue", 
+        "def", "del", "elif", "else", "except", "False", "finally", "for", 
+        "from", "global", "if", "import", "in", "is", "lambda", "None", 
+        "nonlocal", "not", "or", "pass", "raise", "return", "True", 
+        "try", "while", "with", "yield"
+    ],
+    "javascript": [
+        "break", "case", "catch", "class", "const", "continue", "debugger", 
+        "default", "delete", "do", "else", "export", "extends", "false", 
+        "finally", "for", "function", "if", "import", "in", "instanceof", 
+        "new", "null", "return", "super", "switch", "this", "throw", "true", 
+        "try", "typeof", "var", "void", "while", "with", "yield", "let", "async", "await"
+    ],
+    "java": [
+        "abstract", "assert", "boolean", "break", "byte", "case", "catch", 
+        "char", "class", "const", "continue", "default", "do", "double", 
+        "else", "enum", "extends", "final", "finally", "float", "for", 
+        "goto", "if", "implements", "import", "instanceof", "int", 
+        "interface", "long", "native", "new", "package", "private", 
+        "protected", "public", "return", "short", "static", "strictfp", 
+        "super", "switch", "synchronized", "this", "throw", "throws", 
+        "transient", "try", "void", "volatile", "while", "true", "false", "null"
+    ],
+    "c++": [
+        "alignas", "alignof", "and", "and_eq", "asm", "auto", "bitand", 
+        "bitor", "bool", "break", "case", "catch", "char", "char16_t", 
+        "char32_t", "class", "compl", "const", "constexpr", "const_cast", 
+        "continue", "decltype", "default", "delete", "do", "double", 
+        "dynamic_cast", "else", "enum", "explicit", "export", "extern", 
+        "false", "float", "for", "friend", "goto", "if", "inline", "int", 
+        "long", "mutable", "namespace", "new", "noexcept", "not", "not_eq", 
+        "nullptr", "operator", "or", "or_eq", "private", "protected", 
+        "public", "register", "reinterpret_cast", "return", "short", 
+        "signed", "sizeof", "static", "static_assert", "static_cast", 
+        "struct", "switch", "template", "this", "thread_local", "throw", 
+        "true", "try", "typedef", "typeid", "typename", "union", "unsigned", 
+        "using", "virtual", "void", "volatile", "wchar_t", "while", "xor", "xor_eq"
+    ],
+    "c": [
+        "auto", "break", "case", "char", "const", "continue", "default", 
+        "do", "double", "else", "enum", "extern", "float", "for", "goto", 
+        "if", "inline", "int", "long", "register", "restrict", "return", 
+        "short", "signed", "sizeof", "static", "struct", "switch", 
+        "typedef", "union", "unsigned", "void", "volatile", "while", 
+        "_Alignas", "_Alignof", "_Atomic", "_Bool", "_Complex", 
+        "_Generic", "_Imaginary", "_Noreturn", "_Static_assert", "_Thread_local"
+    ],
+}
+
+LANGUAGE_TEMPLATES = {
+    "python": '# Python code\n\ndef main():\n    print("Hello, World!")\n\nif __name__ == "__main__":\n    main()',
+    "java": '// Java code\n\npublic class Main {\n    public static void main(String[] args) {\n        System.out.println("Hello, World!");\n    }\n}',
+    "javascript": '// JavaScript code\n\nfunction main() {\n    console.log("Hello, World!");\n}\n\nmain();',
+    "c++": '// C++ code\n\n#include <iostream>\n\nint main() {\n    std::cout << "Hello, World!" << std::endl;\n    return 0;\n}',
+    "c": '// C code\n\n#include <stdio.h>\n\nint main() {\n    printf("Hello, World!\\n");\n    return 0;\n}',
+    "html": '<!-- HTML code -->\n\n<!DOCTYPE html>\n<html>\n<head>\n    <title>Hello World</title>\n</head>\n<body>\n    <h1>Hello, World!</h1>\n</body>\n</html>'
+}
+
+# VS Code color scheme
+HIGHLIGHT_COLORS = {
+    "keyword": "#569CD6",       # blue
+    "class": "#4EC9B0",         # teal
+    "function": "#DCDCAA",      # yellow
+    "string": "#CE9178",        # orange-brown
+    "comment": "#6A9955",       # green
+    "number": "#B5CEA8",        # light green
+    "operator": "#D4D4D4",      # light gray
+    "preprocessor": "#C586C0",  # purple
+    "tag": "#569CD6",           # blue, like keywords but not bold
+    "attribute": "#9CDCFE",     # light blue
+}
+
+# Token rules per language, in priority order: (group, regex, format).
+# A "*_open" group is an unterminated multi-line construct; it runs to the end
+# of the block and sets the block state listed in MULTILINE_CLOSERS.
+_DQ_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_SQ_STRING = r"'[^'\\]*(?:\\.[^'\\]*)*'"
+_OPERATOR = r'[+\-*/=<>%&|^~!]'
+_WORD = r'[A-Za-z_][A-Za-z0-9_]*'
+_BLOCK_COMMENT = [("block_comment", r'/\*.*?\*/', "comment"), ("block_comment_open", r'/\*.*', "comment")]
+_C_LIKE_TOKENS = _BLOCK_COMMENT + [
+    ("line_comment", r'//.*', "comment"),
+    ("dq_string", _DQ_STRING, "string"),
+    ("sq_string", _SQ_STRING, "string"),
+    ("preprocessor", r'#\s*[a-zA-Z]+', "preprocessor"),
+    ("number", r'\b\d+(?:\.\d+)?[fFlL]?\b', "number"),
+    ("word", _WORD, None),
+    ("operator", _OPERATOR, "operator"),
+]
+LANGUAGE_TOKENS = {
+    "python": [
+        ("triple_dq", r'""".*?"""', "string"),
+        ("triple_sq", r"'''.*?'''", "string"),
+        ("triple_dq_open", r'""".*', "string"),
+        ("triple_sq_open", r"'''.*", "string"),
+        ("comment", r'#.*', "comment"),
+        ("dq_string", _DQ_STRING, "string"),
+        ("sq_string", _SQ_STRING, "string"),
+        ("number", r'\b\d+\b', "number"),
+        ("word", _WORD, None),
+        ("operator", _OPERATOR, "operator"),
+    ],
+    "javascript": _BLOCK_COMMENT + [
+        ("line_comment", r'//.*', "comment"),
+        ("dq_string", _DQ_STRING, "string"),
+        ("sq_string", _SQ_STRING, "string"),
+        ("template", r'`[^`\\]*(?:\\.[^`\\]*)*`', "string"),
+        ("template_open", r'`.*', "string"),
+        ("number", r'\b\d+(?:\.\d+)?\b', "number"),
+        ("word", _WORD, None),
+        ("operator", _OPERATOR, "operator"),
+    ],
+    "java": _C_LIKE_TOKENS,
+    "c++": _C_LIKE_TOKENS,
+    "c": _C_LIKE_TOKENS,
+    "html": [
+        ("html_comment", r'<!--.*?-->', "comment"),
+        ("html_comment_open", r'<!--.*', "comment"),
+        ("tag", r'</?[a-zA-Z0-9]+', "tag"),
+        ("tag_end", r'/?>', "tag"),
+        ("attribute", r'\s[a-zA-Z0-9-]+=', "attribute"),
+        ("dq_string", _DQ_STRING, "string"),
+        ("sq_string", _SQ_STRING, "string"),
+    ],
+}
+# Block state -> (open group, pattern that ends the construct in a later block)
+MULTILINE_CLOSERS = {
+    1: ("triple_dq_open", r'"""'),
+    2: ("triple_sq_open", r"'''"),
+    3: ("block_comment_open", r'\*/'),
+    4: ("html_comment_open", r'-->'),
+    5: ("template_open", r'(?<!\\)`'),
+}
+CLASS_KEYWORDS = {"class", "struct", "enum"}
+
+# Characters outside the BMP are two UTF-16 units in Qt's offsets but one in Python
+_ASTRAL_RE = re.compile('[\U00010000-\U0010FFFF]')
+
+
+class HighlightRules:
+    """One language's tokens compiled into a single alternation, shared by every editor"""
+
+    _cache = {}
+
+    def __init__(self, language):
+        tokens = LANGUAGE_TOKENS.get(language, [])
+        self.language = language
+        self.keywords = frozenset(LANGUAGE_KEYWORDS.get(language, []))
+        self.class_keywords = self.keywords & CLASS_KEYWORDS
+        self.formats = self.build_formats()
+        self.pattern = re.compile("|".join(f"(?P<{group}>{regex})" for group, regex, _ in tokens)) if tokens else None
+        self.group_formats = {group: self.formats[kind] for group, _, kind in tokens if kind}
+        groups = {group for group, _, _ in tokens}
+        self.openers = {}
+        self.closers = {}
+        for state, (group, end_regex) in MULTILINE_CLOSERS.items():
+            if group in groups:
+                self.openers[group] = state
+                self.closers[state] = (re.compile(end_regex), self.group_formats[group])
+
+    @staticmethod
+    def build_formats():
+        formats = {}
+        for kind, color in HIGHLIGHT_COLORS.items():
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            if kind == "keyword":
+                fmt.setFontWeight(QFont.Weight.Bold)
+            formats[kind] = fmt
+        return formats
+
+    @classmethod
+    def for_language(cls, language):
+        rules = cls._cache.get(language)
+        if rules is None:
+            rules = cls._cache[language] = cls(language)
+        return rules
+
+
+class VSCodeSyntaxHighlighter(QSyntaxHighlighter):
+    """Single-pass highlighter: one regex scan per block, multi-line strings and
+    comments carried across blocks through the block state"""
+
+    def __init__(self, parent=None, language="python"):
+        super().__init__(parent)
+        self.language = language.lower()
+        self.setup_highlighting_rules()
+
+        # Large-document mode: edits only highlight blocks inside lazy_range,
+        # everything from sweep_block on is caught up in idle slices
+        self.lazy_range = None
+        self.forced_block = -1
+        self.sweep_block = None
+        self.sweep_timer = QTimer(self)
+        self.sweep_timer.setSingleShot(True)
+        self.sweep_timer.timeout.connect(self.sweep)
+
+    def setup_highlighting_rules(self):
+        self.rules = HighlightRules.for_language(self.language)
+
+    def set_language(self, language):
+        """Change the language for syntax highlighting"""
+        self.language = language.lower()
+        self.setup_highlighting_rules()
+        self.rehighlight()
+
+    def set_lazy_range(self, lazy_range):
+        """Limit edit-time highlighting to (first, last) block numbers, or None for all"""
+        self.lazy_range = lazy_range
+
+    def defer(self, block_number):
+        if self.sweep_block is None or block_number < self.sweep_block:
+            self.sweep_block = block_number
+        if not self.sweep_timer.isActive():
+            self.sweep_timer.start(0)
+
+    def sweep(self):
+        """Highlight deferred blocks for one idle slice, then yield to the event loop"""
+        document = self.document()
+        if document is None or self.sweep_block is None:
+            self.sweep_block = None
+            return
+
+        deadline = time.perf_counter() + LARGE_DOCUMENT_CONFIG["idle_slice_ms"] / 1000
+        block = document.findBlockByNumber(self.sweep_block)
+        while block.isValid():
+            self.forced_block = block.blockNumber()
+            self.rehighlightBlock(block)
+            block = block.next()
+            if time.perf_counter() >= deadline:
+                break
+        self.forced_block = -1
+
+        if block.isValid():
+            self.sweep_block = block.blockNumber()
+            self.sweep_timer.start(0)
+        else:
+            self.sweep_block = None
+            self.sweep_timer.stop()
+
+    def highlight_range(self, first, last):
+        """Highlight blocks the sweep has not reached yet, e.g. after scrolling to them"""
+        if self.sweep_block is None or self.sweep_block > last:
+            return
+        block = self.document().findBlockByNumber(max(first, self.sweep_block))
+        while block.isValid() and block.blockNumber() <= last:
+            self.forced_block = block.blockNumber()
+            self.rehighlightBlock(block)
+            block = block.next()
+        self.forced_block = -1
+
+    def highlightBlock(self, text):
+        """Apply syntax highlighting to the given block of text"""
+        if self.lazy_range is not None:
+            number = self.currentBlock().blockNumber()
+            if number != self.forced_block and not self.lazy_range[0] <= number <= self.lazy_range[1]:
+                # Keep the stored state so Qt stops cascading here; the sweep catches up
+                self.setCurrentBlockState(self.currentBlockState())
+                self.defer(number)
+                return
+
+        rules = self.rules
+        self.setCurrentBlockState(0)
+        if rules.pattern is None:
+            return
+        if not text.isascii():
+            text = _ASTRAL_RE.sub('\ufffd\ufffd', text)
+
+        pos = 0
+        closer = rules.closers.get(self.previousBlockState())
+        if closer is not None:
+            # Continue a string/comment opened in an earlier block
+            end_pattern, fmt = closer
+            end = end_pattern.search(text)
+            if end is None:
+                self.setFormat(0, len(text), fmt)
+                self.setCurrentBlockState(self.previousBlockState())
+                return
+            pos = end.end()
+            self.setFormat(0, pos, fmt)
+
+        keywords = rules.keywords
+        formats = rules.formats
+        group_formats = rules.group_formats
+        expect_class_name = False
+        for match in rules.pattern.finditer(text, pos):
+            group = match.lastgroup
+            start, end = match.span()
+            if group == "word":
+                word = match.group()
+                if expect_class_name:
+                    fmt = formats["class"]
+                    expect_class_name = False
+                elif word in keywords:
+                    fmt = formats["keyword"]
+                    expect_class_name = word in rules.class_keywords
+                elif text.startswith("(", end):
+                    fmt = formats["function"]
+                else:
+                    continue
+            else:
+                expect_class_name = False
+                fmt = group_formats[group]
+                if group in rules.openers:
+                    self.setCurrentBlockState(rules.openers[group])
+            self.setFormat(start, end - start, fmt)
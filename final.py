@@ -1,24 +1,39 @@
 # === Standard Library ===
+import collections
 import ctypes
 from ctypes import wintypes
+import hashlib
 import json
 import logging
+import math
+from multiprocessing import shared_memory
 import os
-import random
+import queue
+import re
+import shutil
 import subprocess
 import sys
 import threading
 import time
 from datetime import datetime
 import types
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
 # === Third-party Modules ===
 import keyboard
 import numpy as np
 import psutil
 import requests
 import sounddevice as sd
+# === Local Modules ===
+import upload_worker
+from upload_worker import ChunkManifest
+from input_policy import INPUT_BLOCK, INPUT_EMERGENCY, InputPolicy
+from code_highlighting import LANGUAGE_TEMPLATES, LARGE_DOCUMENT_CONFIG, VSCodeSyntaxHighlighter
+from code_completion import COMPLETION_CONFIG, CompletionIndex
 
 # === PyQt6 Core ===
+from PyQt6 import sip
 from PyQt6.QtCore import (
     QCoreApplication,
     QEvent,
@@ -26,11 +41,13 @@ from PyQt6.QtCore import (
     QRect,
     QRegularExpression,
     QSize,
+    QStringListModel,
     QTimer,
     Qt,
     QUrl,
     QUrlQuery,
-    QBuffer,QObject
+    QBuffer,QObject,
+    QIODevice
 )
 
 # === PyQt6 GUI ===
@@ -39,10 +56,14 @@ from PyQt6.QtGui import (
     QFont,
     QKeyEvent,
     QPainter,
+    QImage,
+    QImageWriter,
     QPixmap,
     QTextCharFormat,
     QTextFormat,
-    QSyntaxHighlighter,QAction,QKeySequence
+    QSyntaxHighlighter,QAction,QKeySequence,
+    QTextCursor,
+    QTextDocument
 )
 
 # === PyQt6 Widgets ===
@@ -51,6 +72,7 @@ from PyQt6.QtWidgets import (
     QButtonGroup,
     QCheckBox,
     QComboBox,
+    QCompleter,
     QDialog,
     QFrame,
     QGridLayout,
@@ -76,10 +98,14 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtMultimedia import (
     QCamera,
     QCameraDevice,
+    QImageCapture,
     QMediaCaptureSession,
     QMediaDevices,
     QMediaFormat,
     QMediaRecorder,
+    QVideoFrame,
+    QVideoFrameFormat,
+    QVideoSink,
 )
 
 from PyQt6.QtMultimediaWidgets import QVideoWidget
@@ -106,21 +132,111 @@ from PyQt6.QtGui import QGuiApplication
 # Global flag for manual control
 SUPPRESS_FOCUS_CHECKS = False
 
+# -----------------------------------------------------------------------------
+# Configuration Overrides
+# -----------------------------------------------------------------------------
+def merged_config(defaults, overrides=None, name="config"):
+    """Copy of a *_CONFIG dict with the known, non-None keys of overrides applied.
+
+    Overrides come from the exam details response or the caller; unknown keys
+    are logged and ignored so a misspelt or retired setting is noticed.
+    """
+    merged = dict(defaults)
+    if isinstance(overrides, dict):
+        for key, value in overrides.items():
+            if key not in defaults:
+                logging.warning(f"Ignoring unknown {name} setting: {key}")
+            elif value is not None:
+                merged[key] = value
+    return merged
+
+# -----------------------------------------------------------------------------
+# Dialog Registry
+# -----------------------------------------------------------------------------
+class DialogRegistry:
+    """Open QDialog/QMessageBox instances, kept current from show/hide events.
+
+    any_open() and owns(widget) are dictionary lookups, so focus handling never
+    walks QApplication.topLevelWidgets() or a parent chain in Python. Dialogs are
+    keyed by their C++ object, which stays the same whichever Python wrapper
+    Qt hands the event filter.
+    """
+
+    def __init__(self):
+        self.open = {}                    # C++ address -> dialog, in show order
+        self.watched = weakref.WeakSet()  # dialogs with a destroyed hook, for those deleted while open
+
+    @staticmethod
+    def key(widget):
+        return sip.unwrapinstance(widget)
+
+    def shown(self, dialog):
+        """Track dialog; returns True if it was not already open"""
+        key = self.key(dialog)
+        if key in self.open:
+            return False
+        self.open[key] = dialog
+        if dialog not in self.watched:
+            self.watched.add(dialog)
+            dialog.destroyed.connect(lambda *args, key=key: self.open.pop(key, None))
+        return True
+
+    def hidden(self, dialog):
+        """Stop tracking dialog; returns True if it was open"""
+        return self.open.pop(self.key(dialog), None) is not None
+
+    def active(self):
+        return bool(self.open)
+
+    def any_open(self):
+        """A tracked dialog or any application-modal widget is up"""
+        return bool(self.open) or QApplication.activeModalWidget() is not None
+
+    def latest(self):
+        """Most recently shown dialog still open, or None"""
+        return next(reversed(self.open.values()), None)
+
+    def owns(self, widget):
+        """True if widget is an open dialog or sits inside one"""
+        if widget is None:
+            return False
+        try:
+            return self.key(widget.window()) in self.open
+        except (AttributeError, RuntimeError, TypeError):
+            return False  # Not a widget, or already deleted on the C++ side
+
+    def __len__(self):
+        return len(self.open)
+
+
+dialog_registry = DialogRegistry()
+
+
 class DialogMonitor(QObject):
-    """Enhanced dialog monitor that hooks into application events"""
+    """App-wide event dispatcher for dialog tracking, focus and Qt-level key blocking.
+
+    This is the only Python event filter in the app. Qt calls it for every event
+    on every object, so eventFilter does a single dict lookup on the event type
+    and returns straight away for anything not in self.handlers (paint, timer,
+    mouse-move, ...).
+    """
     
-    def __init__(self):
+    def __init__(self, window=None):
         super().__init__()
-        self.active_dialogs = []
+        self.window = window
+        
+        # Precomputed dispatch table - the only event types that cost more than a lookup
+        self.handlers = {
+            QEvent.Type.Show: self.handle_show,
+            QEvent.Type.Hide: self.handle_hide,
+            QEvent.Type.KeyPress: self.handle_key_press,
+            QEvent.Type.WindowDeactivate: self.handle_window_deactivate,
+            QEvent.Type.MouseButtonPress: self.handle_mouse_press,
+        }
         
         # Install event filter on the application
         QApplication.instance().installEventFilter(self)
         
-        # Backup periodic check with moderate frequency
-        self.check_timer = QTimer()
-        self.check_timer.timeout.connect(self.scan_for_dialogs)
-        self.check_timer.start(250)  # Check every 250ms
-        
         # Track dialog stability to reduce flicker
         self.dialog_stable_timer = QTimer()
         self.dialog_stable_timer.setSingleShot(True)
@@ -137,130 +253,66 @@ class DialogMonitor(QObject):
         logging.info("Dialog monitor initialized")
     
     def eventFilter(self, obj, event):
-        """Qt-specific event filter with enhanced emergency exit detection and dialog awareness"""
-        # Declare global variable at the beginning of the function
-        global SUPPRESS_FOCUS_CHECKS
-        
-        # Special handling for dialog-related events
-        if event.type() in [QEvent.Type.WindowActivate, QEvent.Type.WindowDeactivate,
-                            QEvent.Type.Show, QEvent.Type.Hide]:
-            # Check if this is a dialog or dialog component
-            if (isinstance(obj, QDialog) or isinstance(obj, QMessageBox) or 
-                obj.inherits("QDialog") or self.is_dialog_child(obj)):
-                
-                # Handle dialog activation/deactivation with debouncing
-                if event.type() == QEvent.Type.Show:
-                    logging.debug(f"Dialog show event detected for {obj.__class__.__name__}")
-                    if obj not in self.active_dialogs:
-                        self.active_dialogs.append(obj)
-                        self.request_suppression_change(True)
-                        
-                elif event.type() == QEvent.Type.Hide:
-                    logging.debug(f"Dialog hide event detected for {obj.__class__.__name__}")
-                    if obj in self.active_dialogs:
-                        self.active_dialogs.remove(obj)
-                        if not self.active_dialogs:
-                            self.request_suppression_change(False)
-                
-                # Let dialog events pass through without interference
-                return super().eventFilter(obj, event)
+        """Hot path: one lookup, immediate return for irrelevant event types"""
+        handler = self.handlers.get(event.type())
+        if handler is None:
+            return False
+        return handler(obj, event)
+    
+    def handle_show(self, obj, event):
+        # Check if this is a dialog (QMessageBox included)
+        if isinstance(obj, QDialog):
+            logging.debug(f"Dialog show event detected for {obj.__class__.__name__}")
+            if dialog_registry.shown(obj):
+                focus_guard.pause()
+                self.request_suppression_change(True)
+                # Make sure the dialog ends up with focus once it settles
+                self.dialog_stable_timer.start(300)
+        return False
+    
+    def handle_hide(self, obj, event):
+        if isinstance(obj, QDialog):
+            logging.debug(f"Dialog hide event detected for {obj.__class__.__name__}")
+            if dialog_registry.hidden(obj) and not dialog_registry.active():
+                self.request_suppression_change(False)
+        return False
+    
+    def handle_window_deactivate(self, obj, event):
+        # Only the main window matters; the focus guard knows which dialogs
+        # are up and debounces the restore
+        if obj is self.window and not SUPPRESS_FOCUS_CHECKS:
+            logging.debug("Window deactivate event - asking focus guard to check")
+            focus_guard.check_now()
+        return False
+    
+    def handle_mouse_press(self, obj, event):
+        task_scheduler.note_activity()
+        return False
+    
+    def handle_key_press(self, obj, event):
+        """Emergency exit detection and key blocking outside dialogs"""
+        # The application filter sees a key press on the QWindow, then on the focus
+        # widget, then on each ancestor it propagates to - act on the receiver only.
+        # An open popup (combo box list, code completion) receives the keys itself.
+        focus_widget = QApplication.focusWidget()
+        popup = QApplication.activePopupWidget()
+        if obj is not focus_widget and obj is not popup and \
+                not (focus_widget is None and isinstance(obj, QWidget) and obj.isWindow()):
+            return False
+        task_scheduler.note_activity()
+        # Dialogs get the same rules as the exam pages, plus Esc to close them (and popups)
+        action = input_policy.qt_decision(event, in_dialog=SUPPRESS_FOCUS_CHECKS or popup is not None)
         
-        # Handle key press events with emergency exit detection
-        if event.type() == QEvent.Type.KeyPress:
-            key = event.key()
-            modifiers = event.modifiers()
-            
-            # Enhanced detection for emergency exit
-            is_ctrl = modifiers & Qt.KeyboardModifier.ControlModifier
-            is_shift = modifiers & Qt.KeyboardModifier.ShiftModifier
-            is_e_key = key == Qt.Key.Key_E
-            
-            # Check for emergency exit combination
-            if is_ctrl and is_shift and is_e_key:
-                logging.info("EMERGENCY EXIT combination detected in filter!")
-                # Try triggering the emergency submit function
-                self.trigger_emergency_submit()
-                # If we somehow get here, force exit
-                import os
-                os._exit(0)
-                return True  # Handled
-                
-            # Allow Ctrl+Shift+E for emergency submit
-            if (key == Qt.Key.Key_E and 
-                modifiers & Qt.KeyboardModifier.ControlModifier and 
-                modifiers & Qt.KeyboardModifier.ShiftModifier):
-                logging.info("Emergency submit key combination detected in Qt event filter")
-                # Don't block this event
-                return False
-            
-            # Check if we're in a dialog - don't block keys if so
-            if SUPPRESS_FOCUS_CHECKS:
-                # Let dialog handle its own keyboard events
-                return super().eventFilter(obj, event)
-            
-            # Allow regular keys needed for form input and UI interaction
-            if ((key >= Qt.Key.Key_A and key <= Qt.Key.Key_Z) or  # Letters
-                (key >= Qt.Key.Key_0 and key <= Qt.Key.Key_9) or  # Numbers
-                key == Qt.Key.Key_Space or                        # Space
-                key == Qt.Key.Key_Return or                      # Enter/Return
-                key == Qt.Key.Key_Backspace or                   # Backspace
-                key == Qt.Key.Key_Delete or                      # Delete
-                (key >= Qt.Key.Key_Left and key <= Qt.Key.Key_Down)):  # Arrow keys
-                return False  # Don't block these keys
-                
-            # Comprehensive blocking of problematic keys
-            # Block function keys
-            if key >= Qt.Key.Key_F1 and key <= Qt.Key.Key_F12:
-                logging.info(f"Blocked function key {key - Qt.Key.Key_F1 + 1} through Qt event filter")
-                return True  # Block the event
-                
-            # Block Escape only outside of dialogs
-            if key == Qt.Key.Key_Escape:
-                logging.info("Blocked Escape through Qt event filter")
-                return True
-                
-            # Block Tab
-            if key == Qt.Key.Key_Tab:
-                logging.info("Blocked Tab through Qt event filter")
-                return True
-                
-            # Block Alt modifiers
-            if modifiers & Qt.KeyboardModifier.AltModifier:
-                logging.info("Blocked Alt combination through Qt event filter")
-                return True
-                
-            # Block Windows key combinations
-            if modifiers & Qt.KeyboardModifier.MetaModifier:
-                logging.info("Blocked Windows key combination through Qt event filter")
-                return True
-                
-        # Handle window deactivate events with dialog awareness
-        elif event.type() == QEvent.Type.WindowDeactivate:
-            # Only handle window deactivation for the main window
-            if isinstance(obj, MainWindow):
-                # Don't immediately reactivate if a dialog is opening
-                if SUPPRESS_FOCUS_CHECKS:
-                    logging.debug("Window deactivate during dialog interaction - allowing")
-                    return super().eventFilter(obj, event)
-                    
-                # Check if deactivation is due to a dialog that might be opening
-                # This requires scanning for dialogs that are becoming active
-                for widget in QApplication.topLevelWidgets():
-                    if ((isinstance(widget, QDialog) or isinstance(widget, QMessageBox)) and 
-                        widget.isVisible()):
-                        # Add this dialog to our tracking
-                        if widget not in self.active_dialogs:
-                            self.active_dialogs.append(widget)
-                            self.request_suppression_change(True)
-                        logging.debug("Window deactivated due to visible dialog - allowing")
-                        return super().eventFilter(obj, event)
-                
-                # No dialog detected, schedule focus restore with a delay
-                # The delay helps avoid conflict if a dialog is about to appear
-                logging.debug("Window deactivate event - scheduling delayed re-activation")
-                QTimer.singleShot(250, lambda: self.delayed_focus_restore(obj))
+        # Check for emergency exit combination
+        if action == INPUT_EMERGENCY:
+            logging.info("EMERGENCY EXIT combination detected in filter!")
+            # Try triggering the emergency submit function
+            if self.window is not None:
+                self.window.trigger_emergency_submit()
+            # If we somehow get here, force exit
+            os._exit(0)
         
-        return super().eventFilter(obj, event)
+        return action == INPUT_BLOCK
     
     def request_suppression_change(self, suppress):
         """Request a change in suppression state with debouncing to prevent flicker"""
@@ -279,52 +331,14 @@ class DialogMonitor(QObject):
     
     def dialog_stabilized(self):
         """Called when dialog is considered stable - ensures dialog has focus"""
-        if self.active_dialogs:
+        dialog = dialog_registry.latest()
+        if dialog is not None:
             # Ensure the most recent dialog has focus
-            dialog = self.active_dialogs[-1]
             if not dialog.hasFocus() and dialog.isVisible():
                 logging.debug("Ensuring dialog has focus after stabilization")
                 dialog.activateWindow()
                 dialog.raise_()
     
-    def is_dialog_child(self, obj):
-        """Check if object is a child of a dialog"""
-        if hasattr(obj, 'parent'):
-            parent = obj.parent()
-            while parent:
-                if isinstance(parent, QDialog) or isinstance(parent, QMessageBox):
-                    return True
-                parent = parent.parent() if hasattr(parent, 'parent') else None
-        return False
-    
-    def scan_for_dialogs(self):
-        """Backup method to scan for dialogs with improved stability"""
-        found_dialogs = []
-        for widget in QApplication.topLevelWidgets():
-            if (isinstance(widget, QDialog) or isinstance(widget, QMessageBox)) and widget.isVisible():
-                found_dialogs.append(widget)
-        
-        # Update our list and state
-        if found_dialogs and not self.active_dialogs:
-            self.active_dialogs = found_dialogs
-            self.request_suppression_change(True)
-            # Reset dialog stability timer
-            self.dialog_stable_timer.start(300)
-            logging.info(f"Dialog scan found active dialogs: {len(found_dialogs)}")
-        elif self.suppression_active and not found_dialogs:
-            # No visible dialogs but suppression is active - wait to confirm
-            if not self.active_dialogs:
-                # Double-check for any visible dialogs
-                for widget in QApplication.topLevelWidgets():
-                    if ((isinstance(widget, QDialog) or isinstance(widget, QMessageBox)) and 
-                        widget.isVisible()):
-                        found_dialogs.append(widget)
-                
-                if not found_dialogs:
-                    # Dialogs really are gone - release suppression after delay
-                    QTimer.singleShot(500, lambda: self.update_focus_suppression(False))
-                    logging.info("Dialog scan confirmed no active dialogs")
-    
     def update_focus_suppression(self, suppress):
         """Update the global focus suppression flag with state tracking"""
         global SUPPRESS_FOCUS_CHECKS
@@ -346,192 +360,143 @@ class DialogMonitor(QObject):
             QTimer.singleShot(400, self.resume_all_focus_timers)
     
     def pause_all_focus_timers(self):
-        """Pause all focus checking timers"""
-        # Find all timers connected to focus checking
-        for window in QApplication.topLevelWidgets():
-            if hasattr(window, 'focus_timer') and window.focus_timer.isActive():
-                window.focus_timer.stop()
-                # Mark it as temporarily stopped
-                window.focus_timer.setProperty("temp_stopped", True)
-                logging.debug(f"Paused focus timer for {window.__class__.__name__}")
+        """Hold off focus restores while a dialog is up"""
+        focus_guard.pause()
     
     def resume_all_focus_timers(self):
-        """Resume all previously paused focus timers with additional checks"""
-        # Only restart timers if dialogs are really gone
-        if self.active_dialogs:
-            logging.debug("Not resuming timers - dialogs still active")
+        """Let the focus guard check focus again once dialogs are really gone"""
+        if dialog_registry.active():
+            logging.debug("Not resuming focus checks - dialogs still active")
             return
-            
-        # Double-check for any visible dialogs before resuming
-        for widget in QApplication.topLevelWidgets():
-            if ((isinstance(widget, QDialog) or isinstance(widget, QMessageBox)) and 
-                widget.isVisible()):
-                logging.debug("Not resuming timers - dialog still visible")
-                return
-                
-        for window in QApplication.topLevelWidgets():
-            if hasattr(window, 'focus_timer') and window.focus_timer.property("temp_stopped"):
-                window.focus_timer.setProperty("temp_stopped", False)
-                window.focus_timer.start()
-                logging.debug(f"Resumed focus timer for {window.__class__.__name__}")
-                
-    def delayed_focus_restore(self, window):
-        """Safely restore focus to window with dialog awareness"""
-        # Double-check for dialogs before actually restoring focus
-        global SUPPRESS_FOCUS_CHECKS
-        if SUPPRESS_FOCUS_CHECKS:
-            logging.debug("Not restoring focus - suppression active")
+        focus_guard.check_now()
+
+
+# -----------------------------------------------------------------------------
+# Focus Guard
+# -----------------------------------------------------------------------------
+FOCUS_GUARD_CONFIG = {
+    "restore_delay_ms": 250,     # Debounce before pulling focus back
+    "resume_delay_ms": 400,      # Settle time after the last dialog closes
+    "max_retry_delay_ms": 4000,  # Back-off cap while the OS refuses to hand focus back
+}
+
+
+class FocusGuard:
+    """Keeps the exam window focused, woken only by Qt focus and dialog changes.
+
+    focusWindowChanged and applicationStateChanged schedule one debounced
+    restore; DialogMonitor reports dialog show/hide so nothing walks
+    QApplication.topLevelWidgets() on a timer. If a restore does not stick,
+    retries back off up to max_retry_delay_ms until focus comes back.
+    """
+
+    def __init__(self, config=None):
+        self.config = merged_config(FOCUS_GUARD_CONFIG, config, "focus guard")
+        self.window = None
+        self.active = False
+        self.connected = False
+        self.restore_timer = None
+        self.resume_timer = None
+        self.retry_delay_ms = self.config["restore_delay_ms"]
+        self.wakeups = 0
+        self.restores = 0
+
+    def attach(self, window):
+        """Start guarding window; needs the QApplication, so called from the window itself"""
+        self.window = window
+        if not self.connected:
+            self.restore_timer = QTimer()
+            self.restore_timer.setSingleShot(True)
+            self.restore_timer.timeout.connect(self.restore_focus)
+            self.resume_timer = QTimer()
+            self.resume_timer.setSingleShot(True)
+            self.resume_timer.timeout.connect(self.check_now)
+            app = QGuiApplication.instance()
+            app.focusWindowChanged.connect(self.on_focus_window_changed)
+            app.applicationStateChanged.connect(self.on_application_state_changed)
+            self.connected = True
+        self.active = True
+        logging.info(f"Focus guard attached to {window.__class__.__name__}")
+
+    def stop(self):
+        if not self.active:
             return
-            
-        # Check again for any visible dialogs
-        for widget in QApplication.topLevelWidgets():
-            if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
-                if widget.isVisible():
-                    if widget not in self.active_dialogs:
-                        self.active_dialogs.append(widget)
-                        self.request_suppression_change(True)
-                    logging.debug("Not restoring focus - dialog visible")
-                    return
-        
-        # Also check for modal dialogs
-        for widget in QApplication.topLevelWidgets():
-            if hasattr(widget, 'isModal') and widget.isModal() and widget.isVisible():
-                logging.debug("Not restoring focus - modal dialog active")
-                return
-        
-        # Safe to restore focus
-        logging.debug("Delayed focus restore - activating window")
-        window.activateWindow()
-        window.raise_()
+        self.active = False
+        self.pause()
+        logging.info(f"Focus guard stopped: {self.wakeups} wakeups, {self.restores} restores")
+
+    def pause(self):
+        """Drop any pending restore, e.g. while a dialog is opening"""
+        if self.restore_timer is not None:
+            self.restore_timer.stop()
+        if self.resume_timer is not None:
+            self.resume_timer.stop()
+
+    def resume(self):
+        """Suppression lifted - focus may have moved while a dialog was up, so check once"""
+        if self.active and self.resume_timer is not None:
+            self.resume_timer.start(self.config["resume_delay_ms"])
+
+    def dialog_active(self):
+        """True while focus must be left alone: suppression, a modal, a popup or a tracked dialog"""
+        return SUPPRESS_FOCUS_CHECKS or dialog_registry.any_open() or QApplication.activePopupWidget() is not None
+
+    def focus_in_dialog(self):
+        return dialog_registry.owns(QApplication.focusWidget())
+
+    def exam_submitted(self):
+        exam_page = getattr(self.window, 'exam_page', None)
+        return bool(getattr(exam_page, 'exam_submitted', False))
+
+    def window_focused(self):
+        handle = self.window.windowHandle()
+        return handle is not None and QGuiApplication.focusWindow() is handle
+
+    def on_focus_window_changed(self, focus_window):
+        self.wakeups += 1
+        if not self.active or self.window is None:
+            return
+        if focus_window is not None and focus_window is self.window.windowHandle():
+            # Back in front - cancel any pending restore and reset the back-off
+            self.restore_timer.stop()
+            self.retry_delay_ms = self.config["restore_delay_ms"]
+            return
+        self.check_now()
 
-# Improved patched check focus method
-def patched_check_focus(self):
-    """Patched version of check_focus that respects the global suppression flag
-    and adds additional safeguards against dialog blinking"""
-    global SUPPRESS_FOCUS_CHECKS
-    
-    # Don't try to restore focus if an exam is already submitted
-    if hasattr(self, 'exam_page') and hasattr(self.exam_page, 'exam_submitted') and self.exam_page.exam_submitted:
-        # Stop checking focus if exam is submitted
-        if hasattr(self, 'focus_timer') and self.focus_timer.isActive():
-            self.focus_timer.stop()
+    def on_application_state_changed(self, state):
+        self.wakeups += 1
+        if state != Qt.ApplicationState.ApplicationActive:
+            self.check_now()
+
+    def check_now(self):
+        """One focus check - schedules a debounced restore if the window lost focus"""
+        if not self.active or self.window is None:
+            return
+        if self.exam_submitted():
             logging.info("Stopped focus checking - exam already submitted")
-        return
-    
-    # Check the global suppression flag first
-    if SUPPRESS_FOCUS_CHECKS:
-        # Skip focus check while dialogs are active
-        return
-    
-    # Additional safety check for any visible dialogs - more thorough
-    for widget in QApplication.topLevelWidgets():
-        if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
-            if widget.isVisible():
-                # Dialog found - don't restore focus
-                # Set suppression flag to prevent focus war
-                global_suppress_focus_checks(True)
-                return
-                
-        # Also check for modal dialogs that might be opening
-        if hasattr(widget, 'isModal') and widget.isModal() and widget.isVisible():
-            # Modal dialog found - don't restore focus
-            global_suppress_focus_checks(True)
+            self.stop()
             return
-    
-    # Now safe to check and restore focus
-    active_window = QGuiApplication.focusWindow()
-    if active_window is not self:
-        # Make sure we're not stealing focus from a dialog
-        focused_widget = QApplication.focusWidget()
-        if focused_widget:
-            # Check if the focused widget is part of a dialog
-            parent = focused_widget
-            while parent:
-                if isinstance(parent, QDialog) or isinstance(parent, QMessageBox):
-                    # Dialog found - don't restore focus
-                    global_suppress_focus_checks(True)
-                    return
-                if hasattr(parent, 'parent'):
-                    parent = parent.parent()
-                else:
-                    break
-        
-        logging.info("Window lost focus - restoring")
-        # Add a small delay before restoring focus
-        QTimer.singleShot(100, lambda: self.delayed_focus_restore())
-        
-def delayed_focus_restore(window):
-    """Delayed focus restoration with additional dialog checking"""
-    global SUPPRESS_FOCUS_CHECKS
-    
-    # Double-check for dialogs before actually restoring focus
-    if SUPPRESS_FOCUS_CHECKS:
-        logging.debug("Not restoring focus - suppression active")
-        return
-        
-    # Check again for any visible dialogs
-    for widget in QApplication.topLevelWidgets():
-        if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
-            if widget.isVisible():
-                # Dialog found - don't restore focus
-                global_suppress_focus_checks(True)
-                logging.debug("Not restoring focus - dialog visible")
-                return
-    
-    # Also check for modal dialogs
-    for widget in QApplication.topLevelWidgets():
-        if hasattr(widget, 'isModal') and widget.isModal() and widget.isVisible():
-            global_suppress_focus_checks(True)
-            logging.debug("Not restoring focus - modal dialog active")
+        if self.dialog_active() or self.focus_in_dialog() or self.window_focused():
             return
-    
-    logging.debug("Delayed focus restore - activating window")
-    window.activateWindow()
-    window.raise_()
+        if not self.restore_timer.isActive():
+            logging.info("Window lost focus - restoring")
+            self.restore_timer.start(self.retry_delay_ms)
 
-def patched_check_app_focus(window):
-    """Patched app-level focus checker that respects the global suppression flag
-    and has improved dialog detection"""
-    global SUPPRESS_FOCUS_CHECKS
-    
-    # Check the global suppression flag first
-    if SUPPRESS_FOCUS_CHECKS:
-        # Skip app focus check while dialogs are active
-        return
-    
-    # Additional safety check for any visible dialogs with improved detection
-    for widget in QApplication.topLevelWidgets():
-        if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
-            if widget.isVisible():
-                # Dialog found - don't restore focus and ensure suppression is active
-                global_suppress_focus_checks(True)
-                return
-                
-        # Also check for modal dialogs
-        if hasattr(widget, 'isModal') and widget.isModal() and widget.isVisible():
-            global_suppress_focus_checks(True)
+    def restore_focus(self):
+        if not self.active or self.dialog_active() or self.focus_in_dialog():
             return
-    
-    if window and not window.isActiveWindow():
-        # Make sure we're not stealing focus from a dialog
-        focused_widget = QApplication.focusWidget()
-        if focused_widget:
-            # Check if the focused widget is part of a dialog
-            parent = focused_widget
-            while parent:
-                if isinstance(parent, QDialog) or isinstance(parent, QMessageBox):
-                    # Don't restore focus if a dialog has focus
-                    global_suppress_focus_checks(True)
-                    return
-                if hasattr(parent, 'parent'):
-                    parent = parent.parent()
-                else:
-                    break
-                    
-        # Only restore focus if no dialogs are active
-        logging.info("Application focus check - restoring focus")
-        # Add a longer delay before restoring focus
-        QTimer.singleShot(250, lambda: delayed_focus_restore(window))
+        if self.window_focused():
+            self.retry_delay_ms = self.config["restore_delay_ms"]
+            return
+        self.restores += 1
+        self.window.activateWindow()
+        self.window.raise_()
+        # If the OS refused, focusWindowChanged will not fire again - retry with back-off
+        self.retry_delay_ms = min(self.retry_delay_ms * 2, self.config["max_retry_delay_ms"])
+        self.restore_timer.start(self.retry_delay_ms)
+
+
+focus_guard = FocusGuard()
 
 def global_suppress_focus_checks(suppress):
     """Helper function to update global suppression flag and handle side effects"""
@@ -542,122 +507,20 @@ def global_suppress_focus_checks(suppress):
         SUPPRESS_FOCUS_CHECKS = suppress
         logging.info(f"Global focus suppression set to {suppress}")
         
-        # If suppressing, pause all focus timers
+        # Hold pending restores while suppressed; re-check once after a delay
         if suppress:
-            # Find all focus timers and pause them
-            for window in QApplication.topLevelWidgets():
-                if hasattr(window, 'focus_timer') and window.focus_timer.isActive():
-                    window.focus_timer.stop()
-                    window.focus_timer.setProperty("temp_stopped", True)
-                    logging.debug(f"Paused focus timer for {window.__class__.__name__}")
+            focus_guard.pause()
         else:
-            # Give a delay before resuming timers
-            QTimer.singleShot(400, resume_focus_timers) 
-def resume_focus_timers():
-    """Helper function to resume focus timers after dialog closes"""
-    # Check again that no dialogs are visible before resuming
-    for widget in QApplication.topLevelWidgets():
-        if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
-            if widget.isVisible():
-                logging.debug("Not resuming timers - dialog still visible")
-                return
-    
-    # Safe to resume timers
-    for window in QApplication.topLevelWidgets():
-        if hasattr(window, 'focus_timer') and window.focus_timer.property("temp_stopped"):
-            window.focus_timer.setProperty("temp_stopped", False)
-            window.focus_timer.start()
-            logging.debug(f"Resumed focus timer for {window.__class__.__name__}")
-    
-    logging.info("Focus timers resumed")    
+            resume_focus_timers()
 
-def patched_check_app_focus(window):
-    """Patched app-level focus checker that respects the global suppression flag
-    and has improved dialog detection"""
-    global SUPPRESS_FOCUS_CHECKS
-    
-    # Check the global suppression flag first
-    if SUPPRESS_FOCUS_CHECKS:
-        # Skip app focus check while dialogs are active
-        return
-    
-    # Additional safety check for any visible dialogs with improved detection
-    for widget in QApplication.topLevelWidgets():
-        if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
-            if widget.isVisible():
-                # Dialog found - don't restore focus and ensure suppression is active
-                global_suppress_focus_checks(True)
-                return
-                
-        # Also check for modal dialogs
-        if hasattr(widget, 'isModal') and widget.isModal() and widget.isVisible():
-            global_suppress_focus_checks(True)
-            return
-    
-    if window and not window.isActiveWindow():
-        # Make sure we're not stealing focus from a dialog
-        focused_widget = QApplication.focusWidget()
-        if focused_widget:
-            # Check if the focused widget is part of a dialog
-            parent = focused_widget
-            while parent:
-                if isinstance(parent, QDialog) or isinstance(parent, QMessageBox):
-                    # Don't restore focus if a dialog has focus
-                    global_suppress_focus_checks(True)
-                    return
-                if hasattr(parent, 'parent'):
-                    parent = parent.parent()
-                else:
-                    break
-                    
-        # Only restore focus if no dialogs are active
-        logging.info("Application focus check - restoring focus")
-        # Add a longer delay before restoring focus
-        QTimer.singleShot(250, lambda: delayed_focus_restore(window))
-def improved_delayed_focus_restore(window):
-    """Improved version of delayed focus restoration with additional dialog checking"""
-    global SUPPRESS_FOCUS_CHECKS
-    
-    # Double-check for dialogs before actually restoring focus
-    if SUPPRESS_FOCUS_CHECKS:
-        logging.debug("Not restoring focus - suppression active")
+def resume_focus_timers():
+    """Helper function to let the focus guard re-check after a dialog closes"""
+    if focus_guard.dialog_active():
+        logging.debug("Not resuming focus checks - dialog still visible")
         return
-        
-    # Check again for any visible dialogs
-    for widget in QApplication.topLevelWidgets():
-        if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
-            if widget.isVisible():
-                # Dialog found - don't restore focus
-                global_suppress_focus_checks(True)
-                logging.debug("Not restoring focus - dialog visible")
-                return
-    
-    # Also check for modal dialogs
-    for widget in QApplication.topLevelWidgets():
-        if hasattr(widget, 'isModal') and widget.isModal() and widget.isVisible():
-            global_suppress_focus_checks(True)
-            logging.debug("Not restoring focus - modal dialog active")
-            return
-    
-    # Additional safety check for focus - ensure we're not stealing focus from a legitimate app
-    focused_widget = QApplication.focusWidget()
-    if focused_widget and not window.isAncestorOf(focused_widget):
-        # Check if the focused widget is part of a dialog
-        parent = focused_widget
-        while parent:
-            if isinstance(parent, QDialog) or isinstance(parent, QMessageBox):
-                # Dialog found - don't restore focus
-                global_suppress_focus_checks(True)
-                logging.debug("Not restoring focus - dialog has focus")
-                return
-            if hasattr(parent, 'parent'):
-                parent = parent.parent()
-            else:
-                break
-    
-    logging.debug("Improved delayed focus restore - activating window")
-    window.activateWindow()
-    window.raise_()       
+    focus_guard.resume()
+    logging.info("Focus checks resumed")
+
 def setup_global_emergency_exit():
     """Set up a global keyboard hook specifically for emergency exit"""
     try:
@@ -683,6 +546,13 @@ def force_emergency_exit():
     import os
     os._exit(0)
 
+# -----------------------------------------------------------------------------
+# Input Policy
+# -----------------------------------------------------------------------------
+# The decision table is in input_policy.py; the keyboard hook and the Qt filter share this instance
+input_policy = InputPolicy()
+
+
 # -----------------------------------------------------------------------------
 # Key Blocking
 # -----------------------------------------------------------------------------
@@ -691,22 +561,6 @@ def block_system_keys():
     try:
         logging.info("Initializing enhanced key blocking system")
         
-        # Create a global whitelist for allowed keyboard actions
-        global ALLOWED_KEYS
-        ALLOWED_KEYS = {
-            'enter',          # Allow enter key for form submission
-            'return',         # Some systems detect return key differently
-            'space',          # Allow space for UI interactions
-            'up', 'down', 'left', 'right',  # Allow arrow keys for navigation
-            'backspace',      # Allow editing in form fields
-            'delete',         # Allow editing in form fields
-            'shift',          # Allow shift for text input
-        }
-        
-        # Allow common alphanumeric keys for text entry
-        for char in 'abcdefghijklmnopqrstuvwxyz0123456789':
-            ALLOWED_KEYS.add(char)
-        
         # Method 1: Using direct key blocking for specific system keys
         for key in ['f1', 'f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8', 'f9', 'f10', 'f11', 'f12']:
             keyboard.block_key(key)
@@ -752,55 +606,10 @@ def block_system_keys():
             logging.info(f"Blocking combination {combo}")
         
         # Method 3: Global keyboard hook as a failsafe
-        # This is the most comprehensive approach as it intercepts ALL keyboard events
-        def keyboard_hook_handler(event):
-            """Handle keyboard events from the global hook"""
-            # For key down events, check if it's a key we want to block
-            if event.event_type == keyboard.KEY_DOWN:
-                key_name = event.name.lower() if event.name else ""
-                
-                # Emergency override for exam submission (Ctrl+Shift+E)
-                if keyboard.is_pressed('ctrl') and keyboard.is_pressed('shift') and key_name == 'e':
-                    logging.info("Emergency submit key combination detected - allowing")
-                    return True  # Allow the event to pass through
-                
-                # Check if the key is in our whitelist - if so, allow it
-                if key_name in ALLOWED_KEYS:
-                    return True  # Allow the event
-                
-                # Comprehensive list of keys to block
-                blocked_keys = [
-                    'f1', 'f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8', 'f9', 'f10', 'f11', 'f12',
-                    'esc', 'tab', 'win', 'print screen', 'menu',
-                    # Include the actual scan codes for function keys as some systems report them differently
-                    '112', '113', '114', '115', '116', '117', '118', '119', '120', '121', '122', '123',
-                ]
-                
-                # Check if our key is in the blocked list
-                for blocked_key in blocked_keys:
-                    if blocked_key in key_name or blocked_key == str(event.scan_code):
-                        logging.info(f"Blocked key {key_name} (scan code: {event.scan_code}) via global hook")
-                        return False  # Block the event
-                
-                # Also block if any modifiers are held with certain keys
-                if keyboard.is_pressed('alt') or keyboard.is_pressed('win'):
-                    sensitive_keys = ['tab', 'esc', 'd', 'e', 'r', 'q', 'w']
-                    for sensitive_key in sensitive_keys:
-                        if sensitive_key in key_name:
-                            logging.info(f"Blocked modifier+{key_name} via global hook")
-                            return False  # Block the event
-                
-                # Allow Ctrl key combinations that are not explicitly blocked
-                # This enables common interactions like Ctrl+A (select all), Ctrl+C (copy), etc.
-                if keyboard.is_pressed('ctrl') and key_name not in ['tab', 'esc', 'w', 'q']:
-                    return True
-            
-            # For all other events, allow them to pass through
-            return True
-        
-        # Register our global hook with suppression enabled
-        keyboard.hook(keyboard_hook_handler, suppress=True)
-        logging.info("Global keyboard hook established with whitelist and emergency override")
+        # This is the most comprehensive approach as it intercepts ALL keyboard events;
+        # decisions come from the shared input policy table
+        keyboard.hook(input_policy.handle_hook_event, suppress=True)
+        logging.info("Global keyboard hook established with input policy table and emergency override")
             
     except Exception as e:
         logging.error(f"Error in key blocking system: {e}")
@@ -849,111 +658,15 @@ def start_key_blocking():
     blocking_thread = threading.Thread(target=blocking_worker, daemon=True)
     blocking_thread.start()
     return blocking_thread
-def patched_eventFilter(self, obj, event):
-    """Fixed event filter that prevents focus wars with dialogs"""
-    global SUPPRESS_FOCUS_CHECKS
-    
-    # Ignore WindowDeactivate events during dialog interaction
-    if event.type() == QEvent.Type.WindowDeactivate:
-        # Check if this is our main window being deactivated
-        if obj is self:
-            # If we're in a dialog interaction, don't try to reactivate
-            if SUPPRESS_FOCUS_CHECKS:
-                logging.debug("Window deactivate during dialog - allowing")
-                return super(MainWindow, self).eventFilter(obj, event)
-                
-            # Check if deactivation is due to a dialog opening
-            for widget in QApplication.topLevelWidgets():
-                if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
-                    if widget.isVisible():
-                        global_suppress_focus_checks(True)
-                        logging.debug("Window deactivate due to dialog - allowing")
-                        return super(MainWindow, self).eventFilter(obj, event)
-                
-                # Also check for modal dialogs
-                if hasattr(widget, 'isModal') and widget.isModal() and widget.isVisible():
-                    global_suppress_focus_checks(True)
-                    logging.debug("Window deactivate due to modal dialog - allowing")
-                    return super(MainWindow, self).eventFilter(obj, event)
-            
-            # No dialog detected, schedule focus restore with a delay
-            logging.debug("Window deactivate event - scheduling delayed re-activation")
-            QTimer.singleShot(300, self.delayed_focus_restore)
-    
-    # Handle key events as before
-    elif event.type() == QEvent.Type.KeyPress:
-        key = event.key()
-        modifiers = event.modifiers()
-        
-        # Enhanced detection for emergency exit
-        is_ctrl = modifiers & Qt.KeyboardModifier.ControlModifier
-        is_shift = modifiers & Qt.KeyboardModifier.ShiftModifier
-        is_e_key = key == Qt.Key.Key_E
-        
-        # Check for emergency exit combination
-        if is_ctrl and is_shift and is_e_key:
-            logging.info("EMERGENCY EXIT combination detected in filter!")
-            # Try triggering the emergency submit function
-            self.trigger_emergency_submit()
-            # If we somehow get here, force exit
-            import os
-            os._exit(0)
-            return True  # Handled
-            
-        # Allow Ctrl+Shift+E for emergency submit
-        if (key == Qt.Key.Key_E and 
-            modifiers & Qt.KeyboardModifier.ControlModifier and 
-            modifiers & Qt.KeyboardModifier.ShiftModifier):
-            logging.info("Emergency submit key combination detected in Qt event filter")
-            # Don't block this event
-            return False
-        
-        # Allow regular keys needed for form input and UI interaction
-        if ((key >= Qt.Key.Key_A and key <= Qt.Key.Key_Z) or  # Letters
-            (key >= Qt.Key.Key_0 and key <= Qt.Key.Key_9) or  # Numbers
-            key == Qt.Key.Key_Space or                        # Space
-            key == Qt.Key.Key_Return or                      # Enter/Return
-            key == Qt.Key.Key_Backspace or                   # Backspace
-            key == Qt.Key.Key_Delete or                      # Delete
-            (key >= Qt.Key.Key_Left and key <= Qt.Key.Key_Down)):  # Arrow keys
-            return False  # Don't block these keys
-            
-        # Allow Escape key in dialogs
-        if key == Qt.Key.Key_Escape and SUPPRESS_FOCUS_CHECKS:
-            return False  # Don't block Escape in dialogs
-            
-        # Comprehensive blocking of problematic keys
-        # Block function keys
-        if key >= Qt.Key.Key_F1 and key <= Qt.Key.Key_F12:
-            logging.info(f"Blocked function key {key - Qt.Key.Key_F1 + 1} through Qt event filter")
-            return True  # Block the event
-            
-        # Block Escape outside of dialogs
-        if key == Qt.Key.Key_Escape and not SUPPRESS_FOCUS_CHECKS:
-            logging.info("Blocked Escape through Qt event filter")
-            return True
-            
-        # Block Tab
-        if key == Qt.Key.Key_Tab:
-            logging.info("Blocked Tab through Qt event filter")
-            return True
-            
-        # Block Alt modifiers
-        if modifiers & Qt.KeyboardModifier.AltModifier:
-            logging.info("Blocked Alt combination through Qt event filter")
-            return True
-            
-        # Block Windows key combinations
-        if modifiers & Qt.KeyboardModifier.MetaModifier:
-            logging.info("Blocked Windows key combination through Qt event filter")
-            return True
-            
-    return super(MainWindow, self).eventFilter(obj, event)
 # -----------------------------------------------------------------------------
 # API Integration: Login API
 # -----------------------------------------------------------------------------
 SESSION_TOKEN = None
 
+# Base URL for the recording endpoints. Point EVALUATE_API_BASE at the local
+# stand-in server (stand_in_server.py) to exercise uploads without the real API.
+API_BASE_URL = os.environ.get("EVALUATE_API_BASE", "https://stageevaluate.sentientgeeks.us/wp-json/api/v1").rstrip("/")
+
 def login_api(exam_code):
     url = "https://stageevaluate.sentientgeeks.us/wp-json/api/v1/login"
     payload = {"exam_link": exam_code}
@@ -1161,15 +874,448 @@ def format_answer_for_api(question_type, answer):
     # Default case
     return str(answer) if answer is not None else ""
 
+# -----------------------------------------------------------------------------
+# Task Scheduler
+# -----------------------------------------------------------------------------
+# Periodic work registers here instead of owning a QTimer. One single-shot timer
+# wakes for the earliest deadline and runs every task whose tolerance window
+# has opened, so tasks that fall due together share a wakeup.
+TASK_PRIORITY_HIGH = 0    # Never stretched: countdowns, segment rotation, snapshots
+TASK_PRIORITY_NORMAL = 1  # Stretched on battery
+TASK_PRIORITY_LOW = 2     # Stretched on battery and when the candidate is idle
+
+TASK_SCHEDULER_CONFIG = {
+    "tolerance": {TASK_PRIORITY_HIGH: 0.0, TASK_PRIORITY_NORMAL: 0.1, TASK_PRIORITY_LOW: 0.25},  # Fraction of interval
+    "battery_stretch": 2.0,
+    "idle_stretch": 2.0,
+    "max_stretch": 4.0,
+    "idle_after_ms": 60000,             # No key press or click for this long counts as idle
+    "power_check_interval_ms": 60000,
+}
+
+
+class ScheduledTask:
+    """Handle for one periodic task, with the start/stop/isActive subset of QTimer"""
+
+    def __init__(self, scheduler, name, callback, interval_ms, priority, tolerance_ms):
+        self.scheduler = scheduler
+        self.name = name
+        self.callback = callback
+        self.interval_ms = interval_ms
+        self.priority = priority
+        self.tolerance_ms = tolerance_ms
+        self.active = False
+        self.due = 0.0
+        self.runs = 0
+        self.total_ms = 0.0
+
+    def start(self, interval_ms=None):
+        if interval_ms is not None:
+            self.interval_ms = interval_ms
+        self.scheduler.arm(self)
+
+    def stop(self):
+        self.scheduler.disarm(self)
+
+    def isActive(self):
+        return self.active
+
+    def tolerance(self):
+        if self.tolerance_ms is not None:
+            return self.tolerance_ms
+        return self.interval_ms * self.scheduler.config["tolerance"][self.priority]
+
+
+class TaskScheduler:
+    """Coalesces periodic tasks onto shared wakeups and stretches them when idle or on battery"""
+
+    def __init__(self, config=None):
+        self.config = merged_config(TASK_SCHEDULER_CONFIG, config, "task scheduler")
+        self.tasks = []
+        self.timer = None
+        self.on_battery = False
+        self.app_active = True
+        self.last_activity = time.monotonic()
+        self.wakeups = 0
+        self.runs = 0
+        self.power_task = None
+
+    def ensure_started(self):
+        """Create the wakeup timer and power/idle hooks; needs the QApplication"""
+        if self.timer is not None:
+            return
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)  # Batching comes from the tolerances
+        self.timer.timeout.connect(self.wakeup)
+        app = QGuiApplication.instance()
+        if app is not None:
+            app.applicationStateChanged.connect(self.on_application_state_changed)
+        self.update_power_state()
+        self.power_task = self.register("power_state", self.update_power_state,
+                                        self.config["power_check_interval_ms"], TASK_PRIORITY_LOW)
+        self.power_task.start()
+
+    def register(self, name, callback, interval_ms, priority=TASK_PRIORITY_NORMAL, tolerance_ms=None):
+        """Add a periodic task (inactive until started) and return its handle.
+
+        A task already registered under the same name is stopped and replaced.
+        """
+        for existing in [task for task in self.tasks if task.name == name]:
+            self.unregister(existing)
+        task = ScheduledTask(self, name, callback, interval_ms, priority, tolerance_ms)
+        self.tasks.append(task)
+        return task
+
+    def unregister(self, task):
+        task.stop()
+        if task in self.tasks:
+            self.tasks.remove(task)
+
+    def stretch(self, priority):
+        if priority == TASK_PRIORITY_HIGH:
+            return 1.0
+        factor = self.config["battery_stretch"] if self.on_battery else 1.0
+        if priority == TASK_PRIORITY_LOW and self.is_idle():
+            factor *= self.config["idle_stretch"]
+        return min(factor, self.config["max_stretch"])
+
+    def is_idle(self):
+        idle_s = self.config["idle_after_ms"] / 1000
+        return not self.app_active or time.monotonic() - self.last_activity > idle_s
+
+    def note_activity(self):
+        """Called from the event dispatcher on key presses and clicks"""
+        self.last_activity = time.monotonic()
+
+    def on_application_state_changed(self, state):
+        self.app_active = state == Qt.ApplicationState.ApplicationActive
+
+    def update_power_state(self):
+        try:
+            battery = psutil.sensors_battery()
+        except Exception:
+            battery = None
+        on_battery = battery is not None and not battery.power_plugged
+        if on_battery != self.on_battery:
+            logging.info(f"Task scheduler: {'on battery - stretching intervals' if on_battery else 'on mains power'}")
+        self.on_battery = on_battery
+
+    def arm(self, task):
+        self.ensure_started()
+        task.active = True
+        task.due = time.monotonic() * 1000 + task.interval_ms * self.stretch(task.priority)
+        self.reschedule()
+
+    def disarm(self, task):
+        task.active = False
+        self.reschedule()
+
+    def reschedule(self):
+        if self.timer is None:
+            return
+        deadlines = [task.due + task.tolerance() for task in self.tasks if task.active]
+        if not deadlines:
+            self.timer.stop()
+            return
+        self.timer.start(max(0, math.ceil(min(deadlines) - time.monotonic() * 1000)))
+
+    def wakeup(self):
+        """Run every task whose tolerance window has opened, highest priority first"""
+        self.wakeups += 1
+        now = time.monotonic() * 1000
+        # 1 ms of slack for timer granularity, so a slightly early wakeup is not wasted
+        batch = sorted((task for task in self.tasks if task.active and task.due - task.tolerance() <= now + 1),
+                       key=lambda task: task.priority)
+        for task in batch:
+            interval = task.interval_ms * self.stretch(task.priority)
+            # Keep fixed-rate tasks (the countdowns) from drifting
+            task.due = task.due + interval if task.due + interval > now else now + interval
+        # Re-arm before running callbacks: one may open a modal dialog and spin a
+        # nested event loop, and the other tasks must keep running meanwhile
+        self.reschedule()
+        for task in batch:
+            if not task.active:
+                continue  # Stopped by an earlier task in this batch
+            started = time.perf_counter()
+            try:
+                task.callback()
+            except Exception as e:
+                logging.error(f"Scheduled task {task.name} failed: {e}", exc_info=True)
+            task.runs += 1
+            task.total_ms += (time.perf_counter() - started) * 1000
+            self.runs += 1
+
+    def describe(self):
+        """Registry view: what is scheduled, how often and at what cost"""
+        now = time.monotonic() * 1000
+        return [{
+            "name": task.name,
+            "active": task.active,
+            "priority": task.priority,
+            "interval_ms": task.interval_ms,
+            "effective_interval_ms": round(task.interval_ms * self.stretch(task.priority)),
+            "tolerance_ms": round(task.tolerance()),
+            "next_due_ms": round(task.due - now) if task.active else None,
+            "runs": task.runs,
+            "avg_ms": round(task.total_ms / task.runs, 3) if task.runs else None,
+        } for task in self.tasks]
+
+    def report(self):
+        active = [entry for entry in self.describe() if entry["active"]]
+        logging.info(f"Task scheduler: {len(active)}/{len(self.tasks)} tasks active, "
+                     f"{self.runs} runs in {self.wakeups} wakeups, battery={self.on_battery}, idle={self.is_idle()}")
+        for entry in active:
+            logging.info(f"  {entry['name']}: every {entry['effective_interval_ms']} ms "
+                         f"(±{entry['tolerance_ms']}), {entry['runs']} runs, avg {entry['avg_ms']} ms")
+        return active
+
+
+task_scheduler = TaskScheduler()
+
+# -----------------------------------------------------------------------------
+# Device Registry
+# -----------------------------------------------------------------------------
+# sounddevice has no public call to re-scan devices. _terminate/_initialize are
+# private - written against sounddevice 0.4.x/0.5.x, re-check them when upgrading.
+# Without them the device list stays as PortAudio enumerated it at start-up.
+PORTAUDIO_CAN_RESTART = hasattr(sd, "_terminate") and hasattr(sd, "_initialize")
+
+
+class DeviceRegistry:
+    """Cached camera, screen and audio device lists, refreshed by Qt change signals.
+
+    Listeners registered with add_listener("video" | "screens" | "audio", callback)
+    are called on the GUI thread with the new list whenever it changes.
+
+    Every sounddevice call either holds self.lock or runs between stream_opened()
+    and stream_closed(); PortAudio is only restarted under the lock with no stream
+    open and no audio check running, so no other thread can be inside it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.media_devices = None
+        self.started = False
+        self.cached_video_inputs = None
+        self.cached_screens = None
+        self.cached_audio_devices = None
+        self.cached_audio_defaults = (-1, -1)
+        self.audio_streams = 0  # open streams and running audio checks; PortAudio can't be restarted under them
+        self.audio_reinit_pending = False
+        self.listeners = {"video": [], "screens": [], "audio": []}
+
+    def ensure_started(self):
+        """Subscribe to change notifications; needs the QApplication, so done lazily on the GUI thread"""
+        if self.started or QGuiApplication.instance() is None:
+            return self.started
+        self.started = True
+        self.media_devices = QMediaDevices()
+        self.media_devices.videoInputsChanged.connect(self.refresh_video)
+        self.media_devices.audioInputsChanged.connect(self.refresh_audio)
+        self.media_devices.audioOutputsChanged.connect(self.refresh_audio)
+        app = QGuiApplication.instance()
+        app.screenAdded.connect(lambda screen: self.refresh_screens())
+        app.screenRemoved.connect(lambda screen: self.refresh_screens())
+        return True
+
+    def add_listener(self, kind, callback):
+        self.ensure_started()
+        self.listeners[kind].append(callback)
+
+    def remove_listener(self, kind, callback):
+        if callback in self.listeners[kind]:
+            self.listeners[kind].remove(callback)
+
+    def notify(self, kind, value):
+        for callback in list(self.listeners[kind]):
+            try:
+                callback(value)
+            except Exception as e:
+                logging.error(f"Device listener for {kind} failed: {e}")
+
+    def video_inputs(self):
+        if self.cached_video_inputs is None:
+            self.ensure_started()
+            self.cached_video_inputs = list(QMediaDevices.videoInputs())
+        return self.cached_video_inputs
+
+    def screen_count(self):
+        if self.cached_screens is None:
+            self.ensure_started()
+            self.cached_screens = len(QApplication.screens())
+        return self.cached_screens
+
+    def audio_devices(self):
+        """sounddevice device list plus (default input, default output); safe off the GUI thread"""
+        with self.lock:
+            if self.cached_audio_devices is None:
+                self.cached_audio_devices = list(sd.query_devices())
+                self.cached_audio_defaults = tuple(sd.default.device)
+            return self.cached_audio_devices, self.cached_audio_defaults
+
+    def audio_input_for(self, name):
+        """Index of the input device called name (headsets list both sides), or None for the default"""
+        devices, _ = self.audio_devices()
+        for index, device in enumerate(devices):
+            if device['max_input_channels'] > 0 and device['name'] == name:
+                return index
+        return None
+
+    def refresh_video(self):
+        self.cached_video_inputs = list(QMediaDevices.videoInputs())
+        logging.info(f"Camera list changed: {[camera.description() for camera in self.cached_video_inputs]}")
+        self.notify("video", self.cached_video_inputs)
+
+    def refresh_screens(self):
+        self.cached_screens = len(QApplication.screens())
+        logging.info(f"Screen count changed: {self.cached_screens}")
+        self.notify("screens", self.cached_screens)
+
+    def stream_opened(self):
+        """Call before using sounddevice outside the lock (a stream, sd.play or a whole audio check)"""
+        with self.lock:
+            self.audio_streams += 1
+
+    def stream_closed(self):
+        with self.lock:
+            self.audio_streams = max(0, self.audio_streams - 1)
+            if self.audio_streams == 0 and self.audio_reinit_pending:
+                self.reinitialize_portaudio()
+
+    def reinitialize_portaudio(self):
+        """Restart PortAudio so it enumerates devices again; caller holds the lock"""
+        self.audio_reinit_pending = False
+        self.cached_audio_devices = None
+        if not PORTAUDIO_CAN_RESTART:
+            logging.info("sounddevice can't restart PortAudio - keeping the device list from start-up")
+            return
+        try:
+            sd._terminate()
+            sd._initialize()
+        except Exception as e:
+            logging.error(f"Could not re-initialise PortAudio: {e}")
+
+    def refresh_audio(self):
+        # PortAudio only enumerates devices when it is initialised, so restart it -
+        # unless a stream is open, in which case the restart waits for the last one to close
+        with self.lock:
+            if self.audio_streams:
+                self.audio_reinit_pending = True
+                self.cached_audio_devices = None
+                logging.info("Audio devices changed while a stream is open - PortAudio restart deferred")
+            else:
+                self.reinitialize_portaudio()
+        devices, _ = self.audio_devices()
+        logging.info(f"Audio device list changed: {len(devices)} devices")
+        self.notify("audio", devices)
+
+
+# Global device registry instance
+device_registry = DeviceRegistry()
+
 # -----------------------------------------------------------------------------
 # System Check Functions
 # -----------------------------------------------------------------------------
+# Test tone detection for the audio check. The check passes only when the tone
+# stands out from the background by min_snr_db for confirm_blocks blocks in a row.
+AUDIO_CHECK_CONFIG = {
+    "tone_hz": 1000.0,
+    "samplerate": 44100,
+    "block_ms": 20,
+    "min_snr_db": 10.0,
+    "min_level": 0.002,        # Tone amplitude floor - rules out digital silence
+    "confirm_blocks": 3,       # ~60 ms of clean tone confirms the check
+    "timeout_ms": 1500,
+    "reference_offsets_hz": (-450.0, -300.0, 300.0, 450.0),
+}
+
+
+class GoertzelToneDetector:
+    """Streaming single-frequency detector.
+
+    Computes the Goertzel/single-bin DFT power at the tone and at a few nearby
+    reference frequencies for each block, as one matrix product against
+    precomputed windowed basis vectors. The reference bins give the noise
+    estimate for the SNR.
+    """
+
+    def __init__(self, tone_hz, samplerate, block_size, reference_offsets=(-450.0, -300.0, 300.0, 450.0)):
+        self.block_size = block_size
+        frequencies = np.array([tone_hz] + [tone_hz + offset for offset in reference_offsets])
+        window = np.hanning(block_size)
+        n = np.arange(block_size)
+        self.basis = (np.exp(-2j * np.pi * np.outer(frequencies, n) / samplerate) * window).astype(np.complex64)
+        # Amplitude of a unit sine after windowing, to report the tone level
+        self.amplitude_scale = 2.0 / window.sum()
+
+    def process(self, block):
+        """Return (snr_db, tone_amplitude) for one block"""
+        power = np.abs(self.basis @ block) ** 2
+        noise = max(float(power[1:].mean()), 1e-20)
+        snr_db = 10 * math.log10(max(float(power[0]), 1e-20) / noise)
+        return snr_db, math.sqrt(float(power[0])) * self.amplitude_scale
+
+
+def detect_test_tone(input_device, output_device, loopback=False, config=None):
+    """Play the test tone and stream the input until it is confirmed or the timeout passes"""
+    settings = merged_config(AUDIO_CHECK_CONFIG, config, "audio check")
+    fs = int(settings["samplerate"])
+    block = int(fs * settings["block_ms"] / 1000)
+    detector = GoertzelToneDetector(settings["tone_hz"], fs, block, settings["reference_offsets_hz"])
+
+    duration = settings["timeout_ms"] / 1000 + 0.2
+    tone = (np.sin(2 * np.pi * settings["tone_hz"] * np.arange(int(fs * duration)) / fs) * 0.3).astype(np.float32)
+    extra_settings = sd.WasapiSettings(loopback=True) if loopback else None
+
+    confirmed = []
+    best_snr = -math.inf
+    blocks = 0
+    started = time.monotonic()
+    device_registry.stream_opened()
+    try:
+        with sd.InputStream(samplerate=fs, blocksize=block, channels=1, dtype='float32',
+                            device=output_device if loopback else input_device,
+                            extra_settings=extra_settings) as stream:
+            sd.play(tone, fs, device=output_device)
+            while (time.monotonic() - started) * 1000 < settings["timeout_ms"]:
+                data, _ = stream.read(block)
+                blocks += 1
+                snr_db, level = detector.process(data[:, 0])
+                best_snr = max(best_snr, snr_db)
+                if snr_db >= settings["min_snr_db"] and level >= settings["min_level"]:
+                    confirmed.append(snr_db)
+                    if len(confirmed) >= settings["confirm_blocks"]:
+                        break
+                else:
+                    confirmed = []
+    finally:
+        sd.stop()
+        device_registry.stream_closed()
+
+    detected = len(confirmed) >= settings["confirm_blocks"]
+    return {
+        "detected": detected,
+        "snr_db": round(float(np.median(confirmed)) if detected else best_snr, 1),
+        "elapsed_ms": int((time.monotonic() - started) * 1000),
+        "blocks": blocks,
+    }
+
+
 def check_audio():
-    duration = 0.5
-    fs = 44100
+    # Counts as an open stream for the whole check so a hot-plug can't restart
+    # PortAudio and renumber the devices between the lookup and the tone test
+    device_registry.stream_opened()
     try:
-        # Get available devices
-        devices = sd.query_devices()
+        return run_audio_check()
+    finally:
+        device_registry.stream_closed()
+
+
+def run_audio_check():
+    try:
+        # Get available devices (cached by the registry, refreshed on hot-plug)
+        devices, (default_in, default_out) = device_registry.audio_devices()
         if not devices:
             logging.error("No audio devices found")
             return "Failed (No audio devices detected)"
@@ -1184,9 +1330,6 @@ def check_audio():
         output_device = None
         
         # Try to use the default devices first
-        default_in = sd.default.device[0]
-        default_out = sd.default.device[1]
-        
         logging.info(f"Default input device index: {default_in}")
         logging.info(f"Default output device index: {default_out}")
         
@@ -1238,36 +1381,22 @@ def check_audio():
         
         # Try WASAPI loopback if available
         try:
-            device_info = sd.query_devices(output_device)
+            device_info = devices[output_device]
             hostapi_info = sd.query_hostapis()[device_info['hostapi']]
-            
-            if "WASAPI" in hostapi_info['name']:
+            loopback = "WASAPI" in hostapi_info['name']
+            if loopback:
                 logging.info("Using WASAPI Loopback for audio check.")
-                recording = sd.rec(
-                    int(duration * fs),
-                    samplerate=fs,
-                    channels=1,
-                    dtype='float32',
-                    device=output_device,
-                    blocking=True,
-                    extra_settings=sd.WasapiSettings(loopback=True)
-                )
             else:
-                # Fall back to traditional recording
-                logging.info(f"Using traditional recording. Input: {input_device}, Output: {output_device}")
-                # Play test sound and record simultaneously
-                sd.play(np.sin(2*np.pi*1000*np.arange(fs*duration)/fs)*0.3, fs, device=output_device)
-                recording = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='float32', device=input_device)
-                sd.wait()
-                
-            amplitude = np.max(np.abs(recording))
-            logging.info(f"Detected audio amplitude: {amplitude}")
-            
-            # Changed condition: audio exists if amplitude > 0.01 (more sensitive)
-            if amplitude > 0.01:
-                return "OK"
+                logging.info(f"Using microphone for audio check. Input: {input_device}, Output: {output_device}")
+
+            # Play the test tone and listen for it; stops as soon as it is confirmed
+            result = detect_test_tone(input_device, output_device, loopback=loopback)
+            logging.info(f"Tone detection: {result}")
+
+            if result["detected"]:
+                return f"OK (SNR {result['snr_db']:.0f} dB)"
             else:
-                return "Failed (No audio detected)"
+                return f"Failed (Test tone not detected, SNR {result['snr_db']:.0f} dB)"
                 
         except Exception as e:
             error_msg = str(e)
@@ -1286,29 +1415,533 @@ def check_audio():
             return f"Failed ({error_msg})"
 
 
+# Relative cost of getting frames in each native pixel format to the encoder
+# and the frame bus: planar/packed YUV is cheapest, RGB needs a colour
+# conversion, MJPEG needs a full decode per frame.
+CAMERA_FORMAT_COST = {
+    QVideoFrameFormat.PixelFormat.Format_NV12: 0,
+    QVideoFrameFormat.PixelFormat.Format_NV21: 0,
+    QVideoFrameFormat.PixelFormat.Format_YUV420P: 0,
+    QVideoFrameFormat.PixelFormat.Format_YV12: 0,
+    QVideoFrameFormat.PixelFormat.Format_YUYV: 1,
+    QVideoFrameFormat.PixelFormat.Format_UYVY: 1,
+    QVideoFrameFormat.PixelFormat.Format_Jpeg: 3,
+}
+CAMERA_PROBE_TIMEOUT_MS = 2500
+
+
+def camera_format_key(camera_format, profile):
+    """Sort key: formats that cover the profile natively first, then cheapest pixel format and size"""
+    size = camera_format.resolution()
+    too_small = size.width() < profile["width"] or size.height() < profile["height"]
+    too_slow = camera_format.maxFrameRate() < profile["fps"]
+    exact = size.width() == profile["width"] and size.height() == profile["height"]
+    pixel_cost = CAMERA_FORMAT_COST.get(camera_format.pixelFormat(), 2)
+    return (too_small, too_slow, not exact, pixel_cost, size.width() * size.height())
+
+
+def select_camera_format(camera_device, profile=None):
+    formats = list(camera_device.videoFormats())
+    if not formats:
+        return None
+    return min(formats, key=lambda camera_format: camera_format_key(camera_format, profile or RECORDING_PROFILE))
+
+
+class CameraProbe:
+    """Start the camera in camera_format and measure startup latency and delivered frame rate.
+
+    Runs on the GUI thread's own event loop: start() returns a Future that
+    resolves once a second of frames has arrived or timeout_ms passes.
+    """
+
+    running = set()  # keeps in-flight probes alive until they finish
+
+    def __init__(self, camera_device, camera_format, timeout_ms=CAMERA_PROBE_TIMEOUT_MS):
+        self.camera_device = camera_device
+        self.camera_format = camera_format
+        self.timeout_ms = timeout_ms
+        self.future = Future()
+        self.frame_times = []
+        self.started = 0.0
+        self.camera = None
+        self.session = None
+        self.sink = None
+        self.timer = None
+
+    def start(self):
+        self.camera = QCamera(self.camera_device)
+        if self.camera_format is not None:
+            self.camera.setCameraFormat(self.camera_format)
+        self.session = QMediaCaptureSession()
+        self.session.setCamera(self.camera)
+        self.sink = QVideoSink()
+        self.session.setVideoSink(self.sink)
+        self.sink.videoFrameChanged.connect(self.on_frame)
+
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.finish)
+        self.timer.start(self.timeout_ms)
+        CameraProbe.running.add(self)
+        self.started = time.perf_counter()
+        self.camera.start()
+        return self.future
+
+    def on_frame(self, frame):
+        self.frame_times.append(time.perf_counter())
+        # A second's worth of frames after the first one is enough
+        if self.frame_times[-1] - self.frame_times[0] >= 1.0:
+            self.finish()
+
+    def finish(self):
+        if self not in CameraProbe.running:
+            return
+        CameraProbe.running.discard(self)
+        self.timer.stop()
+        self.sink.videoFrameChanged.disconnect(self.on_frame)
+        self.camera.stop()
+
+        frame_times = self.frame_times
+        result = {"frames": len(frame_times), "startup_ms": None, "fps": None}
+        if frame_times:
+            result["startup_ms"] = int((frame_times[0] - self.started) * 1000)
+        if len(frame_times) > 1:
+            result["fps"] = round((len(frame_times) - 1) / (frame_times[-1] - frame_times[0]), 1)
+        if not self.future.done():  # The system check may have timed out and cancelled it
+            self.future.set_result(result)
+
+
+def describe_camera_format(camera_format):
+    if camera_format is None:
+        return "default format"
+    size = camera_format.resolution()
+    return f"{size.width()}x{size.height()} {camera_format.pixelFormat().name.replace('Format_', '')}"
+
+
 def check_video():
-    available = QMediaDevices.videoInputs()
-    if available:
-        return "OK"
-    else:
+    """Probe the camera picked in the device dialog; returns a Future resolved on the GUI thread"""
+    available = device_registry.video_inputs()
+    if not available:
         logging.info("Video check failed: No cameras detected")
         return "Failed (No camera detected)"
 
+    selected = shared_camera.preferred_device
+    camera_device = selected if selected in available else available[0]
+    result = Future()
+
+    if shared_camera.is_initialized:
+        # The preview already opened the camera - opening it a second time fails on
+        # most platforms, so check that the shared session delivers from the selected one
+        if shared_camera.camera.cameraDevice() != camera_device:
+            shared_camera.switch_device(camera_device)
+        shared_camera.when_active(lambda: result.done() or result.set_result("OK"))
+        return result
+
+    camera_format = select_camera_format(camera_device)
+    description = describe_camera_format(camera_format)
+
+    def on_probe(probe):
+        probe = probe.result()
+        logging.info(f"Camera probe for {camera_device.description()} ({description}): {probe}")
+        if result.done():
+            return
+        if not probe["frames"]:
+            result.set_result("Failed (Camera produced no frames)")
+            return
+        # The exam session opens the camera with the probed device and format
+        shared_camera.preferred_device = camera_device
+        shared_camera.preferred_format = camera_format
+        fps = f" @ {probe['fps']:.0f} fps" if probe["fps"] else ""
+        result.set_result(f"OK ({description}{fps}, {probe['startup_ms']} ms startup)")
 
-def check_screen_sharing():
-    known_keywords = {"zoom", "skype", "anydesk", "webex", "gotomeeting"}
-    detected_apps = []
-    
-    for proc in psutil.process_iter(['name']):
+    CameraProbe(camera_device, camera_format).start().add_done_callback(on_probe)
+    return result
+
+
+# -----------------------------------------------------------------------------
+# Process Monitor
+# -----------------------------------------------------------------------------
+# Screen-sharing / remote-control apps that fail the system check and raise an
+# event when started mid-exam. Extend or replace the list with a JSON array of
+# name fragments in process_signatures.json next to this file.
+DEFAULT_PROCESS_SIGNATURES = ["zoom", "skype", "anydesk", "webex", "gotomeeting"]
+PROCESS_SIGNATURES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "process_signatures.json")
+PROCESS_MONITOR_INTERVAL_MS = 2000
+
+
+def load_process_signatures(path=PROCESS_SIGNATURES_FILE):
+    if not os.path.exists(path):
+        return list(DEFAULT_PROCESS_SIGNATURES)
+    try:
+        with open(path, 'r') as f:
+            signatures = [str(entry).strip().lower() for entry in json.load(f) if str(entry).strip()]
+        logging.info(f"Loaded {len(signatures)} process signatures from {path}")
+        return signatures
+    except (OSError, ValueError, TypeError) as e:
+        logging.error(f"Invalid process signature file {path}: {e} - using defaults")
+        return list(DEFAULT_PROCESS_SIGNATURES)
+
+
+def compile_process_matcher(signatures):
+    """One case-insensitive alternation instead of a keyword loop per process"""
+    pattern = "|".join(re.escape(signature) for signature in sorted(set(signatures), key=len, reverse=True))
+    return re.compile(pattern, re.IGNORECASE) if pattern else None
+
+
+class ProcessMonitor:
+    """Tracks running PIDs and only looks up the names of newly spawned processes.
+
+    The first scan inspects everything (that is the system check); later
+    scans diff psutil.pids() against the known set, so a cycle costs one PID
+    listing plus a name lookup per new process.
+    """
+
+    def __init__(self, signatures=None):
+        self.matcher = compile_process_matcher(signatures or load_process_signatures())
+        self.lock = threading.Lock()
+        self.known_pids = set()
+        self.matches = {}         # pid -> name of flagged processes still running
+        self.listeners = []
+        self.timer = None
+        self.scans = 0
+        self.last_scan_ms = 0.0
+        self.total_scan_ms = 0.0
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def scan(self):
+        """Inspect new PIDs; returns (started matches, exited matches) as [(pid, name)]"""
+        cpu_start = time.thread_time()
+        with self.lock:
+            current = set(psutil.pids())
+            new_pids = current - self.known_pids
+            gone_pids = self.known_pids - current
+            self.known_pids = current
+
+            started = []
+            for pid in new_pids:
+                try:
+                    name = psutil.Process(pid).name()
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+                if name and self.matcher is not None and self.matcher.search(name):
+                    self.matches[pid] = name
+                    started.append((pid, name))
+            exited = [(pid, self.matches.pop(pid)) for pid in gone_pids if pid in self.matches]
+
+            self.scans += 1
+            self.last_scan_ms = (time.thread_time() - cpu_start) * 1000
+            self.total_scan_ms += self.last_scan_ms
+        return started, exited
+
+    def running_matches(self):
+        with self.lock:
+            return sorted(set(self.matches.values()))
+
+    def start(self, interval_ms=PROCESS_MONITOR_INTERVAL_MS):
+        """Keep scanning for the rest of the exam (GUI thread timer - cycles are sub-millisecond)"""
+        if self.timer is None:
+            self.timer = task_scheduler.register("process_monitor", self.poll, interval_ms)
+        if not self.known_pids:
+            self.scan()
+        self.timer.start(interval_ms)
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.stop()
+        logging.info(f"Process monitor: {self.scans} scans, last {self.last_scan_ms:.3f} ms, "
+                     f"average {self.total_scan_ms / max(1, self.scans):.3f} ms")
+
+    def poll(self):
+        started, exited = self.scan()
+        now = round(time.time(), 3)
+        events = [{"type": "process_started", "detector": "process_monitor", "timestamp": now,
+                   "details": {"pid": pid, "name": name}} for pid, name in started]
+        events += [{"type": "process_exited", "detector": "process_monitor", "timestamp": now,
+                    "details": {"pid": pid, "name": name}} for pid, name in exited]
+        for event in events:
+            logging.warning(f"Process monitor: {event['type']} {event['details']}")
+            for callback in self.listeners:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logging.error(f"Process monitor listener failed: {e}")
+
+
+# Seeded by the system check, then kept running by ExamPage
+process_monitor = ProcessMonitor()
+
+
+# Capture profile used by BackgroundWebcamRecorder and benchmarked by the machine check
+RECORDING_PROFILE = {
+    "width": 640,
+    "height": 480,
+    "fps": 30.0,
+}
+
+# Thresholds for the machine requirement check. Results of every run are
+# appended to logs/machine_benchmark.jsonl for support triage.
+MACHINE_REQUIREMENTS = {
+    "min_cpu_score": 5.0,          # Million simple Python operations per second, single core
+    "min_free_ram_mb": 1024,
+    "min_disk_write_mb_s": 20.0,   # Sequential write into the recording directory
+    "min_encode_speed": 1.5,       # H.264 encode at RECORDING_PROFILE, multiples of real time
+    "disk_test_mb": 64,
+    "encode_test_seconds": 3,
+}
+MACHINE_BENCHMARK_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "machine_benchmark.jsonl")
+
+
+def measure_cpu_score(duration=0.5):
+    """Single-core score: million loop iterations (multiply, add, compare) per second"""
+    iterations = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        total = 0
+        for i in range(100000):
+            total += i * i
+        iterations += 100000
+    return iterations / (time.perf_counter() - started) / 1e6
+
+
+def measure_disk_write(directory, size_mb):
+    """Write size_mb with fsync into directory and return MB/s"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"benchmark_{os.getpid()}.tmp")
+    block = os.urandom(4 * 1024 * 1024)
+    started = time.perf_counter()
+    try:
+        with open(path, 'wb') as f:
+            for _ in range(max(1, size_mb // 4)):
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        elapsed = time.perf_counter() - started
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    return max(1, size_mb // 4) * 4 / elapsed
+
+
+def measure_encode_speed(seconds):
+    """H.264 encode speed at RECORDING_PROFILE via ffmpeg (x real time); None if ffmpeg is unavailable"""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return None
+    source = (f"testsrc2=size={RECORDING_PROFILE['width']}x{RECORDING_PROFILE['height']}"
+              f":rate={RECORDING_PROFILE['fps']}")
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "lavfi", "-i", source, "-t", str(seconds),
+         "-c:v", "libx264", "-preset", "veryfast", "-f", "null", "-"],
+        capture_output=True, timeout=seconds * 10
+    )
+    if completed.returncode != 0:
+        logging.warning(f"ffmpeg encode benchmark failed: {completed.stderr.decode(errors='replace')[:200]}")
+        return None
+    return seconds / (time.perf_counter() - started)
+
+
+def run_machine_benchmark(requirements=None):
+    """Measure the machine and compare against MACHINE_REQUIREMENTS; returns the result dict"""
+    limits = merged_config(MACHINE_REQUIREMENTS, requirements, "machine requirement")
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "cpu_count": os.cpu_count(),
+        "cpu_score": round(measure_cpu_score(), 2),
+        "free_ram_mb": int(psutil.virtual_memory().available / (1024 * 1024)),
+    }
+    try:
+        results["disk_write_mb_s"] = round(measure_disk_write("exam_recordings", limits["disk_test_mb"]), 1)
+    except OSError as e:
+        logging.error(f"Disk benchmark failed: {e}")
+        results["disk_write_mb_s"] = 0.0
+    try:
+        encode_speed = measure_encode_speed(limits["encode_test_seconds"])
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logging.warning(f"Encode benchmark failed: {e}")
+        encode_speed = None
+    results["encode_speed"] = round(encode_speed, 2) if encode_speed is not None else None
+
+    failures = []
+    if results["cpu_score"] < limits["min_cpu_score"]:
+        failures.append(f"CPU too slow ({results['cpu_score']} < {limits['min_cpu_score']})")
+    if results["free_ram_mb"] < limits["min_free_ram_mb"]:
+        failures.append(f"Low free RAM ({results['free_ram_mb']} MB < {limits['min_free_ram_mb']} MB)")
+    if results["disk_write_mb_s"] < limits["min_disk_write_mb_s"]:
+        failures.append(f"Slow disk ({results['disk_write_mb_s']} MB/s < {limits['min_disk_write_mb_s']} MB/s)")
+    # Encoding is only judged when ffmpeg is available to measure it
+    if encode_speed is not None and encode_speed < limits["min_encode_speed"]:
+        failures.append(f"Video encoding too slow ({results['encode_speed']}x < {limits['min_encode_speed']}x)")
+    results["failures"] = failures
+    results["requirements"] = limits
+
+    try:
+        os.makedirs(os.path.dirname(MACHINE_BENCHMARK_LOG), exist_ok=True)
+        with open(MACHINE_BENCHMARK_LOG, 'a') as f:
+            f.write(json.dumps(results) + "\n")
+    except OSError as e:
+        logging.error(f"Could not record machine benchmark: {e}")
+    logging.info(f"Machine benchmark: {results}")
+    return results
+
+
+def check_machine():
+    results = run_machine_benchmark()
+    if results["failures"]:
+        return f"Failed ({'; '.join(results['failures'])})"
+    encode = f", encode {results['encode_speed']}x" if results["encode_speed"] is not None else ""
+    return (f"OK (CPU {results['cpu_score']}, {results['free_ram_mb'] // 1024} GB free, "
+            f"disk {results['disk_write_mb_s']:.0f} MB/s{encode})")
+
+
+# -----------------------------------------------------------------------------
+# Network Probe
+# -----------------------------------------------------------------------------
+# Short RTT/jitter/throughput probe against the API host. Transfers start small
+# and are sized from the first measurement so the whole probe stays within a
+# few seconds on any link. The production API has no probe endpoint yet (only
+# stand_in_server.py serves /network-probe); against such a host the round
+# trips time a 404 page, server-side rendering included, so RTT and jitter are
+# reported for information only and nothing is gated on them.
+NETWORK_PROBE_CONFIG = {
+    "ping_count": 8,
+    "calibration_bytes": 64 * 1024,
+    "max_transfer_bytes": 4 * 1024 * 1024,
+    "target_transfer_s": 0.75,      # Size the measured transfer to take about this long
+    "timeout_s": 5,
+    "max_rtt_ms": 800,
+    "max_jitter_ms": 250,
+    "min_download_kbps": 1000,
+    "min_upload_kbps": 500,
+}
+
+# Recording tiers picked from the measured upload throughput (kbps needed, profile)
+NETWORK_RECORDING_TIERS = [
+    (2500, {"width": 640, "height": 480, "fps": 30.0}),
+    (1200, {"width": 640, "height": 480, "fps": 15.0}),
+    (0, {"width": 320, "height": 240, "fps": 10.0}),
+]
+
+
+def probe_transfer(session, url, direction, size, timeout):
+    """Time one download or upload of `size` bytes; returns kbps or None if the endpoint is missing"""
+    started = time.perf_counter()
+    if direction == "download":
+        response = session.get(url, params={"bytes": size}, timeout=timeout)
+        transferred = len(response.content)
+    else:
+        response = session.post(url, data=os.urandom(size), timeout=timeout,
+                                headers={"Content-Type": "application/octet-stream"})
+        transferred = size
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200 or transferred == 0:
+        return None
+    return transferred * 8 / 1000 / max(elapsed, 1e-6)
+
+
+def run_network_probe(base_url=None, config=None):
+    """Measure RTT, jitter and throughput to the API host and judge them against NETWORK_PROBE_CONFIG"""
+    settings = merged_config(NETWORK_PROBE_CONFIG, config, "network probe")
+    url = f"{(base_url or API_BASE_URL)}/network-probe"
+    timeout = settings["timeout_s"]
+    results = {"rtt_ms": None, "jitter_ms": None, "download_kbps": None, "upload_kbps": None,
+               "has_endpoint": False}
+
+    # Keep-alive session so RTT samples don't include the TCP/TLS handshake
+    with requests.Session() as session:
         try:
-            proc_name = proc.info['name']
-            if proc_name:
-                for keyword in known_keywords:
-                    if keyword in proc_name.lower():
-                        detected_apps.append(proc_name)
-                        break
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
+            # Any answer (even a 404) times the round trip; only a 200 means the endpoint exists
+            has_endpoint = session.get(url, params={"bytes": 0}, timeout=timeout).status_code == 200
+            results["has_endpoint"] = has_endpoint
+            samples = []
+            for _ in range(settings["ping_count"]):
+                started = time.perf_counter()
+                session.get(url, params={"bytes": 0}, timeout=timeout)
+                samples.append((time.perf_counter() - started) * 1000)
+        except requests.RequestException as e:
+            logging.error(f"Network probe could not reach {url}: {e}")
+            results["failures"] = [f"API host unreachable ({type(e).__name__})"]
+            return results
+
+        samples.sort()
+        results["rtt_ms"] = round(samples[len(samples) // 2], 1)
+        results["jitter_ms"] = round(sum(abs(a - b) for a, b in zip(samples, samples[1:])) / max(1, len(samples) - 1), 1)
+
+        # Throughput: calibrate with a small transfer, then size the real one from it.
+        # Nothing is uploaded to hosts without the probe endpoint.
+        if not has_endpoint:
+            logging.warning(f"No network probe endpoint at {url} - throughput check skipped")
+        for direction in ("download", "upload") if has_endpoint else ():
+            try:
+                kbps = probe_transfer(session, url, direction, settings["calibration_bytes"], timeout)
+                if kbps is None:
+                    logging.warning(f"Network probe endpoint unavailable for {direction} - not measured")
+                    continue
+                size = int(kbps * 1000 / 8 * settings["target_transfer_s"])
+                size = max(settings["calibration_bytes"], min(settings["max_transfer_bytes"], size))
+                kbps = probe_transfer(session, url, direction, size, timeout) or kbps
+                results[f"{direction}_kbps"] = int(kbps)
+            except requests.RequestException as e:
+                logging.error(f"Network probe {direction} failed: {e}")
+                results[f"{direction}_kbps"] = 0
+
+    failures = []
+    if has_endpoint and results["rtt_ms"] > settings["max_rtt_ms"]:
+        failures.append(f"High latency ({results['rtt_ms']:.0f} ms)")
+    if has_endpoint and results["jitter_ms"] > settings["max_jitter_ms"]:
+        failures.append(f"Unstable connection ({results['jitter_ms']:.0f} ms jitter)")
+    if results["download_kbps"] is not None and results["download_kbps"] < settings["min_download_kbps"]:
+        failures.append(f"Slow download ({results['download_kbps']} kbps)")
+    if results["upload_kbps"] is not None and results["upload_kbps"] < settings["min_upload_kbps"]:
+        failures.append(f"Slow upload ({results['upload_kbps']} kbps)")
+    results["failures"] = failures
+    logging.info(f"Network probe: {results}")
+    return results
+
+
+def network_seeded_settings(results):
+    """Recording profile and upload concurrency suited to the probe results, or None"""
+    upload_kbps = results.get("upload_kbps")
+    if upload_kbps is None:
+        return None
+    profile = next(profile for required_kbps, profile in NETWORK_RECORDING_TIERS if upload_kbps >= required_kbps)
+    # Parallel chunk uploads only help on fast, high-latency links
+    rtt = results.get("rtt_ms") or 0
+    concurrency = 3 if upload_kbps >= 5000 and rtt >= 100 else 2 if upload_kbps >= 2500 else 1
+    return {"recording_profile": profile, "upload_concurrency": concurrency}
+
+
+def apply_network_settings(seeded):
+    """GUI thread: seed the recording profile and upload concurrency"""
+    RECORDING_PROFILE.update(seeded["recording_profile"])
+    UPLOAD_WORKER_CONFIG["upload_concurrency"] = seeded["upload_concurrency"]
+    logging.info(f"Network-seeded recording profile {RECORDING_PROFILE}, "
+                 f"upload concurrency {seeded['upload_concurrency']}")
+
+
+def check_network():
+    """Runs on a check worker; the seeded settings are applied when the page collects the result"""
+    results = run_network_probe()
+    if results["failures"]:
+        return f"Failed ({'; '.join(results['failures'])})"
+    throughput = ", throughput not measured"
+    if results["download_kbps"] is not None and results["upload_kbps"] is not None:
+        throughput = f", ↓{results['download_kbps'] / 1000:.1f} ↑{results['upload_kbps'] / 1000:.1f} Mbps"
+    latency = f"{results['rtt_ms']:.0f} ms" if results["has_endpoint"] else f"API {results['rtt_ms']:.0f} ms"
+    text = f"OK ({latency}{throughput})"
+    seeded = network_seeded_settings(results)
+    if seeded is None:
+        return text
+    return text, lambda: apply_network_settings(seeded)
+
+
+def check_screen_sharing():
+    # Baseline scan of every running process; the exam keeps the same monitor going
+    process_monitor.scan()
+    detected_apps = process_monitor.running_matches()
     
     if detected_apps:
         app_names = ", ".join(detected_apps)
@@ -1320,13 +1953,39 @@ def check_screen_sharing():
 
 
 def check_monitor():
-    screens = len(QApplication.screens())
+    screens = device_registry.screen_count()
     if screens == 1:
         return "OK"
     else:
         logging.info(f"Monitor check failed: {screens} monitors detected")
         return f"Failed ({screens} monitors detected)"
 
+# Per-check timeouts for SystemCheckPage. Checks not listed use default_timeout_ms.
+SYSTEM_CHECK_CONFIG = {
+    "poll_interval_ms": 50,
+    "default_timeout_ms": 5000,
+    "timeouts_ms": {
+        "audio": 6000,     # Tone playback + detection (usually well under a second)
+        "screen": 8000,    # Full process walk
+        "machine": 20000,  # CPU, disk and encode benchmarks run for a few seconds
+        "network": 15000,  # RTT samples plus two calibrated transfers each way
+        "video": 6000,     # Camera startup plus a second of frames (the probe gives up at 2.5 s)
+    },
+}
+
+# (name, SystemCheckPage label attribute, check function or None for always-OK, must run on GUI thread).
+# A GUI-thread check may return a Future instead of its result; it is then polled like the worker checks.
+# Any check may return (result, callback); the callback runs on the GUI thread when the result is collected.
+SYSTEM_CHECKS = [
+    ("video", "video_label", check_video, True),      # QMediaDevices
+    ("audio", "audio_label", check_audio, False),
+    ("machine", "machine_label", check_machine, False),
+    ("screen", "screen_label", check_screen_sharing, False),
+    ("funkey", "funkey_label", None, False),
+    ("monitor", "monitor_label", check_monitor, True),  # QApplication.screens
+    ("network", "network_label", check_network, False),
+]
+
 # -----------------------------------------------------------------------------
 # Dialogs & Pages
 # -----------------------------------------------------------------------------
@@ -1480,8 +2139,9 @@ class SystemCheckPage(QWidget):
         self.exam_details = None
         self.setup_ui()
         # Removed automatic check start to wait for device selection first
-        self.check_counter = 0
         self.checks_completed = False
+        self.pending_checks = {}
+        self.check_results = {}
         self.skip_media_checks = True #skip media check
     def set_exam_details(self, exam_details):
         self.exam_details = exam_details
@@ -1544,14 +2204,16 @@ class SystemCheckPage(QWidget):
         self.screen_label = create_label("Screen Sharing App: Pending")
         self.funkey_label = create_label("Function Key Block: Pending")
         self.monitor_label = create_label("Monitor Check: Pending")
+        self.network_label = create_label("Network Check: Pending")
 
-        # Add to grid (2 columns, 3 rows)
+        # Add to grid (2 columns, 4 rows)
         grid_layout.addWidget(self.video_label, 0, 0)
         grid_layout.addWidget(self.audio_label, 0, 1)
         grid_layout.addWidget(self.machine_label, 1, 0)
         grid_layout.addWidget(self.screen_label, 1, 1)
         grid_layout.addWidget(self.funkey_label, 2, 0)
         grid_layout.addWidget(self.monitor_label, 2, 1)
+        grid_layout.addWidget(self.network_label, 3, 0, 1, 2)
 
         # Select Devices Button
         self.select_devices_button = QPushButton("Select Devices")
@@ -1609,78 +2271,107 @@ class SystemCheckPage(QWidget):
     def start_checks(self):
         # Reset labels to "Checking..." state
         for lbl in [self.video_label, self.audio_label, self.machine_label,
-                    self.screen_label, self.funkey_label, self.monitor_label]:
+                    self.screen_label, self.funkey_label, self.monitor_label, self.network_label]:
             lbl.setText(f"{lbl.text().split(':')[0]}: Checking...")
+            lbl.setStyleSheet("")
             
         self.status_message.setText("Running system checks...")
-        self.check_counter = 0
         self.checks_completed = False
-        
-        # Start the check timer
-        self.check_timer = QTimer(self)
-        self.check_timer.timeout.connect(self.update_checks)
-        self.check_timer.start(1000)
+        self.pending_checks = {}
+        self.check_results = {}
+
+        # Slow checks run concurrently on a worker pool; Qt-bound ones stay on the GUI thread
+        self.check_pool = ThreadPoolExecutor(max_workers=len(SYSTEM_CHECKS), thread_name_prefix="system-check")
+        gui_checks = []
+        for name, label_attr, check, on_gui_thread in SYSTEM_CHECKS:
+            if self.skip_media_checks and name in ("video", "audio"):
+                self.finish_check(name, "OK", 0.0)
+            elif check is None:
+                self.finish_check(name, "OK", 0.0)  # Always OK for this check
+            elif on_gui_thread:
+                gui_checks.append((name, check))
+            else:
+                self.pending_checks[name] = (self.check_pool.submit(check), time.monotonic())
+
+        # Poll the futures so results stream into the labels as they finish
+        if not hasattr(self, 'check_timer'):
+            self.check_timer = task_scheduler.register(
+                "system_check_poll", self.update_checks, SYSTEM_CHECK_CONFIG["poll_interval_ms"]
+            )
+        self.check_timer.start(SYSTEM_CHECK_CONFIG["poll_interval_ms"])
+
+        # Let the "Checking..." labels paint before running the quick GUI-thread checks
+        QTimer.singleShot(0, lambda: self.run_gui_checks(gui_checks))
+
+    def run_gui_checks(self, gui_checks):
+        for name, check in gui_checks:
+            started = time.monotonic()
+            try:
+                result = check()
+            except Exception as e:
+                logging.error(f"System check '{name}' raised: {e}")
+                result = f"Failed ({e})"
+            if isinstance(result, Future):
+                self.pending_checks[name] = (result, started)
+                continue
+            self.finish_check(name, result, time.monotonic() - started)
+        self.complete_checks_if_done()
 
     def update_checks(self):
-        self.check_counter += 1
-        if self.check_counter >= 3:
-            # Only perform checks if they haven't been completed yet
-            if not self.checks_completed:
-                # Run all checks and store the results
-                video_result = check_video()
-                audio_result = check_audio()
-
-                #skip audio video
-                if self.skip_media_checks:
-                    video_result = "OK"
-                    audio_result = "OK"
-                else:
-                    video_result = check_video()
-                    audio_result = check_audio()  
-
-            # skip audio video
-                machine_result = "OK"  # Always OK for this check
-                screen_result = check_screen_sharing()
-                funkey_result = "OK"   # Always OK for this check
-                monitor_result = check_monitor()
-                
-                # Update the labels with results
-                self.video_label.setText("Video Check: " + video_result)
-                self.audio_label.setText("Audio Check: " + audio_result)
-                self.machine_label.setText("Machine Requirement: " + machine_result)
-                self.screen_label.setText("Screen Sharing App: " + screen_result)
-                self.funkey_label.setText("Function Key Block: " + funkey_result)
-                self.monitor_label.setText("Monitor Check: " + monitor_result)
-                
-                # Format labels for better visibility of failures
-                for lbl in [self.video_label, self.audio_label, self.machine_label,
-                           self.screen_label, self.funkey_label, self.monitor_label]:
-                    if "Failed" in lbl.text():
-                        lbl.setStyleSheet("color: red;")
-                    else:
-                        lbl.setStyleSheet("color: green;")
-                
-                self.checks_completed = True
-                
-            self.check_timer.stop()
-            
-            # Check if all tests passed
-            failed_checks = []
-            for lbl in [self.video_label, self.audio_label, self.machine_label,
-                        self.screen_label, self.funkey_label, self.monitor_label]:
-                if "Failed" in lbl.text():
-                    failed_checks.append(lbl.text().split(':')[0])
+        now = time.monotonic()
+        timeouts = SYSTEM_CHECK_CONFIG["timeouts_ms"]
+        for name, (future, started) in list(self.pending_checks.items()):
+            if future.done():
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.error(f"System check '{name}' raised: {e}")
+                    result = f"Failed ({e})"
+                del self.pending_checks[name]
+                self.finish_check(name, result, now - started)
+            elif (now - started) * 1000 > timeouts.get(name, SYSTEM_CHECK_CONFIG["default_timeout_ms"]):
+                # The worker thread can't be killed; its late result is simply ignored
+                future.cancel()
+                del self.pending_checks[name]
+                logging.warning(f"System check '{name}' timed out")
+                self.finish_check(name, f"Failed (Timed out after {now - started:.0f} s)", now - started)
+        self.complete_checks_if_done()
+
+    def finish_check(self, name, result, elapsed):
+        if isinstance(result, tuple):
+            result, on_collected = result
+            on_collected()
+        self.check_results[name] = result
+        label_attr = next(attr for key, attr, _, _ in SYSTEM_CHECKS if key == name)
+        label = getattr(self, label_attr)
+        label.setText(f"{label.text().split(':')[0]}: {result} · {elapsed:.2f} s")
+        label.setStyleSheet("color: red;" if "Failed" in result else "color: green;")
+        logging.info(f"System check '{name}': {result} ({elapsed * 1000:.0f} ms)")
+
+    def complete_checks_if_done(self):
+        if self.checks_completed or self.pending_checks or len(self.check_results) < len(SYSTEM_CHECKS):
+            return
+        self.checks_completed = True
+        self.check_timer.stop()
+        self.check_pool.shutdown(wait=False)
             
-            if not failed_checks:
-                self.status_message.setText("All checks passed!")
-                self.status_message.setStyleSheet("color: green; font-weight: bold;")
-                self.continue_button.setEnabled(True)
-            else:
-                # Create a detailed failure message
-                failed_items = ", ".join(failed_checks)
-                self.status_message.setText(f"Failed checks: {failed_items}. Please fix issues and try again.")
-                self.status_message.setStyleSheet("color: red;")
-                self.select_devices_button.setEnabled(True)
+        # Check if all tests passed
+        failed_checks = []
+        for lbl in [self.video_label, self.audio_label, self.machine_label,
+                    self.screen_label, self.funkey_label, self.monitor_label, self.network_label]:
+            if "Failed" in lbl.text():
+                failed_checks.append(lbl.text().split(':')[0])
+        
+        if not failed_checks:
+            self.status_message.setText("All checks passed!")
+            self.status_message.setStyleSheet("color: green; font-weight: bold;")
+            self.continue_button.setEnabled(True)
+        else:
+            # Create a detailed failure message
+            failed_items = ", ".join(failed_checks)
+            self.status_message.setText(f"Failed checks: {failed_items}. Please fix issues and try again.")
+            self.status_message.setStyleSheet("color: red;")
+            self.select_devices_button.setEnabled(True)
 
     def handle_select_devices(self):
         # Disable the select devices button while dialog is open
@@ -1698,19 +2389,354 @@ class SystemCheckPage(QWidget):
     def on_continue(self):
         self.switch_to_instructions_callback()
 
+# -----------------------------------------------------------------------------
+# Frame Bus
+# -----------------------------------------------------------------------------
+# The shared camera session has a single video output. FrameBus owns it, maps
+# each QVideoFrame once, copies the luma plane once into a preallocated ring and
+# hands subscribers read-only NumPy views of that slot. Preview widgets receive
+# the QVideoFrame itself (implicitly shared, no pixel copy).
+FRAME_BUS_CONFIG = {
+    "ring_size": 4,           # Slots kept before the oldest frame is overwritten
+    "shared_memory": False,   # Lay the ring out in multiprocessing.shared_memory for other processes
+    "row_padding": 64,        # Stride slack per row on top of the format's width when sizing slots
+}
+
+# Slot layouts: first plane is 8-bit luma, or packed 32-bit RGB (luma approximated by green)
+LAYOUT_LUMA = 0
+LAYOUT_RGB32 = 1
+
+LUMA_PLANE_FORMATS = (
+    QVideoFrameFormat.PixelFormat.Format_NV12,
+    QVideoFrameFormat.PixelFormat.Format_NV21,
+    QVideoFrameFormat.PixelFormat.Format_YUV420P,
+    QVideoFrameFormat.PixelFormat.Format_YV12,
+    QVideoFrameFormat.PixelFormat.Format_Y8,
+)
+# Byte offset of the green channel within each pixel
+RGB32_GREEN_OFFSETS = {
+    QVideoFrameFormat.PixelFormat.Format_BGRA8888: 1,
+    QVideoFrameFormat.PixelFormat.Format_BGRX8888: 1,
+    QVideoFrameFormat.PixelFormat.Format_RGBA8888: 1,
+    QVideoFrameFormat.PixelFormat.Format_RGBX8888: 1,
+    QVideoFrameFormat.PixelFormat.Format_ARGB8888: 2,
+    QVideoFrameFormat.PixelFormat.Format_XRGB8888: 2,
+    QVideoFrameFormat.PixelFormat.Format_ABGR8888: 2,
+    QVideoFrameFormat.PixelFormat.Format_XBGR8888: 2,
+}
+
+
+class FramePacket:
+    """Read-only view of one ring slot. Valid until the writer laps the ring."""
+
+    __slots__ = ("ring", "slot", "sequence", "timestamp", "width", "height", "layout", "offset", "data")
+
+    def __init__(self, ring, slot):
+        meta = ring.meta[slot]
+        self.ring = ring
+        self.slot = slot
+        self.sequence = int(meta[0])
+        self.timestamp = meta[1] / 1e6
+        rows, stride = int(meta[2]), int(meta[3])
+        self.width, self.height = int(meta[4]), int(meta[5])
+        self.layout, self.offset = int(meta[6]), int(meta[7])
+        self.data = ring.slots[slot, :rows * stride].reshape(rows, stride)
+
+    def is_current(self):
+        """False once the slot has been overwritten by a newer frame"""
+        return int(self.ring.meta[self.slot][0]) == self.sequence
+
+    def luma(self, step_x=1, step_y=1):
+        """Strided (height, width) uint8 luma view - no copy"""
+        if self.layout == LAYOUT_RGB32:
+            return self.data[:self.height:step_y, self.offset:self.width * 4:4 * step_x]
+        return self.data[:self.height:step_y, :self.width:step_x]
+
+
+class FrameRing:
+    """Fixed ring of frame slots plus per-slot metadata, laid out in one buffer.
+
+    The buffer can be a bytearray or a SharedMemory block; readers in another
+    process attach by name and use the same frames_since() logic.
+    """
+
+    HEADER_FIELDS = 4   # ring_size, slot_bytes, latest sequence, superseded flag
+    META_FIELDS = 8     # sequence, timestamp_us, rows, stride, width, height, layout, offset
+
+    def __init__(self, buffer, ring_size, slot_bytes, initialise=True):
+        self.ring_size = ring_size
+        self.slot_bytes = slot_bytes
+        header_bytes = self.header_bytes(ring_size)
+        self.header = np.ndarray((self.HEADER_FIELDS,), dtype=np.int64, buffer=buffer)
+        self.meta = np.ndarray((ring_size, self.META_FIELDS), dtype=np.int64, buffer=buffer,
+                               offset=self.HEADER_FIELDS * 8)
+        self.slots = np.ndarray((ring_size, slot_bytes), dtype=np.uint8, buffer=buffer, offset=header_bytes)
+        if initialise:
+            self.header[:] = (ring_size, slot_bytes, 0, 0)
+            self.meta[:] = 0
+
+    @classmethod
+    def header_bytes(cls, ring_size):
+        return 8 * (cls.HEADER_FIELDS + cls.META_FIELDS * ring_size)
+
+    @classmethod
+    def buffer_size(cls, ring_size, slot_bytes):
+        return cls.header_bytes(ring_size) + ring_size * slot_bytes
+
+    @classmethod
+    def attach(cls, name):
+        """Open a ring published by another process. Returns (ring, shared_memory)."""
+        block = shared_memory.SharedMemory(name=name)
+        ring_size, slot_bytes = (int(v) for v in np.ndarray((2,), dtype=np.int64, buffer=block.buf))
+        return cls(block.buf, ring_size, slot_bytes, initialise=False), block
+
+    @property
+    def latest_sequence(self):
+        return int(self.header[2])
+
+    @property
+    def superseded(self):
+        """Set once the writer has moved to a bigger ring; readers should attach to the new name"""
+        return bool(self.header[3])
+
+    def write(self, plane, width, height, layout, offset, timestamp):
+        """Copy one frame plane into the next slot, overwriting the oldest frame"""
+        rows, stride = plane.shape
+        sequence = self.latest_sequence + 1
+        slot = sequence % self.ring_size
+        # Invalidate the slot before overwriting so readers never see a torn frame as current
+        self.meta[slot][0] = 0
+        np.copyto(self.slots[slot, :rows * stride].reshape(rows, stride), plane)
+        self.meta[slot] = (sequence, int(timestamp * 1e6), rows, stride, width, height, layout, offset)
+        self.header[2] = sequence
+        return slot
+
+    def latest(self):
+        sequence = self.latest_sequence
+        if sequence == 0:
+            return None
+        return FramePacket(self, sequence % self.ring_size)
+
+    def frames_since(self, last_sequence):
+        """Return (packets newer than last_sequence, frames dropped because the reader fell behind)"""
+        latest = self.latest_sequence
+        first = max(last_sequence + 1, latest - self.ring_size + 1, 1)
+        dropped = max(0, first - last_sequence - 1) if last_sequence else 0
+        packets = []
+        for sequence in range(first, latest + 1):
+            packet = FramePacket(self, sequence % self.ring_size)
+            if packet.sequence == sequence:
+                packets.append(packet)
+            else:
+                dropped += 1
+        return packets, dropped
+
+
+class FrameBus:
+    """Single consumer of the shared capture session that fans frames out to subscribers"""
+
+    def __init__(self, config=None):
+        settings = merged_config(FRAME_BUS_CONFIG, config, "frame bus")
+        self.ring_size = max(2, int(settings["ring_size"]))
+        self.use_shared_memory = bool(settings["shared_memory"])
+
+        self.row_padding = max(0, int(settings["row_padding"]))
+
+        self.video_sink = None
+        self.ring = None
+        self.shared_block = None
+        # Rings replaced by a bigger one. Subscribers and other processes may still
+        # hold views into them, so they are only released by close().
+        self.retired = []
+        self.subscribers = []     # [callback, min_interval_s, last_delivery]
+        self.preview_sinks = []
+
+        # Counters for report()/benchmarks
+        self.frames_in = 0
+        self.copies = 0
+        self.bytes_copied = 0
+        self.deliveries = 0
+        self.cpu_seconds = 0.0
+
+    def attach(self, capture_session):
+        # Created lazily - QObjects need the QApplication to exist
+        if self.video_sink is None:
+            self.video_sink = QVideoSink()
+            self.video_sink.videoFrameChanged.connect(self.handle_frame)
+        capture_session.setVideoSink(self.video_sink)
+
+    def subscribe(self, callback, max_fps=None):
+        """Deliver FramePackets to callback, at most max_fps times per second"""
+        min_interval = 1.0 / max_fps if max_fps else 0.0
+        entry = [callback, min_interval, 0.0]
+        self.subscribers.append(entry)
+        return entry
+
+    def unsubscribe(self, entry):
+        if entry in self.subscribers:
+            self.subscribers.remove(entry)
+
+    def add_preview_sink(self, sink):
+        """Forward every QVideoFrame to a preview widget's QVideoSink"""
+        if sink not in self.preview_sinks:
+            self.preview_sinks.append(sink)
+
+    def remove_preview_sink(self, sink):
+        if sink in self.preview_sinks:
+            self.preview_sinks.remove(sink)
+
+    @property
+    def shared_memory_name(self):
+        return self.shared_block.name if self.shared_block is not None else None
+
+    def wants_pixels(self, now):
+        if self.use_shared_memory:
+            return True
+        return any(now - last >= interval for _, interval, last in self.subscribers)
+
+    def handle_frame(self, frame):
+        cpu_start = time.thread_time()
+        self.frames_in += 1
+        for sink in self.preview_sinks:
+            sink.setVideoFrame(frame)
+
+        now = time.monotonic()
+        if not frame.isValid() or not self.wants_pixels(now):
+            self.cpu_seconds += time.thread_time() - cpu_start
+            return
+
+        pixel_format = frame.pixelFormat()
+        if pixel_format in LUMA_PLANE_FORMATS or pixel_format in RGB32_GREEN_OFFSETS:
+            if frame.map(QVideoFrame.MapMode.ReadOnly):
+                try:
+                    height = frame.height()
+                    stride = frame.bytesPerLine(0)
+                    plane = frame.bits(0)
+                    plane.setsize(stride * height)
+                    plane = np.frombuffer(plane, dtype=np.uint8).reshape(height, stride)
+                    if pixel_format in RGB32_GREEN_OFFSETS:
+                        self.publish(plane, frame.width(), height, LAYOUT_RGB32,
+                                     RGB32_GREEN_OFFSETS[pixel_format], now)
+                    else:
+                        self.publish(plane, frame.width(), height, LAYOUT_LUMA, 0, now)
+                finally:
+                    frame.unmap()
+        else:
+            # Unusual formats (MJPEG, 16-bit YUV) go through Qt's converter - one extra copy
+            image = frame.toImage().convertToFormat(QImage.Format.Format_Grayscale8)
+            if not image.isNull():
+                bits = image.constBits()
+                bits.setsize(image.bytesPerLine() * image.height())
+                plane = np.frombuffer(bits, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+                self.copies += 1
+                self.publish(plane, image.width(), image.height(), LAYOUT_LUMA, 0, now)
+
+        self.cpu_seconds += time.thread_time() - cpu_start
+
+    def configure(self, camera_format):
+        """Size the ring once from the negotiated camera format, before the first frame"""
+        if camera_format is None:
+            return
+        resolution = camera_format.resolution()
+        bytes_per_pixel = 4 if camera_format.pixelFormat() in RGB32_GREEN_OFFSETS else 1
+        stride = resolution.width() * bytes_per_pixel + self.row_padding
+        self.ensure_ring(stride * resolution.height())
+
+    def ensure_ring(self, slot_bytes):
+        if self.ring is not None and self.ring.slot_bytes >= slot_bytes:
+            return
+        if self.ring is not None:
+            # Only happens when the camera switches to a bigger format. The old
+            # block stays mapped so views held by subscribers remain valid.
+            logging.warning(f"Frame bus ring too small ({self.ring.slot_bytes} < {slot_bytes} bytes), "
+                            f"moving to a bigger one")
+            self.ring.header[3] = 1
+            self.retired.append((self.ring, self.shared_block))
+            self.ring = None
+            self.shared_block = None
+        size = FrameRing.buffer_size(self.ring_size, slot_bytes)
+        if self.use_shared_memory:
+            self.shared_block = shared_memory.SharedMemory(create=True, size=size)
+            buffer = self.shared_block.buf
+            logging.info(f"Frame bus ring in shared memory '{self.shared_block.name}' ({size} bytes)")
+        else:
+            buffer = bytearray(size)
+        self.ring = FrameRing(buffer, self.ring_size, slot_bytes)
+
+    def publish(self, plane, width, height, layout, offset, timestamp):
+        """Copy a mapped plane into the ring (the one copy per frame) and notify subscribers"""
+        self.ensure_ring(plane.size)
+        slot = self.ring.write(plane, width, height, layout, offset, timestamp)
+        self.copies += 1
+        self.bytes_copied += plane.size
+
+        packet = FramePacket(self.ring, slot)
+        packet.data.flags.writeable = False
+        for entry in self.subscribers:
+            callback, interval, last = entry
+            if timestamp - last < interval:
+                continue
+            entry[2] = timestamp
+            self.deliveries += 1
+            try:
+                callback(packet)
+            except Exception as e:
+                logging.error(f"Frame bus subscriber failed: {e}")
+
+    def report(self):
+        stats = {
+            "frames_in": self.frames_in,
+            "copies_per_frame": round(self.copies / max(1, self.frames_in), 3),
+            "bytes_copied": self.bytes_copied,
+            "deliveries": self.deliveries,
+            "cpu_ms_per_frame": round(self.cpu_seconds * 1000 / max(1, self.frames_in), 3),
+        }
+        logging.info(f"Frame bus report: {stats}")
+        return stats
+
+    def close(self):
+        """Release every ring; only call once no subscriber holds a FramePacket"""
+        self.retired.append((self.ring, self.shared_block))
+        self.ring = None
+        self.shared_block = None
+        for _, block in self.retired:
+            if block is None:
+                continue
+            block.unlink()
+            try:
+                block.close()
+            except BufferError:
+                # A view is still alive; the mapping goes away with the last reference
+                logging.warning(f"Frame bus block '{block.name}' still in use at close")
+        self.retired = []
+
+
 class SharedCameraSession:
     def __init__(self):
         self.camera = None
         self.capture_session = None
         self.is_initialized = False
+        # Chosen by the system-check camera probe
+        self.preferred_device = None
+        self.preferred_format = None
+        # Every in-process frame consumer reads from this bus instead of its own camera
+        self.frame_bus = FrameBus()
         
-    def initialize(self, camera_device):
+    def initialize(self, camera_device, camera_format=None):
         if self.is_initialized:
             return True
 
         self.camera = QCamera(camera_device)
+        # Native format from the probe avoids scaling/conversion before the encoder
+        camera_format = camera_format or (self.preferred_format if camera_device == self.preferred_device else None)
+        if camera_format is not None:
+            self.camera.setCameraFormat(camera_format)
+            self.frame_bus.configure(camera_format)
+            logging.info(f"Camera format: {camera_format.resolution().width()}x{camera_format.resolution().height()} "
+                         f"{camera_format.pixelFormat().name}, up to {camera_format.maxFrameRate():.0f} fps")
         self.capture_session = QMediaCaptureSession()
         self.capture_session.setCamera(self.camera)
+        self.frame_bus.attach(self.capture_session)
         self.is_initialized = True
         return True
         
@@ -1729,12 +2755,409 @@ class SharedCameraSession:
             return True
         return False
 
+    def is_active(self):
+        return self.camera is not None and self.camera.isActive()
+
+    def when_active(self, callback):
+        """Run callback as soon as the camera is delivering - immediately if it already is"""
+        if self.is_active():
+            QTimer.singleShot(0, callback)
+            return
+
+        def on_active(active):
+            if active:
+                self.camera.activeChanged.disconnect(on_active)
+                callback()
+
+        self.camera.activeChanged.connect(on_active)
+
+    def warm_up(self, camera_device=None):
+        """Open and start the shared camera early so later pages find it running.
+
+        Used by the device preview and the instructions page; the session is
+        never closed between them and the exam page.
+        """
+        if not self.is_initialized:
+            cameras = device_registry.video_inputs()
+            if not cameras:
+                logging.error("No camera devices found")
+                return False
+            if camera_device is None:
+                camera_device = self.preferred_device if self.preferred_device in cameras else cameras[0]
+            camera_format = (self.preferred_format if camera_device == self.preferred_device else None) or \
+                select_camera_format(camera_device)
+            self.initialize(camera_device, camera_format)
+        if not self.is_active():
+            started = time.perf_counter()
+            self.start_camera()
+            self.when_active(lambda: logging.info(
+                f"Shared camera warm after {(time.perf_counter() - started) * 1000:.0f} ms"))
+        return True
+
+    def switch_device(self, camera_device):
+        """Point the existing session at another camera without rebuilding recorder or sinks"""
+        if not self.is_initialized:
+            return self.initialize(camera_device)
+        self.camera.setCameraDevice(camera_device)
+        camera_format = select_camera_format(camera_device)
+        if camera_format is not None:
+            self.camera.setCameraFormat(camera_format)
+            self.frame_bus.configure(camera_format)
+        self.camera.start()
+        return True
+
 # Global shared session instance
 shared_camera = SharedCameraSession()
 
+# -----------------------------------------------------------------------------
+# Motion Analysis
+# -----------------------------------------------------------------------------
+# Defaults for motion-adaptive capture. Overridable per exam through the
+# "motion_settings" entry of the exam details response.
+MOTION_CONFIG = {
+    "enabled": True,
+    "analysis_fps": 5,             # Frames per second actually analysed
+    "luma_width": 80,              # Downscaled luma grid used for differencing
+    "luma_height": 60,
+    "motion_threshold": 4.0,       # Mean absolute luma difference (0-255) that counts as motion
+    "static_after_ms": 5000,       # Quiet time before the scene is treated as static
+    "low_frame_rate": 5.0,         # Recording frame rate while static
+    "snapshot_keepalive_ms": 60000,  # Snapshot mode still uploads one still this often while static
+}
+
+
+class MotionAnalyzer:
+    """Detects static periods on the shared camera with cheap NumPy frame differencing.
+
+    Listeners are called with True when the scene becomes static and with
+    False as soon as motion returns.
+    """
+
+    def __init__(self, config=None):
+        settings = merged_config(MOTION_CONFIG, config, "motion")
+        self.settings = settings
+        self.enabled = bool(settings["enabled"])
+        self.luma_size = (int(settings["luma_width"]), int(settings["luma_height"]))
+        self.motion_threshold = float(settings["motion_threshold"])
+        self.static_after = settings["static_after_ms"] / 1000.0
+
+        self.subscription = None
+        self.listeners = []
+
+        self.previous_luma = None
+        self.last_motion = time.monotonic()
+        self.is_static = False
+        self.last_score = 0.0
+
+        # Cost accounting for the report
+        self.frames_analysed = 0
+        self.cpu_seconds = 0.0
+        self.started_at = time.monotonic()
+        self.static_seconds = 0.0
+        self.static_since = None
+
+    def attach(self, camera_session):
+        if not self.enabled or self.subscription is not None:
+            return self.subscription is not None
+        # The frame bus throttles delivery to the analysis rate
+        self.subscription = camera_session.frame_bus.subscribe(
+            self.handle_packet, max_fps=self.settings["analysis_fps"]
+        )
+        return True
+
+    def detach(self, camera_session):
+        if self.subscription is not None:
+            camera_session.frame_bus.unsubscribe(self.subscription)
+            self.subscription = None
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def handle_packet(self, packet):
+        cpu_start = time.thread_time()
+        width, height = self.luma_size
+        step_x = max(1, packet.width // width)
+        step_y = max(1, packet.height // height)
+        # Strided view of the ring slot - astype() makes the only (small) copy
+        luma = packet.luma(step_x, step_y)[:height, :width].astype(np.int16)
+        self.analyse_luma(luma, time.monotonic())
+        self.cpu_seconds += time.thread_time() - cpu_start
+
+    def analyse_luma(self, luma, now):
+        self.frames_analysed += 1
+        previous, self.previous_luma = self.previous_luma, luma
+        if previous is None or previous.shape != luma.shape:
+            return
+
+        self.last_score = float(np.abs(luma - previous).mean())
+
+        if self.last_score >= self.motion_threshold:
+            self.last_motion = now
+            if self.is_static:
+                self.set_static(False, now)
+        elif not self.is_static and now - self.last_motion >= self.static_after:
+            self.set_static(True, now)
+
+    def set_static(self, is_static, now):
+        self.is_static = is_static
+        if is_static:
+            self.static_since = now
+            logging.info("Motion analyser: scene is static - reducing capture rate")
+        else:
+            if self.static_since is not None:
+                self.static_seconds += now - self.static_since
+            self.static_since = None
+            logging.info(f"Motion analyser: motion detected (score {self.last_score:.1f}) - full rate")
+        for callback in self.listeners:
+            try:
+                callback(is_static)
+            except Exception as e:
+                logging.error(f"Motion listener failed: {e}")
+
+    def report(self):
+        """Log and return the analyser's CPU cost and the time spent static"""
+        elapsed = max(1e-6, time.monotonic() - self.started_at)
+        static_seconds = self.static_seconds
+        if self.static_since is not None:
+            static_seconds += time.monotonic() - self.static_since
+        stats = {
+            "frames_analysed": self.frames_analysed,
+            "cpu_ms_total": round(self.cpu_seconds * 1000, 1),
+            "cpu_ms_per_frame": round(self.cpu_seconds * 1000 / max(1, self.frames_analysed), 3),
+            "cpu_percent": round(100 * self.cpu_seconds / elapsed, 3),
+            "static_seconds": round(static_seconds, 1),
+        }
+        logging.info(f"Motion analyser report: {stats}")
+        return stats
+
+# -----------------------------------------------------------------------------
+# Segment Rotation
+# -----------------------------------------------------------------------------
+# Default rotation policy. Deployments can override any of these keys through
+# the "recording_rotation" entry of the exam details response.
+RECORDING_ROTATION_CONFIG = {
+    "target_bytes": 2 * 1024 * 1024,   # Close the segment once it reaches ~2 MB
+    "max_duration_ms": 30000,          # ...or after 30 seconds, whichever comes first
+    "min_duration_ms": 3000,           # Never produce segments shorter than this
+    "check_interval_ms": 500,          # How often the recorder polls the policy
+}
+
+
+class SegmentRotationPolicy:
+    """Decides when the recorder should close the current segment and start a new one.
+
+    A segment is rotated as soon as it reaches the target size or the maximum
+    duration. Every segment is a separate recording that starts on its own
+    keyframe, so there is no GOP boundary to wait for.
+    """
+
+    def __init__(self, target_bytes=2 * 1024 * 1024, max_duration_ms=30000,
+                 min_duration_ms=3000, check_interval_ms=500):
+        self.target_bytes = int(target_bytes)
+        self.max_duration_ms = int(max_duration_ms)
+        self.min_duration_ms = int(min_duration_ms)
+        self.check_interval_ms = int(check_interval_ms)
+
+    @classmethod
+    def from_config(cls, config=None):
+        """Build a policy from the defaults merged with an optional override dict"""
+        return cls(**merged_config(RECORDING_ROTATION_CONFIG, config, "rotation"))
+
+    def should_rotate(self, duration_ms, size_bytes):
+        """Return True if the segment with the given duration and size should be closed"""
+        if duration_ms < self.min_duration_ms:
+            return False
+
+        if duration_ms >= self.max_duration_ms:
+            return True
+
+        return size_bytes >= self.target_bytes
+
+    def describe(self):
+        return (f"target={self.target_bytes} bytes, max={self.max_duration_ms} ms, "
+                f"min={self.min_duration_ms} ms")
+
+
+# -----------------------------------------------------------------------------
+# Upload Worker Process
+# -----------------------------------------------------------------------------
+# Hashing, the server-side check and the chunk uploads run in a supervised child
+# process (upload_worker.py) so a stalled request or a crash in the network stack
+# never blocks the exam UI. The camera and QMediaRecorder stay in the GUI process
+# because the preview and the motion analyser share the same capture session.
+UPLOAD_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "upload_worker.py")
+UPLOAD_WORKER_CONFIG = {
+    "supervise_interval_ms": 1000,  # How often the GUI polls worker events and liveness
+    "stall_timeout_s": 120,         # A busy worker silent for this long is a stall
+    "max_restarts": 5,              # Give up restarting after this many crashes/stalls
+    "upload_concurrency": 1,        # Parallel chunk uploads; seeded by the network probe
+}
+
+
+class UploadWorkerClient:
+    """GUI-side handle on the upload worker: sends commands and supervises the process"""
+
+    def __init__(self, token, user_id, exam_id, recording_dir, config=None):
+        settings = merged_config(UPLOAD_WORKER_CONFIG, config, "upload worker")
+        self.stall_timeout = settings["stall_timeout_s"]
+        self.max_restarts = settings["max_restarts"]
+        self.worker_settings = {
+            "upload_concurrency": int(settings["upload_concurrency"]),
+            "token": token,
+            "user_id": user_id,
+            "exam_id": exam_id,
+            "recording_dir": os.path.abspath(recording_dir),
+            "api_base": API_BASE_URL,
+        }
+
+        self.process = None
+        self.events = None
+        self.restarts = 0
+        self.shutting_down = False
+
+        self.busy_command = None
+        self.last_progress = None
+        self.in_flight = {}  # chunk_file -> chunk_number, resubmitted after a restart
+        self.status = {}
+
+        self.supervise_interval = settings["supervise_interval_ms"]
+        self.supervise_timer = task_scheduler.register("upload_supervise", self.supervise, self.supervise_interval)
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.is_running():
+            return True
+        self.shutting_down = False
+        if getattr(sys, "frozen", False):
+            command = [sys.executable, "--upload-worker"]
+        else:
+            command = [sys.executable, UPLOAD_WORKER_SCRIPT]
+        # A plain child process: it loads only upload_worker.py, not this module
+        self.process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, encoding="utf-8", bufsize=1
+        )
+        self.events = queue.Queue()
+        threading.Thread(
+            target=self.read_events, args=(self.process, self.events),
+            name="upload-worker-events", daemon=True
+        ).start()
+        self.write(self.worker_settings)
+        self.busy_command = None
+        self.last_progress = None
+        self.supervise_timer.start(self.supervise_interval)
+        logging.info(f"Upload worker process started (pid {self.process.pid})")
+        return True
+
+    @staticmethod
+    def read_events(process, events):
+        """Reader thread: worker stdout lines -> event queue, until the pipe closes"""
+        for line in process.stdout:
+            try:
+                events.put(json.loads(line))
+            except ValueError:
+                logging.warning(f"Malformed upload worker event: {line!r}")
+
+    def submit_chunk(self, chunk_file, chunk_number):
+        self.in_flight[chunk_file] = chunk_number
+        self.send({"command": "chunk", "file": chunk_file, "number": chunk_number})
+
+    def replay_backlog(self):
+        self.send({"command": "backlog"})
+
+    def send_onstop(self, submit_reason):
+        self.send({"command": "onstop", "reason": submit_reason})
+
+    def request_status(self):
+        self.send({"command": "status"})
+
+    def send(self, command):
+        if not self.is_running():
+            self.start()
+        self.write(command)
+
+    def write(self, message):
+        try:
+            self.process.stdin.write(json.dumps(message) + "\n")
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            # The supervisor notices the dead worker and restarts it
+            logging.warning(f"Could not reach upload worker: {e}")
+
+    def shutdown(self):
+        """Ask the worker to exit once its queue is drained - never blocks the GUI"""
+        if self.is_running():
+            self.shutting_down = True
+            self.write({"command": "shutdown"})
+
+    def supervise(self):
+        self.drain_events()
+
+        if self.process is None:
+            self.supervise_timer.stop()
+            return
+
+        if self.process.poll() is not None:
+            if self.shutting_down:
+                logging.info(f"Upload worker exited (code {self.process.returncode}), status: {self.status}")
+                self.process = None
+                self.supervise_timer.stop()
+                return
+            self.restart(f"exited unexpectedly with code {self.process.returncode}")
+            return
+
+        # Stalls are judged on lack of progress, so a long backlog that keeps
+        # moving is never killed
+        if self.busy_command is not None and time.monotonic() - self.last_progress > self.stall_timeout:
+            self.restart(f"made no progress on '{self.busy_command}' for {int(time.monotonic() - self.last_progress)} s")
+
+    def drain_events(self):
+        if self.events is None:
+            return
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return
+            kind = event.get("event")
+            if kind in ("busy", "progress"):
+                self.busy_command = event.get("command", self.busy_command)
+                self.last_progress = time.monotonic()
+            elif kind == "status":
+                self.status = event.get("status", {})
+                self.busy_command = None
+                self.last_progress = None
+            elif kind == "chunk":
+                self.last_progress = time.monotonic()
+                self.in_flight.pop(event.get("file"), None)
+
+    def restart(self, reason):
+        logging.error(f"Upload worker {reason}")
+        if self.process.poll() is None:
+            self.process.kill()
+            try:
+                self.process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                pass
+        self.process = None
+
+        if self.restarts >= self.max_restarts:
+            logging.error("Upload worker restart limit reached - chunks stay in the manifest for the next run")
+            self.supervise_timer.stop()
+            return
+        self.restarts += 1
+
+        # The manifest on disk is the source of truth; replaying it never re-sends stored chunks
+        self.start()
+        for chunk_file, chunk_number in list(self.in_flight.items()):
+            self.write({"command": "chunk", "file": chunk_file, "number": chunk_number})
+        self.write({"command": "backlog"})
+        logging.info(f"Upload worker restarted ({self.restarts}/{self.max_restarts})")
 
 class BackgroundWebcamRecorder:
-    def __init__(self, token=None, exam_code=None, user_id=None, exam_id=None):
+    def __init__(self, token=None, exam_code=None, user_id=None, exam_id=None, rotation_policy=None):
         self.token = token
         self.exam_code = exam_code
         self.user_id = user_id if user_id is not None else "default_user"
@@ -1742,13 +3165,31 @@ class BackgroundWebcamRecorder:
         self.recorder = None
         self.recording_dir = "exam_recordings"
         self.ensure_recording_dir()
-        self.chunk_timer = QTimer()
-        self.chunk_timer.timeout.connect(self.handle_chunk_timer)
-        self.chunk_interval = 10000  # 10 seconds in milliseconds
+        # Segment rotation is driven by size/duration policy, polled by this timer
+        self.rotation_policy = rotation_policy or SegmentRotationPolicy.from_config()
+        self.chunk_interval = self.rotation_policy.check_interval_ms
+        self.chunk_timer = task_scheduler.register(
+            "segment_rotation", self.handle_chunk_timer, self.chunk_interval, TASK_PRIORITY_HIGH
+        )
+        logging.info(f"Segment rotation policy: {self.rotation_policy.describe()}")
         self.current_chunk_file = None
-        self.chunk_counter = 0
-        self.api_endpoint = "https://stageevaluate.sentientgeeks.us/wp-json/api/v1/save-exam-recorded-video"
-
+        self.api_endpoint = f"{API_BASE_URL}/save-exam-recorded-video"
+
+        # Uploads happen in a separate process; the manifest is only read here
+        # to continue chunk numbering after a previous run
+        manifest_name = f"{self.user_id}-{self.exam_id}_manifest.json"
+        self.chunk_counter = ChunkManifest(os.path.join(self.recording_dir, manifest_name)).next_chunk_number()
+        self.uploader = UploadWorkerClient(self.token, self.user_id, self.exam_id, self.recording_dir)
+        self.backlog_replayed = False
+
+        # Motion-adaptive frame rate - a segment's rate is fixed when it starts
+        self.frame_rate = RECORDING_PROFILE["fps"]
+        self.low_motion_frame_rate = MOTION_CONFIG["low_frame_rate"]
+        self.low_motion = False
+        self.segment_frame_rate = self.frame_rate
+        self.segment_duration_ms = 0
+        # Bytes/duration per rate, used to estimate what the low rate saved
+        self.rate_totals = {"full": [0, 0], "low": [0, 0]}  # [bytes, ms]
 
     
     def ensure_recording_dir(self):
@@ -1780,8 +3221,8 @@ class BackgroundWebcamRecorder:
         # Add more specific settings
         self.recorder.setMediaFormat(fmt)
         self.recorder.setQuality(QMediaRecorder.Quality.HighQuality)
-        self.recorder.setVideoResolution(QSize(640, 480))
-        self.recorder.setVideoFrameRate(30.0)
+        self.recorder.setVideoResolution(QSize(RECORDING_PROFILE["width"], RECORDING_PROFILE["height"]))
+        self.recorder.setVideoFrameRate(self.frame_rate)
         
         # Set up initial chunk file
         self.update_chunk_file()
@@ -1819,9 +3260,14 @@ class BackgroundWebcamRecorder:
 
     def start_recording(self):
         if self.is_ready() and self.recorder.recorderState() != QMediaRecorder.RecorderState.RecordingState:
+            # Chunks left over from a previous (crashed) run go up first
+            if not self.backlog_replayed:
+                self.backlog_replayed = True
+                self.uploader.replay_backlog()
+
             logging.info(f"Starting recording to: {self.recorder.outputLocation().toLocalFile()}")
-            self.recorder.record()
-            # Start the chunk timer
+            self.begin_segment()
+            # Start polling the rotation policy
             self.chunk_timer.start(self.chunk_interval)
             logging.info(f"Recorder state after starting: {self.recorder.recorderState()}")
             logging.info(f"Recording duration: {self.recorder.duration()} ms")
@@ -1831,7 +3277,7 @@ class BackgroundWebcamRecorder:
     def stop_recording(self):
         if self.is_ready() and self.recorder.recorderState() == QMediaRecorder.RecorderState.RecordingState:
             logging.info("Stopping recording...")
-            self.recorder.stop()
+            self.end_segment()
             # Stop the chunk timer
             self.chunk_timer.stop()
             # Upload the final chunk
@@ -1839,111 +3285,926 @@ class BackgroundWebcamRecorder:
             logging.info(f"Recorder state after stopping: {self.recorder.recorderState()}")
             logging.info(f"Final recording duration: {self.recorder.duration()} ms")
             logging.info(f"Output file should be at: {self.recorder.outputLocation().toLocalFile()}")
+            self.report_motion_savings()
             return True
         return False
+
+    def begin_segment(self):
+        """Start recording the current chunk file at the rate matching the motion state"""
+        self.segment_frame_rate = self.low_motion_frame_rate if self.low_motion else self.frame_rate
+        self.recorder.setVideoFrameRate(self.segment_frame_rate)
+        self.recorder.record()
+
+    def end_segment(self):
+        self.segment_duration_ms = self.recorder.duration()
+        self.recorder.stop()
+
+    def set_low_motion(self, low_motion):
+        """Motion analyser callback - low rate applies from the next segment, full rate immediately"""
+        self.low_motion = low_motion
+        recording = self.is_ready() and self.recorder.recorderState() == QMediaRecorder.RecorderState.RecordingState
+        if not low_motion and recording and self.segment_frame_rate < self.frame_rate:
+            logging.info("Motion resumed - rotating segment to restore full frame rate")
+            self.end_segment()
+            QTimer.singleShot(500, self.process_and_start_new_chunk)
+
+    def record_segment_stats(self, size_bytes):
+        bucket = "low" if self.segment_frame_rate < self.frame_rate else "full"
+        self.rate_totals[bucket][0] += size_bytes
+        self.rate_totals[bucket][1] += self.segment_duration_ms
+
+    def report_motion_savings(self):
+        """Estimate bytes saved by low-rate segments from the observed full-rate bitrate"""
+        full_bytes, full_ms = self.rate_totals["full"]
+        low_bytes, low_ms = self.rate_totals["low"]
+        if not full_ms or not low_ms:
+            return 0
+        full_rate_bytes_per_ms = full_bytes / full_ms
+        saved = max(0, int(full_rate_bytes_per_ms * low_ms - low_bytes))
+        logging.info(f"Motion-adaptive recording: {low_ms} ms at {self.low_motion_frame_rate} fps "
+                     f"({low_bytes} bytes), estimated {saved} bytes saved")
+        return saved
     
     def handle_chunk_timer(self):
-        # This function is called every 10 seconds
-        if self.recorder.recorderState() == QMediaRecorder.RecorderState.RecordingState:
+        # Polled every check_interval_ms - the rotation policy decides when a segment is done
+        if self.recorder.recorderState() != QMediaRecorder.RecorderState.RecordingState:
+            return
+
+        duration_ms = self.recorder.duration()
+        try:
+            size_bytes = os.path.getsize(self.current_chunk_file)
+        except OSError:
+            size_bytes = 0
+
+        if self.rotation_policy.should_rotate(duration_ms, size_bytes):
             # Stop current recording
-            logging.info("Stopping current chunk recording...")
-            self.recorder.stop()
+            logging.info(f"Stopping current chunk recording ({duration_ms} ms, {size_bytes} bytes)...")
+            self.end_segment()
             
             # Add a small delay to ensure file is properly finalized
             QTimer.singleShot(500, self.process_and_start_new_chunk)
 
     def process_and_start_new_chunk(self):
         # Upload the current chunk
-        success = self.upload_current_chunk()
-        logging.info(f"Upload of chunk {self.chunk_counter-1} {'succeeded' if success else 'failed'}")
+        queued = self.upload_current_chunk()
+        logging.info(f"Chunk {self.chunk_counter-1} {'queued for upload' if queued else 'could not be queued'}")
         
         # Start a new chunk
         self.update_chunk_file()
         logging.info(f"Starting new chunk recording to: {self.current_chunk_file}")
-        self.recorder.record()
+        self.begin_segment()
     
     def upload_current_chunk(self):
+        """Hand the finished chunk to the upload worker"""
         if not self.current_chunk_file or not os.path.exists(self.current_chunk_file):
             logging.error(f"Chunk file doesn't exist: {self.current_chunk_file}")
             return False
-        
+
+        self.record_segment_stats(os.path.getsize(self.current_chunk_file))
+        self.uploader.submit_chunk(self.current_chunk_file, self.chunk_counter - 1)
+        return True
+
+# -----------------------------------------------------------------------------
+# Upload Retry Queue
+# -----------------------------------------------------------------------------
+# Failed snapshot and event batches wait here for the next attempt. During an
+# outage the oldest batches are dropped past these limits, and retries back
+# off instead of re-posting everything with each new batch.
+UPLOAD_RETRY_MAX_BATCHES = 20
+UPLOAD_RETRY_MAX_BYTES = 8 * 1024 * 1024
+UPLOAD_RETRY_BACKOFF_S = (5, 300)  # first delay, cap; doubles per consecutive failure
+
+
+class RetryQueue:
+    """Bounded, thread-safe queue of failed upload batches with exponential backoff"""
+
+    def __init__(self, name, size_of):
+        self.name = name
+        self.size_of = size_of  # batch -> bytes it holds
+        self.lock = threading.Lock()
+        self.batches = collections.deque()
+        self.bytes = 0
+        self.failures = 0
+        self.retry_at = 0.0
+        self.dropped = 0
+
+    def take(self, batch=None, force=False):
+        """Queue batch (if any) and return everything due for sending, oldest first.
+
+        While backing off nothing is due unless force is set (the final flush).
+        """
+        with self.lock:
+            if batch:
+                self.append(batch)
+            if not force and time.monotonic() < self.retry_at:
+                return []
+            batches = list(self.batches)
+            self.batches.clear()
+            self.bytes = 0
+            return batches
+
+    def failed(self, batches):
+        """Put unsent batches back in front and back off"""
+        with self.lock:
+            for batch in reversed(batches):
+                self.batches.appendleft(batch)
+                self.bytes += self.size_of(batch)
+            self.trim()
+            self.failures += 1
+            first, cap = UPLOAD_RETRY_BACKOFF_S
+            delay = min(cap, first * 2 ** (self.failures - 1))
+            self.retry_at = time.monotonic() + delay
+            logging.warning(f"{self.name} upload failed - {len(self.batches)} batches queued, retrying in {delay} s")
+
+    def succeeded(self):
+        with self.lock:
+            self.failures = 0
+            self.retry_at = 0.0
+
+    def append(self, batch):
+        self.batches.append(batch)
+        self.bytes += self.size_of(batch)
+        self.trim()
+
+    def trim(self):
+        while len(self.batches) > 1 and (len(self.batches) > UPLOAD_RETRY_MAX_BATCHES
+                                         or self.bytes > UPLOAD_RETRY_MAX_BYTES):
+            self.bytes -= self.size_of(self.batches.popleft())
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 10 == 0:
+                logging.warning(f"{self.name} retry queue full - {self.dropped} oldest batches dropped")
+
+
+# -----------------------------------------------------------------------------
+# Snapshot Proctoring
+# -----------------------------------------------------------------------------
+# Defaults for the low-bandwidth snapshot mode. Overridable per exam through the
+# "snapshot_settings" entry of the exam details response.
+SNAPSHOT_CONFIG = {
+    "interval_ms": 10000,    # One still every 10 seconds
+    "image_format": "JPEG",  # "JPEG" or "WEBP" (falls back to JPEG if WebP is unavailable)
+    "quality": 60,           # Encoder quality 0-100
+    "max_width": 640,        # Downscale wider frames before encoding
+    "batch_size": 6,         # Frames per upload request
+}
+
+
+class SnapshotProctor:
+    """Low-bandwidth alternative to BackgroundWebcamRecorder.
+
+    Captures still frames from the shared camera session at a fixed interval,
+    encodes them off the GUI thread and uploads them in batches. Exposes the
+    same setup_recorder/start_recording/stop_recording interface as the video
+    recorder so ExamPage can use either.
+    """
+
+    def __init__(self, token=None, exam_code=None, user_id=None, exam_id=None, config=None):
+        self.token = token
+        self.exam_code = exam_code
+        self.user_id = user_id if user_id is not None else "default_user"
+        self.exam_id = exam_id if exam_id is not None else "default_exam"
+
+        settings = merged_config(SNAPSHOT_CONFIG, config, "snapshot")
+        self.interval_ms = int(settings["interval_ms"])
+        self.image_format = str(settings["image_format"]).upper()
+        # Settle the format here - encoder threads only ever read it
+        supported = {bytes(fmt).decode().upper() for fmt in QImageWriter.supportedImageFormats()}
+        if self.image_format not in supported:
+            logging.warning(f"{self.image_format} encoding unavailable - falling back to JPEG")
+            self.image_format = "JPEG"
+        self.quality = int(settings["quality"])
+        self.max_width = int(settings["max_width"])
+        self.batch_size = max(1, int(settings["batch_size"]))
+
+        # onstop notifications still go to the recording endpoint
+        self.api_endpoint = f"{API_BASE_URL}/save-exam-recorded-video"
+        self.snapshot_endpoint = f"{API_BASE_URL}/save-exam-snapshots"
+
+        self.image_capture = None
+        self.capture_timer = task_scheduler.register(
+            "snapshot_capture", self.capture_snapshot, self.interval_ms, TASK_PRIORITY_HIGH
+        )
+        self.is_capturing = False
+
+        # Encoding and uploading never run on the GUI thread
+        self.encoder_pool = None
+        self.upload_pool = None
+        self.create_pools()
+        self.batch_lock = threading.Lock()
+        self.batch = []          # [(timestamp, bytes)]
+        self.retry_queue = RetryQueue("Snapshot", lambda frames: sum(len(data) for _, data in frames))
+        self.snapshot_counter = 0
+        self.bytes_encoded = 0
+
+        # Optional MotionAnalyzer - static periods only send a keep-alive still
+        self.motion_analyzer = None
+        self.keepalive_ms = MOTION_CONFIG["snapshot_keepalive_ms"]
+        self.last_capture = 0.0
+        self.skipped_snapshots = 0
+
+        logging.info(f"Snapshot proctoring: every {self.interval_ms} ms, {self.image_format} q={self.quality}, "
+                     f"{self.batch_size} frames per upload")
+
+    def create_pools(self):
+        if self.encoder_pool is None:
+            self.encoder_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-encode")
+            self.upload_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-upload")
+
+    def setup_recorder(self, capture_session):
+        self.image_capture = QImageCapture()
+        capture_session.setImageCapture(self.image_capture)
+        self.image_capture.imageCaptured.connect(self.handle_image_captured)
+        self.image_capture.errorOccurred.connect(self.handle_error)
+        return True
+
+    def handle_error(self, request_id, error, error_string):
+        logging.error(f"Snapshot capture error ({error}): {error_string}")
+
+    def is_ready(self):
+        return self.image_capture is not None
+
+    def start_recording(self):
+        if self.is_ready() and not self.is_capturing:
+            self.is_capturing = True
+            self.create_pools()
+            self.capture_timer.start(self.interval_ms)
+            # Take the first still right away instead of waiting a full interval
+            QTimer.singleShot(0, self.capture_snapshot)
+            logging.info("Snapshot proctoring started")
+            return True
+        return False
+
+    def stop_recording(self):
+        if self.is_ready() and self.is_capturing:
+            self.is_capturing = False
+            self.capture_timer.stop()
+            # Queue the flush behind any encode still in flight; both pools wind
+            # down once their queued work is done
+            encoder_pool, upload_pool = self.encoder_pool, self.upload_pool
+            self.encoder_pool = self.upload_pool = None
+            encoder_pool.submit(self.flush_batch, upload_pool, True)
+            encoder_pool.shutdown(wait=False)
+            logging.info(f"Snapshot proctoring stopped after {self.snapshot_counter} frames "
+                         f"({self.bytes_encoded} bytes encoded)")
+            if self.skipped_snapshots:
+                average = self.bytes_encoded / max(1, self.snapshot_counter)
+                logging.info(f"Skipped {self.skipped_snapshots} static snapshots, "
+                             f"estimated {int(average * self.skipped_snapshots)} bytes saved")
+            return True
+        return False
+
+    def capture_snapshot(self):
+        if not self.is_capturing or not self.image_capture.isReadyForCapture():
+            return
+        now = time.monotonic()
+        if (self.motion_analyzer is not None and self.motion_analyzer.is_static
+                and (now - self.last_capture) * 1000 < self.keepalive_ms):
+            self.skipped_snapshots += 1
+            return
+        self.last_capture = now
+        self.image_capture.capture()
+
+    def handle_image_captured(self, request_id, image):
+        # Runs on the GUI thread - hand the QImage straight to the encoder
+        if self.encoder_pool is None:
+            return  # Capture finished after stop
+        self.encoder_pool.submit(self.encode_snapshot, image, time.time(), self.upload_pool)
+
+    def encode_snapshot(self, image, timestamp, upload_pool):
+        """Worker thread: downscale and compress one frame, then add it to the batch"""
         try:
-            # Log file info before upload attempt
-            file_size = os.path.getsize(self.current_chunk_file)
-            logging.info(f"Preparing to upload chunk: {self.current_chunk_file} (Size: {file_size} bytes)")
-            
-            if file_size == 0:
-                logging.error("File size is 0 bytes, cannot upload empty file")
-                return False
-                
-            # Format chunk counter with leading zeros
-            chunk_number = f"chunk{(self.chunk_counter - 1):04d}"
-            
-            # Create file_name for the API request
+            if image.width() > self.max_width:
+                image = image.scaledToWidth(self.max_width, Qt.TransformationMode.SmoothTransformation)
+
+            buffer = QBuffer()
+            buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+            if not image.save(buffer, self.image_format, self.quality):
+                logging.error(f"{self.image_format} encoding failed")
+                return
+            data = bytes(buffer.data())
+            buffer.close()
+        except Exception as e:
+            logging.error(f"Failed to encode snapshot: {e}")
+            return
+
+        ready_batch = None
+        with self.batch_lock:
+            self.snapshot_counter += 1
+            self.bytes_encoded += len(data)
+            self.batch.append((timestamp, data))
+            if len(self.batch) >= self.batch_size:
+                ready_batch, self.batch = self.batch, []
+
+        if ready_batch:
+            upload_pool.submit(self.upload_batch, ready_batch)
+
+    def flush_batch(self, upload_pool, close=False):
+        with self.batch_lock:
+            ready_batch, self.batch = self.batch, []
+        if ready_batch or close:
+            upload_pool.submit(self.upload_batch, ready_batch, close)
+        if close:
+            upload_pool.shutdown(wait=False)
+
+    def upload_batch(self, batch, final=False):
+        """Worker thread: send several frames in one multipart request"""
+        # Earlier failures go first once their backoff has passed; the last flush tries them regardless
+        batches = self.retry_queue.take(batch, force=final)
+
+        for sent, frames in enumerate(batches):
+            extension = "webp" if self.image_format == "WEBP" else "jpg"
+            mime_type = "image/webp" if self.image_format == "WEBP" else "image/jpeg"
             file_id = f"{self.user_id}-{self.exam_id}"
-            
-            # Prepare multipart form data exactly matching Postman
-            with open(self.current_chunk_file, 'rb') as file_data:
-                files = {
-                    'exam_id': (None, str(self.exam_id)),
-                    'user_id': (None, str(self.user_id)),
-                    'chunk': (f"{file_id}.mp4", file_data, 'video/mp4'),  # Use proper MIME type
-                    'type': (None, 'ondataavailable'),
-                    'file_name': (None, file_id),
-                    'chunk_number': (None, chunk_number)
-                }
-                
-                # Set headers with token
-                headers = {
-                    'Authorization': f'Bearer {self.token}'
-                }
-                
-                # Log the request details
-                logging.info(f"Sending request to: {self.api_endpoint}")
-                logging.info(f"Headers: {headers}")
-                logging.info(f"Form data keys: {list(files.keys())}")
-                
-                # Send POST request
+            files = [
+                ('exam_id', (None, str(self.exam_id))),
+                ('user_id', (None, str(self.user_id))),
+                ('file_name', (None, file_id)),
+                ('frame_count', (None, str(len(frames)))),
+            ]
+            for index, (timestamp, data) in enumerate(frames):
+                files.append((f'snapshot_{index}', (f"{file_id}_{int(timestamp * 1000)}.{extension}", data, mime_type)))
+                files.append((f'timestamp_{index}', (None, f"{timestamp:.3f}")))
+
+            try:
                 response = requests.post(
-                    self.api_endpoint,
+                    self.snapshot_endpoint,
                     files=files,
-                    headers=headers
+                    headers={'Authorization': f'Bearer {self.token}'},
+                    timeout=30
                 )
-            
-            # Check response
-            logging.info(f"Response status code: {response.status_code}")
-            logging.info(f"Response content: {response.text}")
-            
-            if response.status_code == 200:
-                try:
-                    json_response = response.json()
-                    if json_response.get('status') is True and "successful" in json_response.get('message', ''):
-                        logging.info(f"Successfully uploaded chunk {chunk_number}")
-                        # Delete the file after successful upload
-                        os.remove(self.current_chunk_file)
-                        return True
-                    else:
-                        logging.warning(f"Upload response not as expected: {json_response}")
-                        return False
-                except ValueError:
-                    logging.error("Could not parse response as JSON")
-                    return False
+                if response.status_code == 200 and response.json().get('status') is True:
+                    logging.info(f"Uploaded snapshot batch of {len(frames)} frames "
+                                 f"({sum(len(d) for _, d in frames)} bytes)")
+                    self.retry_queue.succeeded()
+                    continue
+                logging.error(f"Snapshot batch upload failed. Status code: {response.status_code}")
+            except (requests.RequestException, ValueError) as e:
+                logging.error(f"Request error uploading snapshot batch: {e}")
+            # The link is likely down - keep the rest for later instead of failing each in turn
+            self.retry_queue.failed(batches[sent:])
+            return
+
+# -----------------------------------------------------------------------------
+# Proctoring Event Detection
+# -----------------------------------------------------------------------------
+# On-device analysis of the shared camera frames. Detectors look for the
+# moments proctors review (camera covered, sudden scene change, nobody in
+# frame) and the pipeline uploads small timestamped events with thumbnails.
+# Selected per exam with "proctoring_mode": "events" (no video) or
+# "events_lowrate" (events plus a low frame rate recording).
+DETECTION_CONFIG = {
+    "analysis_fps": 2,             # Frames per second handed to the detectors
+    "frame_width": 160,            # Downscaled luma grid the detectors work on
+    "frame_height": 120,
+    "covered_luma_max": 20,        # Mean luma below this ...
+    "covered_std_max": 8,          # ... with almost no texture means the lens is covered
+    "scene_change_threshold": 40.0,  # Mean absolute difference that counts as a sudden change
+    "presence_ratio": 0.35,        # Centre edge energy below this fraction of the baseline = nobody there
+    "presence_hold_ms": 5000,      # How long the scene must look empty before reporting it
+    "event_cooldown_ms": 10000,    # Minimum gap between two repeating events (e.g. scene_change) of one type
+    "batch_size": 10,              # Events per upload request
+    "low_rate_fps": 5.0,           # Recording frame rate in events_lowrate mode
+    "detectors": ["covered_lens", "scene_change", "presence"],
+}
+
+
+class FrameDetector:
+    """Base class for detectors. process() returns a list of (event_type, details)."""
+
+    name = "detector"
+    # Events that report a state flip; each is sent once, so they bypass the cooldown
+    transitions = frozenset()
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.last_sequence = 0
+
+    def feed(self, sequence, luma, timestamp):
+        # Frames can reach the pool out of order - each detector only moves forward
+        with self.lock:
+            if sequence <= self.last_sequence:
+                return []
+            self.last_sequence = sequence
+            return self.process(luma, timestamp)
+
+    def process(self, luma, timestamp):
+        return []
+
+
+class CoveredLensDetector(FrameDetector):
+    """Very dark, flat frames mean the lens is covered or the camera is blocked"""
+
+    name = "covered_lens"
+    transitions = frozenset({"camera_covered", "camera_uncovered"})
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.covered = False
+
+    def process(self, luma, timestamp):
+        mean = float(luma.mean())
+        spread = float(luma.std())
+        covered = mean < self.settings["covered_luma_max"] and spread < self.settings["covered_std_max"]
+        if covered == self.covered:
+            return []
+        self.covered = covered
+        event_type = "camera_covered" if covered else "camera_uncovered"
+        return [(event_type, {"mean_luma": round(mean, 1), "luma_std": round(spread, 1)})]
+
+
+class SceneChangeDetector(FrameDetector):
+    """Spikes in frame-to-frame difference - someone walking in, camera moved, lights switched"""
+
+    name = "scene_change"
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.previous = None
+
+    def process(self, luma, timestamp):
+        current = luma.astype(np.int16)
+        previous, self.previous = self.previous, current
+        if previous is None:
+            return []
+        score = float(np.abs(current - previous).mean())
+        if score < self.settings["scene_change_threshold"]:
+            return []
+        return [("scene_change", {"difference": round(score, 1)})]
+
+
+class PresenceDetector(FrameDetector):
+    """Heuristic presence check from edge energy in the centre of the frame.
+
+    A candidate's face and shoulders add strong gradients to the centre of the
+    image. The first frames (the candidate has just passed the system check)
+    set the baseline; a sustained drop well below it is reported as nobody in
+    frame. This is a cheap heuristic, not a face detector.
+    """
+
+    name = "presence"
+    transitions = frozenset({"no_person", "person_returned"})
+    BASELINE_FRAMES = 10
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.baseline_samples = []
+        self.baseline = None
+        self.absent_since = None
+        self.absent = False
+
+    def centre_energy(self, luma):
+        height, width = luma.shape
+        centre = luma[height // 6:height * 5 // 6, width // 4:width * 3 // 4].astype(np.int16)
+        return float(np.abs(np.diff(centre, axis=1)).mean() + np.abs(np.diff(centre, axis=0)).mean())
+
+    def process(self, luma, timestamp):
+        energy = self.centre_energy(luma)
+        if self.baseline is None:
+            self.baseline_samples.append(energy)
+            if len(self.baseline_samples) >= self.BASELINE_FRAMES:
+                self.baseline = float(np.median(self.baseline_samples))
+            return []
+
+        looks_empty = energy < self.baseline * self.settings["presence_ratio"]
+        if not looks_empty:
+            self.absent_since = None
+            if self.absent:
+                self.absent = False
+                return [("person_returned", {"edge_energy": round(energy, 2)})]
+            return []
+
+        if self.absent_since is None:
+            self.absent_since = timestamp
+        if not self.absent and (timestamp - self.absent_since) * 1000 >= self.settings["presence_hold_ms"]:
+            self.absent = True
+            return [("no_person", {"edge_energy": round(energy, 2), "baseline": round(self.baseline, 2)})]
+        return []
+
+
+# Detectors selectable by name through DETECTION_CONFIG["detectors"]
+DETECTORS = {
+    "covered_lens": CoveredLensDetector,
+    "scene_change": SceneChangeDetector,
+    "presence": PresenceDetector,
+}
+
+
+class ProctoringEventPipeline:
+    """Runs the detectors over frame bus packets and uploads the events they emit.
+
+    Exposes the recorder interface (setup_recorder/start_recording/
+    stop_recording/is_ready) so ExamPage can use it like the other modes. In
+    events_lowrate mode it wraps a BackgroundWebcamRecorder and drives it too.
+    """
+
+    def __init__(self, token=None, exam_code=None, user_id=None, exam_id=None, config=None, recorder=None):
+        self.token = token
+        self.exam_code = exam_code
+        self.user_id = user_id if user_id is not None else "default_user"
+        self.exam_id = exam_id if exam_id is not None else "default_exam"
+
+        settings = merged_config(DETECTION_CONFIG, config, "detection")
+        self.settings = settings
+        self.frame_size = (int(settings["frame_width"]), int(settings["frame_height"]))
+        self.cooldown = settings["event_cooldown_ms"] / 1000.0
+        self.batch_size = max(1, int(settings["batch_size"]))
+
+        self.detectors = []
+        for name in settings["detectors"]:
+            if name in DETECTORS:
+                self.detectors.append(DETECTORS[name](settings))
             else:
-                logging.error(f"Failed to upload chunk. Status code: {response.status_code}")
-                logging.error(f"Response text: {response.text}")
-                return False
-                    
-        except requests.RequestException as req_err:
-            logging.error(f"Request error uploading chunk: {str(req_err)}")
+                logging.warning(f"Unknown proctoring detector '{name}' - skipped")
+
+        # Optional low-rate video alongside the events
+        self.recorder = recorder
+        self.uploader = recorder.uploader if recorder is not None else None
+        self.api_endpoint = f"{API_BASE_URL}/save-exam-recorded-video"
+
+        self.frame_bus = None
+        self.subscription = None
+        self.is_running = False
+
+        # One worker per detector (thumbnails are encoded on the same pool), created per recording run
+        self.detector_pool = None
+        self.upload_pool = None
+        self.event_lock = threading.Lock()
+        self.pending_events = []
+        self.retry_queue = RetryQueue("Proctoring event",
+                                      lambda events: sum(len(thumbnail or b"") for _, thumbnail in events))
+        self.last_event_at = {}
+        self.event_counts = collections.Counter()
+        self.bytes_uploaded = 0
+
+        logging.info(f"Proctoring events: detectors {[d.name for d in self.detectors]}, "
+                     f"{settings['analysis_fps']} fps, low-rate video {'on' if recorder else 'off'}")
+
+    def setup_recorder(self, capture_session):
+        self.frame_bus = shared_camera.frame_bus
+        if self.recorder is not None:
+            self.recorder.setup_recorder(capture_session)
+        return True
+
+    def is_ready(self):
+        return self.frame_bus is not None
+
+    def start_recording(self):
+        if not self.is_ready():
             return False
-        except IOError as io_err:
-            logging.error(f"I/O error handling chunk file: {str(io_err)}")
+        if self.recorder is not None:
+            self.recorder.start_recording()
+        if self.detector_pool is None:
+            self.detector_pool = ThreadPoolExecutor(max_workers=max(1, len(self.detectors)),
+                                                    thread_name_prefix="proctor-detect")
+            self.upload_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="proctor-events")
+        if self.subscription is None:
+            self.subscription = self.frame_bus.subscribe(self.handle_packet, max_fps=self.settings["analysis_fps"])
+        self.is_running = True
+        return True
+
+    def stop_recording(self):
+        if not self.is_running:
             return False
+        self.is_running = False
+        if self.subscription is not None:
+            self.frame_bus.unsubscribe(self.subscription)
+            self.subscription = None
+        if self.recorder is not None:
+            self.recorder.stop_recording()
+        # Detections already queued still emit into the old upload pool; the wind-down
+        # task waits for them, sends what is left and lets both pools go
+        detector_pool, upload_pool = self.detector_pool, self.upload_pool
+        self.detector_pool = self.upload_pool = None
+        upload_pool.submit(self.wind_down, detector_pool, upload_pool)
+        logging.info(f"Proctoring events stopped: {dict(self.event_counts)}, "
+                     f"{self.bytes_uploaded} bytes uploaded so far")
+        return True
+
+    def handle_packet(self, packet):
+        # GUI thread: take a small private copy so the ring slot can be reused
+        width, height = self.frame_size
+        step_x = max(1, packet.width // width)
+        step_y = max(1, packet.height // height)
+        luma = np.ascontiguousarray(packet.luma(step_x, step_y))
+        for detector in self.detectors:
+            self.detector_pool.submit(self.run_detector, detector, packet.sequence, luma, packet.timestamp,
+                                      self.upload_pool)
+
+    def wind_down(self, detector_pool, upload_pool):
+        """Upload worker: finish the run's detections, flush, then shut both pools down"""
+        detector_pool.shutdown(wait=True)
+        self.flush_events(final=True)
+        upload_pool.shutdown(wait=False)
+
+    def run_detector(self, detector, sequence, luma, timestamp, upload_pool):
+        """Worker thread: run one detector and turn its findings into events"""
+        try:
+            findings = detector.feed(sequence, luma, timestamp)
         except Exception as e:
-            logging.error(f"Unexpected error uploading chunk: {str(e)}")
-            logging.exception("Stack trace:")
+            logging.error(f"Detector {detector.name} failed: {e}")
+            return
+        for event_type, details in findings:
+            self.emit_event(detector.name, event_type, details, luma, upload_pool,
+                            transition=event_type in detector.transitions)
+
+    def emit_event(self, detector_name, event_type, details, luma, upload_pool, transition=False):
+        now = time.time()
+        if not transition:
+            # Repeating detections are rate limited; a dropped state flip would never be resent
+            with self.event_lock:
+                if now - self.last_event_at.get(event_type, 0.0) < self.cooldown:
+                    return
+                self.last_event_at[event_type] = now
+
+        event = {
+            "type": event_type,
+            "detector": detector_name,
+            "timestamp": round(now, 3),
+            "details": details,
+        }
+        thumbnail = self.encode_thumbnail(luma)
+        logging.info(f"Proctoring event: {event_type} {details}")
+
+        ready_batch = None
+        with self.event_lock:
+            self.event_counts[event_type] += 1
+            self.pending_events.append((event, thumbnail))
+            if len(self.pending_events) >= self.batch_size:
+                ready_batch, self.pending_events = self.pending_events, []
+        if ready_batch:
+            upload_pool.submit(self.upload_events, ready_batch)
+        elif event_type in ("camera_covered", "no_person"):
+            # Urgent events go up straight away rather than waiting for a full batch
+            upload_pool.submit(self.flush_events)
+
+    def encode_thumbnail(self, luma):
+        height, width = luma.shape
+        # QImage only wraps the buffer - keep it referenced until save() is done
+        pixels = luma.tobytes()
+        image = QImage(pixels, width, height, width, QImage.Format.Format_Grayscale8)
+        buffer = QBuffer()
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, "JPEG", 70)
+        data = bytes(buffer.data())
+        buffer.close()
+        return data
+
+    def flush_events(self, final=False):
+        with self.event_lock:
+            ready_batch, self.pending_events = self.pending_events, []
+        if ready_batch or final:
+            self.upload_events(ready_batch, final)
+
+    def upload_events(self, batch, final=False):
+        """Upload worker: send the batch after any earlier failures that are due for a retry"""
+        batches = self.retry_queue.take(batch, force=final)
+        for sent, events in enumerate(batches):
+            if not upload_proctoring_events(self.token, self.user_id, self.exam_id, events):
+                self.retry_queue.failed(batches[sent:])
+                return
+            self.retry_queue.succeeded()
+            self.bytes_uploaded += sum(len(thumbnail or b"") for _, thumbnail in events)
+
+
+def upload_proctoring_events(token, user_id, exam_id, events):
+    """POST [(event, thumbnail_or_None)] to save-exam-events in one multipart request"""
+    file_id = f"{user_id}-{exam_id}"
+    files = [
+        ('exam_id', (None, str(exam_id))),
+        ('user_id', (None, str(user_id))),
+        ('file_name', (None, file_id)),
+        ('events', (None, json.dumps([event for event, _ in events]))),
+    ]
+    for index, (event, thumbnail) in enumerate(events):
+        if thumbnail:
+            files.append((f'thumbnail_{index}',
+                          (f"{file_id}_{int(event['timestamp'] * 1000)}.jpg", thumbnail, 'image/jpeg')))
+
+    try:
+        response = requests.post(
+            f"{API_BASE_URL}/save-exam-events",
+            files=files,
+            headers={'Authorization': f'Bearer {token}'},
+            timeout=30
+        )
+        if response.status_code == 200 and response.json().get('status') is True:
+            logging.info(f"Uploaded {len(events)} proctoring events")
+            return True
+        logging.error(f"Proctoring event upload failed. Status code: {response.status_code}")
+    except (requests.RequestException, ValueError) as e:
+        logging.error(f"Request error uploading proctoring events: {e}")
+    return False
+
+# -----------------------------------------------------------------------------
+# Microphone Monitor
+# -----------------------------------------------------------------------------
+# Continuous input stream used for the preview level meter and for speech
+# activity events during the exam. The audio callback writes into a
+# preallocated ring and computes level/VAD with preallocated scratch arrays,
+# so the steady state allocates nothing per block.
+MICROPHONE_CONFIG = {
+    "samplerate": 16000,
+    "block_ms": 20,             # Callback block length
+    "subframes": 4,             # VAD decisions per block (vectorised)
+    "ring_seconds": 2.0,        # Recent audio kept for readers
+    "min_rms": 0.01,            # Absolute floor for speech energy
+    "noise_ratio": 3.0,         # Speech must be this many times the noise floor
+    "zcr_max": 0.35,            # Zero-crossing rate above this is hiss, not voice
+    "hangover_ms": 300,         # Keep a segment open across short pauses
+    "min_speech_ms": 250,       # Shorter bursts are not reported
+    "event_interval_ms": 30000, # How often ExamPage uploads speech events
+}
+
+
+class MicrophoneMonitor:
+    """sounddevice input stream with a ring buffer, RMS level and a simple voice-activity detector"""
+
+    def __init__(self, device=None, config=None):
+        settings = merged_config(MICROPHONE_CONFIG, config, "microphone")
+        self.settings = settings
+        self.device = device
+        self.samplerate = int(settings["samplerate"])
+        self.subframes = max(1, int(settings["subframes"]))
+        block = int(self.samplerate * settings["block_ms"] / 1000)
+        self.block_frames = block - block % self.subframes
+        self.block_seconds = self.block_frames / self.samplerate
+        self.stream = None
+
+        # Single-producer ring: the audio thread writes, then publishes the new count
+        ring_frames = int(self.samplerate * settings["ring_seconds"])
+        self.ring = np.zeros(ring_frames, dtype=np.float32)
+        self.samples_written = 0
+
+        # Scratch buffers reused by every callback
+        sub_length = self.block_frames // self.subframes
+        self.sub_energy = np.zeros(self.subframes, dtype=np.float32)
+        self.sub_crossings = np.zeros(self.subframes, dtype=np.int64)
+        self.signs = np.zeros(self.block_frames, dtype=bool)
+        self.sign_changes = np.zeros((self.subframes, sub_length - 1), dtype=bool)
+        self.sub_length = sub_length
+        self.loud = np.zeros(self.subframes, dtype=bool)
+        self.voiced = np.zeros(self.subframes, dtype=bool)
+
+        self.rms = 0.0
+        self.peak_rms = 0.0
+        self.noise_floor = settings["min_rms"] / settings["noise_ratio"]
+        self.is_speaking = False
+        self.speech_started = 0.0   # Stream time in seconds - block counting, not wall clock
+        self.speech_peak = 0.0
+        self.started_at = time.time()
+        self.silent_blocks = 0
+        self.hangover_blocks = max(1, int(settings["hangover_ms"] / settings["block_ms"]))
+
+        # Finished speech segments; deque appends are thread-safe
+        self.events = collections.deque(maxlen=1000)
+        self.blocks = 0
+        self.overflows = 0
+        self.cpu_seconds = 0.0
+
+    def start(self):
+        if self.stream is not None:
+            return True
+        device_registry.stream_opened()
+        try:
+            self.stream = sd.InputStream(
+                samplerate=self.samplerate,
+                blocksize=self.block_frames,
+                channels=1,
+                dtype='float32',
+                device=self.device,
+                callback=self.audio_callback
+            )
+            self.started_at = time.time() - self.samples_written / self.samplerate
+            self.stream.start()
+            logging.info(f"Microphone monitor started ({self.samplerate} Hz, {self.block_frames}-frame blocks)")
+            return True
+        except Exception as e:
+            logging.error(f"Could not open microphone stream: {e}")
+            self.stream = None
+            device_registry.stream_closed()
             return False
-        
+
+    def stop(self):
+        if self.stream is None:
+            return
+        try:
+            self.stream.stop()
+            self.stream.close()
+        except Exception as e:
+            logging.error(f"Error closing microphone stream: {e}")
+        self.stream = None
+        device_registry.stream_closed()
+        if self.is_speaking:
+            self.end_speech(self.samples_written / self.samplerate)
+        self.report()
+
+    def audio_callback(self, indata, frames, time_info, status):
+        cpu_start = time.thread_time()
+        if status.input_overflow:
+            self.overflows += 1
+        samples = indata[:, 0]
+
+        # Ring write (wraps at most once per block)
+        start = self.samples_written % self.ring.size
+        first = min(frames, self.ring.size - start)
+        self.ring[start:start + first] = samples[:first]
+        if first < frames:
+            self.ring[:frames - first] = samples[first:]
+        self.samples_written += frames
+
+        if frames == self.block_frames:
+            self.analyse_block(samples)
+        self.blocks += 1
+        self.cpu_seconds += time.thread_time() - cpu_start
+
+    def analyse_block(self, samples):
+        """Level and VAD for one block using only the preallocated scratch arrays"""
+        sub = samples.reshape(self.subframes, self.sub_length)
+        np.einsum('ij,ij->i', sub, sub, out=self.sub_energy)
+        energy_total = float(self.sub_energy.sum())
+        self.sub_energy /= self.sub_length
+        np.sqrt(self.sub_energy, out=self.sub_energy)  # per-subframe RMS
+
+        np.signbit(samples, out=self.signs)
+        signs = self.signs.reshape(self.subframes, self.sub_length)
+        np.not_equal(signs[:, 1:], signs[:, :-1], out=self.sign_changes)
+        np.sum(self.sign_changes, axis=1, out=self.sub_crossings)
+
+        self.rms = (energy_total / self.block_frames) ** 0.5
+        self.peak_rms = max(self.peak_rms, self.rms)
+
+        threshold = max(self.settings["min_rms"], self.noise_floor * self.settings["noise_ratio"])
+        zcr_limit = self.settings["zcr_max"] * self.sub_length
+        np.greater(self.sub_energy, threshold, out=self.loud)
+        np.less(self.sub_crossings, zcr_limit, out=self.voiced)
+        np.logical_and(self.loud, self.voiced, out=self.voiced)
+        voiced = int(np.count_nonzero(self.voiced))
+        block_is_speech = voiced * 2 >= self.subframes
+
+        # samples_written already includes this block
+        now = self.samples_written / self.samplerate
+        if block_is_speech:
+            self.silent_blocks = 0
+            if not self.is_speaking:
+                self.is_speaking = True
+                self.speech_started = now - self.block_seconds
+                self.speech_peak = 0.0
+            self.speech_peak = max(self.speech_peak, self.rms)
+        else:
+            # Track the noise floor only on non-speech blocks
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * self.rms
+            if self.is_speaking:
+                self.silent_blocks += 1
+                if self.silent_blocks >= self.hangover_blocks:
+                    self.end_speech(now - self.silent_blocks * self.block_seconds)
+
+    def end_speech(self, ended):
+        self.is_speaking = False
+        self.silent_blocks = 0
+        duration_ms = int((ended - self.speech_started) * 1000)
+        if duration_ms >= self.settings["min_speech_ms"]:
+            self.events.append((self.speech_started, duration_ms, self.speech_peak))
+
+    def level_percent(self):
+        """Current level on a 0-100 scale (-60 dBFS .. 0 dBFS)"""
+        if self.rms <= 1e-6:
+            return 0
+        db = 20 * math.log10(self.rms)
+        return int(max(0, min(100, (db + 60) * 100 / 60)))
+
+    def recent_samples(self, count):
+        """Copy of the newest `count` samples from the ring"""
+        count = min(count, self.ring.size, self.samples_written)
+        end = self.samples_written % self.ring.size
+        if count <= end:
+            return self.ring[end - count:end].copy()
+        return np.concatenate((self.ring[self.ring.size - (count - end):], self.ring[:end]))
+
+    def drain_events(self):
+        """Speech segments since the last call, as compact event dicts"""
+        events = []
+        while self.events:
+            started, duration_ms, peak = self.events.popleft()
+            events.append({
+                "type": "speech",
+                "detector": "microphone_vad",
+                "timestamp": round(self.started_at + started, 3),
+                "details": {"duration_ms": duration_ms, "peak_dbfs": round(20 * math.log10(max(peak, 1e-6)), 1)},
+            })
+        return events
+
+    def report(self):
+        stats = {
+            "blocks": self.blocks,
+            "overflows": self.overflows,
+            "cpu_us_per_block": round(self.cpu_seconds * 1e6 / max(1, self.blocks), 1),
+            "cpu_percent": round(100 * self.cpu_seconds / max(1e-6, self.blocks * self.block_seconds), 3),
+            "noise_floor_dbfs": round(20 * math.log10(max(self.noise_floor, 1e-6)), 1),
+        }
+        logging.info(f"Microphone monitor report: {stats}")
+        return stats
+
 # 3. Device Selection Dialog
 class DeviceSelectionDialog(QDialog):
     def __init__(self, parent=None):
@@ -2040,13 +4301,12 @@ class DeviceSelectionDialog(QDialog):
         # Populate audio devices from system
         try:
             self.audio_combo.clear()
-            devices = sd.query_devices()
+            devices, (_, default_out) = device_registry.audio_devices()
             for i, device in enumerate(devices):
                 if device['max_output_channels'] > 0:
                     self.audio_combo.addItem(f"{device['name']}", i)
             
             # Set default device if available
-            default_out = sd.default.device[1]
             if default_out >= 0 and default_out < self.audio_combo.count():
                 self.audio_combo.setCurrentIndex(default_out)
         except Exception as e:
@@ -2060,7 +4320,7 @@ class DeviceSelectionDialog(QDialog):
         
         # Populate video devices
         self.video_combo.clear()
-        available_cameras = QMediaDevices.videoInputs()
+        available_cameras = device_registry.video_inputs()
         if available_cameras:
             for camera in available_cameras:
                 self.video_combo.addItem(f"{camera.description()}")
@@ -2072,6 +4332,15 @@ class DeviceSelectionDialog(QDialog):
                 "Virtual Camera"
             ])
 
+    def accept(self):
+        # The video system check probes the camera chosen here
+        camera_device = next((device for device in device_registry.video_inputs()
+                              if device.description() == self.video_combo.currentText()), None)
+        if camera_device is not None and camera_device != shared_camera.preferred_device:
+            shared_camera.preferred_device = camera_device
+            shared_camera.preferred_format = None
+        super().accept()
+
     def on_show_demo_clicked(self):
         audio_device = self.audio_combo.currentText()
         video_device = self.video_combo.currentText()
@@ -2138,9 +4407,6 @@ class DemoPreviewDialog(QDialog):
         device_title.setFont(QFont("Segoe UI", 14, QFont.Weight.Bold))
         device_layout.addWidget(device_title)
 
-        self.audio_device = "Intel(R) Display Audio HDMI 1"
-        self.video_device = "Integrated Camera (04f2:b725)"
-
         audio_info = QLabel(f"Audio: {self.audio_device}")
         audio_info.setFont(QFont("Segoe UI", 12))
         device_layout.addWidget(audio_info)
@@ -2172,17 +4438,17 @@ class DemoPreviewDialog(QDialog):
         self.video_container = QWidget()
         self.video_container_layout = QVBoxLayout(self.video_container)
 
-        self.video_preview = QLabel("Connecting to camera...")
-        self.video_preview.setFont(QFont("Segoe UI", 14))
-        self.video_preview.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        # Live preview fed by the shared camera's frame bus
+        self.video_preview = QVideoWidget()
         self.video_preview.setMinimumSize(400, 250)
-        self.video_preview.setStyleSheet("""
-            background-color: #333;
-            color: white;
-            border-radius: 6px;
-        """)
+        self.video_preview.setStyleSheet("background-color: #333; border-radius: 6px;")
         self.video_container_layout.addWidget(self.video_preview)
 
+        self.camera_status = QLabel("Connecting to camera...")
+        self.camera_status.setFont(QFont("Segoe UI", 12))
+        self.camera_status.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.video_container_layout.addWidget(self.camera_status)
+
         self.video_layout.addWidget(self.video_container)
 
         layout.addWidget(video_section)
@@ -2277,41 +4543,58 @@ class DemoPreviewDialog(QDialog):
         main_layout = QVBoxLayout(self)
         main_layout.addWidget(scroll)
 
-        # Simulate camera connection after delay
-        QTimer.singleShot(1500, self.simulate_camera_connection)
+        # Open the shared camera once the dialog is on screen
+        QTimer.singleShot(0, self.start_camera_preview)
+
+    def start_camera_preview(self):
+        # The preview warms the same session the exam records from - it is left running on close
+        camera_device = next((device for device in device_registry.video_inputs()
+                              if device.description() == self.video_device), None)
+        if camera_device is not None and shared_camera.is_initialized:
+            current = shared_camera.camera.cameraDevice()
+            if current != camera_device:
+                shared_camera.switch_device(camera_device)
+        if not shared_camera.warm_up(camera_device):
+            self.camera_status.setText("No camera detected")
+            self.camera_status.setStyleSheet("color: red;")
+            return
+        shared_camera.frame_bus.add_preview_sink(self.video_preview.videoSink())
+        shared_camera.when_active(self.on_camera_active)
+
+    def on_camera_active(self):
+        self.camera_status.setText("Camera connected successfully")
+        self.camera_status.setStyleSheet("color: green;")
 
-    def simulate_camera_connection(self):
-        # In a real implementation, you would connect to the actual camera
-        # This is a simulation for demo purposes
-        self.video_preview.setText("Camera connected successfully")
-        self.video_preview.setStyleSheet("background-color: #111; color: lime;")
-        
-        # Show a message that this is just a simulation
-        msg = QLabel("(In a real implementation, this would show live camera feed)")
-        msg.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        msg.setStyleSheet("color: yellow;")
-        self.video_container_layout.addWidget(msg) 
+    def stop_camera_preview(self):
+        shared_camera.frame_bus.remove_preview_sink(self.video_preview.videoSink())
     
     def start_audio_monitoring(self):
-        # In a real implementation, this would monitor actual audio levels
-        # For this demo, we'll simulate with a timer
-        self.audio_timer = QTimer(self)
-        self.audio_timer.timeout.connect(self.update_audio_level)
+        # Live level from the selected device's input side, or the default input when it has none
+        try:
+            device = device_registry.audio_input_for(self.audio_device)
+        except Exception as e:
+            logging.error(f"Could not resolve audio input for {self.audio_device}: {e}")
+            device = None
+        self.microphone = MicrophoneMonitor(device)
+        self.microphone_available = self.microphone.start()
+        self.audio_timer = task_scheduler.register("demo_audio_meter", self.update_audio_level, 100, TASK_PRIORITY_LOW)
         self.audio_timer.start(100)
         self.audio_level = 0
         
     def update_audio_level(self):
-        # Simulate fluctuating audio levels
-        # In a real implementation, this would read from the microphone
-        if random.random() < 0.3:
-            self.audio_level = min(100, self.audio_level + random.randint(5, 20))
-        else:
-            self.audio_level = max(0, self.audio_level - random.randint(3, 10))
-            
+        if not self.microphone_available:
+            self.audio_levels.setValue(0)
+            self.audio_status.setText("Microphone unavailable - check your input device")
+            self.audio_status.setStyleSheet("color: red;")
+            return
+
+        # Fast attack, slow release so the bar doesn't flicker
+        level = self.microphone.level_percent()
+        self.audio_level = level if level > self.audio_level else max(level, self.audio_level - 5)
         self.audio_levels.setValue(self.audio_level)
         
         # Update status based on level
-        if self.audio_level > 70:
+        if self.microphone.is_speaking or self.audio_level > 70:
             self.audio_status.setText("Audio level good!")
             self.audio_status.setStyleSheet("color: green;")
         elif self.audio_level > 30:
@@ -2322,18 +4605,27 @@ class DemoPreviewDialog(QDialog):
             self.audio_status.setStyleSheet("color: black;")
     
     def play_test_sound(self):
-        # In a real implementation, this would play an actual test sound
         self.test_sound_button.setText("Playing...")
         self.test_sound_button.setEnabled(False)
         
-        # Simulate playing sound by temporarily increasing audio level
-        self.audio_level = 80
-        self.audio_levels.setValue(self.audio_level)
+        # One second 440 Hz tone on the default output (non-blocking); the stream
+        # stays registered until reset_test_button stops it
+        device_registry.stream_opened()
+        try:
+            fs = 44100
+            sd.play((np.sin(2 * np.pi * 440 * np.arange(fs) / fs) * 0.3).astype(np.float32), fs)
+        except Exception as e:
+            logging.error(f"Could not play test sound: {e}")
         
         # Re-enable after a short delay
         QTimer.singleShot(2000, self.reset_test_button)
     
     def reset_test_button(self):
+        try:
+            sd.stop()
+        except Exception as e:
+            logging.error(f"Could not stop test sound: {e}")
+        device_registry.stream_closed()
         self.test_sound_button.setText("Play Test Sound")
         self.test_sound_button.setEnabled(True)
     
@@ -2361,10 +4653,23 @@ class DemoPreviewDialog(QDialog):
         help_dialog.setStandardButtons(QMessageBox.StandardButton.Ok)
         help_dialog.exec()
         
+    def stop_audio_monitoring(self):
+        if hasattr(self, 'audio_timer'):
+            task_scheduler.unregister(self.audio_timer)
+            del self.audio_timer
+        if hasattr(self, 'microphone'):
+            self.microphone.stop()
+
+    def done(self, result):
+        # accept()/reject() don't send a closeEvent - release the microphone here too
+        self.stop_audio_monitoring()
+        self.stop_camera_preview()
+        super().done(result)
+
     def closeEvent(self, event):
         # Stop the timer when the dialog is closed
-        if hasattr(self, 'audio_timer') and self.audio_timer.isActive():
-            self.audio_timer.stop()
+        self.stop_audio_monitoring()
+        self.stop_camera_preview()
         super().closeEvent(event)
 
 # 5. Exam Instructions Page
@@ -2376,6 +4681,11 @@ class ExamInstructionsPage(QWidget):
         self.remaining_time = 0
         self.setup_ui()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Start the camera while the candidate reads, so recording starts instantly on the exam page
+        shared_camera.warm_up()
+
     def set_exam_details(self, exam_details):
         self.exam_details = exam_details
         print("\n✅ Exam Details in ExamInstructionsPage:", self.exam_details)
@@ -2452,9 +4762,9 @@ class ExamInstructionsPage(QWidget):
             self.countdown_label.setStyleSheet("color: #418b69;")
 
     def start_countdown(self):
-        # Create a QTimer and connect its timeout to update_countdown
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_countdown)
+        # Countdown ticks come from the shared scheduler, never stretched
+        if not hasattr(self, 'timer'):
+            self.timer = task_scheduler.register("start_countdown", self.update_countdown, 1000, TASK_PRIORITY_HIGH)
         self.update_countdown()  # Call immediately to update the label
         self.timer.start(1000)
 
@@ -2522,6 +4832,415 @@ class ExamInstructionsPage(QWidget):
             logging.error(f"Error during exam transition: {str(e)}")
             QMessageBox.warning(self, "Error", f"An error occurred: {str(e)}")
 
+# -----------------------------------------------------------------------------
+# Code Editor
+# -----------------------------------------------------------------------------
+# Custom QPlainTextEdit subclass for code editing with line numbers
+class CodeEditor(QPlainTextEdit):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.line_number_area = LineNumberArea(self)
+        self.line_number_digits = 0
+        self.line_number_width = 0
+        self.current_line_block = -1
+        self.large_document = False
+        self.on_undo_reset = None  # called after the undo history had to be cleared
+
+        # Connect signals
+        self.blockCountChanged.connect(self.update_line_number_area_width)
+        self.updateRequest.connect(self.update_line_number_area)
+        self.cursorPositionChanged.connect(self.highlight_current_line)
+        self.verticalScrollBar().valueChanged.connect(self.update_lazy_range)
+        # Connected before the highlighter so the mode is settled before it reformats
+        self.document().contentsChange.connect(self.check_document_size)
+        self.document().undoCommandAdded.connect(self.limit_undo_stack)
+
+        # Set monospace font for code
+        font = QFont("Consolas")
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        self.setFont(font)
+
+        # Set tab size to 4 spaces
+        self.setTabStopDistance(self.fontMetrics().horizontalAdvance(' ') * 4)
+
+        # Modern style for the editor (VS Code-like dark theme)
+        self.setStyleSheet("""
+            QPlainTextEdit {
+                background-color: #1E1E1E;
+                color: #D4D4D4;
+                border: 1px solid #2D2D2D;
+                border-radius: 4px;
+                selection-background-color: #264F78;
+                selection-color: #FFFFFF;
+                font-family: Consolas, Monaco, 'Courier New', monospace;
+                font-size: 14px;
+            }
+        """)
+
+        # Initial setup
+        self.update_line_number_area_width(0)
+        self.highlight_current_line()
+
+        # Create syntax highlighter and completion index
+        self.highlighter = VSCodeSyntaxHighlighter(self.document(), "python")
+        self.completion = CompletionIndex(self.document(), "python")
+
+        # Completion popup, filled from the index; Enter accepts (Tab is blocked during the exam)
+        self.completer = QCompleter(self)
+        self.completer.setWidget(self)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.setModel(QStringListModel(self.completer))
+        self.completer.activated.connect(self.insert_completion)
+
+    def set_language(self, language):
+        """Set language for syntax highlighting and completion"""
+        self.highlighter.set_language(language)
+        self.completion.set_language(language)
+
+    def prefix_at_cursor(self):
+        """The partial word left of the cursor"""
+        cursor = self.textCursor()
+        before = cursor.block().text()[:cursor.positionInBlock()]
+        match = re.search(r'[A-Za-z_][A-Za-z0-9_]*$', before)
+        return match.group() if match else ""
+
+    def completions_at_cursor(self):
+        """Completion candidates for the partial word left of the cursor"""
+        prefix = self.prefix_at_cursor()
+        return [word for word in self.completion.query(prefix) if word != prefix]
+
+    def keyPressEvent(self, event):
+        """Type as usual, then refresh the completion popup"""
+        key = event.key()
+        if self.completer.popup().isVisible() and key in (Qt.Key.Key_Return, Qt.Key.Key_Enter, Qt.Key.Key_Escape):
+            event.ignore()  # The completer accepts or dismisses
+            return
+        forced = key == Qt.Key.Key_Space and event.modifiers() & Qt.KeyboardModifier.ControlModifier
+        if not forced:
+            super().keyPressEvent(event)
+        if forced or event.text() or self.completer.popup().isVisible():
+            self.update_completion_popup(bool(forced))
+
+    def update_completion_popup(self, forced=False):
+        prefix = self.prefix_at_cursor()
+        popup = self.completer.popup()
+        words = self.completions_at_cursor() if forced or len(prefix) >= COMPLETION_CONFIG["popup_min_prefix"] else []
+        if not words:
+            popup.hide()
+            return
+        model = self.completer.model()
+        model.setStringList(words)
+        popup.setCurrentIndex(model.index(0, 0))
+        rect = self.cursorRect()
+        rect.setWidth(popup.sizeHintForColumn(0) + popup.verticalScrollBar().sizeHint().width())
+        self.completer.complete(rect)
+
+    def insert_completion(self, word):
+        cursor = self.textCursor()
+        cursor.insertText(word[len(self.prefix_at_cursor()):])
+        self.setTextCursor(cursor)
+
+    # Add setText method for compatibility with QTextEdit
+    def setText(self, text):
+        """Compatibility method to match QTextEdit's setText"""
+        self.setPlainText(text)
+
+    def text(self):
+        """Compatibility method to match QTextEdit's text()"""
+        return self.toPlainText()
+
+    def check_document_size(self, position, removed, added):
+        """Enter or leave large-document mode as the line count crosses the threshold"""
+        large = self.document().blockCount() >= LARGE_DOCUMENT_CONFIG["threshold_blocks"]
+        if large == self.large_document:
+            return
+        self.large_document = large
+        logging.info(f"Code editor {'entered' if large else 'left'} large-document mode "
+                     f"at {self.document().blockCount()} lines")
+        if large:
+            self.update_lazy_range()
+        else:
+            self.highlighter.set_lazy_range(None)
+
+    def update_lazy_range(self, _=None):
+        """Point lazy highlighting at the visible blocks plus a margin"""
+        if not self.large_document:
+            return
+        first = self.firstVisibleBlock().blockNumber()
+        last = first + self.viewport().height() // max(1, self.fontMetrics().height()) + 1
+        margin = LARGE_DOCUMENT_CONFIG["margin_blocks"]
+        self.highlighter.set_lazy_range((max(0, first - margin), last + margin))
+        self.highlighter.highlight_range(first, last)
+
+    def limit_undo_stack(self):
+        """Cap undo history in large-document mode.
+
+        QTextDocument cannot drop its oldest undo steps, so past the limit the
+        whole history is cleared and starts again from the current text. The
+        limit is high enough that this is rare, and on_undo_reset tells the
+        candidate when it happens.
+        """
+        if self.large_document and self.document().availableUndoSteps() > LARGE_DOCUMENT_CONFIG["undo_limit"]:
+            self.document().clearUndoRedoStacks(QTextDocument.Stacks.UndoStack)
+            logging.info("Code editor undo history reset")
+            if self.on_undo_reset is not None:
+                self.on_undo_reset()
+
+    def line_number_area_width(self):
+        """Width of the line number area, cached until the digit count changes"""
+        return self.line_number_width
+
+    def update_line_number_area_width(self, _):
+        """Update the margin reserved for the line number area"""
+        digits = len(str(max(1, self.blockCount())))
+        if digits == self.line_number_digits:
+            return
+        self.line_number_digits = digits
+        self.line_number_width = 10 + self.fontMetrics().horizontalAdvance('9') * digits
+        self.setViewportMargins(self.line_number_width, 0, 0, 0)
+
+    def update_line_number_area(self, rect, dy):
+        """Update the line number area when the viewport is scrolled"""
+        if dy:
+            self.line_number_area.scroll(0, dy)
+        else:
+            self.line_number_area.update(0, rect.y(), self.line_number_area.width(), rect.height())
+
+        if rect.contains(self.viewport().rect()):
+            self.update_line_number_area_width(0)
+
+    def changeEvent(self, event):
+        """Recompute the cached line number width when the font changes"""
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.FontChange:
+            self.line_number_digits = 0
+            self.update_line_number_area_width(0)
+
+    def resizeEvent(self, event):
+        """Handle resize events"""
+        super().resizeEvent(event)
+
+        cr = self.contentsRect()
+        self.line_number_area.setGeometry(QRect(cr.left(), cr.top(), self.line_number_area_width(), cr.height()))
+        self.update_lazy_range()
+
+    def highlight_current_line(self):
+        """Highlight the line where the cursor is positioned"""
+        block_number = self.textCursor().blockNumber()
+        if block_number == self.current_line_block:
+            return  # Selection cursor already sits on this line
+        self.current_line_block = block_number
+
+        extra_selections = []
+
+        if not self.isReadOnly():
+            selection = QTextEdit.ExtraSelection()
+            line_color = QColor("#2A2A2A")  # Dark subtle highlight for current line
+
+            selection.format.setBackground(line_color)
+            selection.format.setProperty(QTextFormat.Property.FullWidthSelection, True)
+            selection.cursor = self.textCursor()
+            selection.cursor.clearSelection()
+            extra_selections.append(selection)
+
+        self.setExtraSelections(extra_selections)
+
+    def line_number_area_paint_event(self, event):
+        """Paint the line numbers inside the dirty rectangle"""
+        painter = QPainter(self.line_number_area)
+        dirty = event.rect()
+        painter.fillRect(dirty, QColor("#1A1A1A"))  # VS Code-like line number background
+        painter.setPen(QColor("#6D6D6D"))  # VS Code-like line number color
+        width = self.line_number_area.width() - 5
+        line_height = self.fontMetrics().height()
+
+        block = self.firstVisibleBlock()
+        block_number = block.blockNumber()
+        top = round(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
+        bottom = top + round(self.blockBoundingRect(block).height())
+
+        while block.isValid() and top <= dirty.bottom():
+            if block.isVisible() and bottom >= dirty.top():
+                painter.drawText(0, top, width, line_height, Qt.AlignmentFlag.AlignRight, str(block_number + 1))
+
+            block = block.next()
+            top = bottom
+            bottom = top + round(self.blockBoundingRect(block).height())
+            block_number += 1
+
+
+# Line number area widget
+class LineNumberArea(QWidget):
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.code_editor = editor
+
+    def sizeHint(self):
+        return QSize(self.code_editor.line_number_area_width(), 0)
+
+    def paintEvent(self, event):
+        self.code_editor.line_number_area_paint_event(event)
+
+
+# -----------------------------------------------------------------------------
+# Code Runner
+# -----------------------------------------------------------------------------
+RUN_MANAGER_CONFIG = {
+    # Point EVALUATE_COMPILER_URL at the local stand-in to test without the shared compiler
+    "compiler_url": os.environ.get(
+        "EVALUATE_COMPILER_URL",
+        "https://stageevaluate.sentientgeeks.us/wp-content/themes/questioner/app/compiler.php"
+    ),
+    "timeout_ms": 20000,
+    "min_interval_ms": 3000,   # per-candidate spacing between compiler runs
+    "max_runs_per_minute": 10,
+    "cache_size": 32,          # (language, code hash) results kept
+}
+
+RUN_IDLE = "idle"
+RUN_RUNNING = "running"
+RUN_QUEUED = "queued"
+RUN_CACHED = "cached"
+
+
+class RunManager:
+    """Runs candidate code on the shared compiler with at most one run in flight.
+
+    A new submission cancels the running one, resubmitting the running code is
+    ignored, unchanged code is answered from the cache, and runs beyond the
+    per-candidate rate limit wait in a one-slot queue (latest code wins).
+    """
+
+    run_history = {}  # candidate id -> start times of recent runs, shared across pages
+
+    def __init__(self, candidate_id, on_result, on_state):
+        self.candidate_id = candidate_id
+        self.on_result = on_result  # called with the output text
+        self.on_state = on_state  # called with (RUN_* state, status message)
+        self.network_manager = None
+        self.reply = None
+        self.reply_key = None
+        self.pending = None  # (key, language, code) waiting on the rate limit
+        self.pending_timer = None
+        self.cache = collections.OrderedDict()
+        self.stats = collections.Counter()
+
+    @staticmethod
+    def key_for(language, code):
+        return (language, hashlib.sha256(code.encode("utf-8")).hexdigest())
+
+    def running(self):
+        return self.reply is not None
+
+    def submit(self, language, code):
+        key = self.key_for(language, code)
+        if key == self.reply_key or (self.pending is not None and self.pending[0] == key):
+            self.stats["deduplicated"] += 1
+            return
+
+        self.cancel()
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            self.on_result(cached)
+            self.on_state(RUN_CACHED, "Code unchanged - showing the previous result")
+            return
+
+        self.pending = (key, language, code)
+        self.start_pending()
+
+    def rate_limit_wait_ms(self):
+        """How long until this candidate may start another run"""
+        history = self.run_history.setdefault(self.candidate_id, collections.deque())
+        now = time.monotonic()
+        while history and now - history[0] >= 60:
+            history.popleft()
+        wait = 0.0
+        if history:
+            wait = history[-1] + RUN_MANAGER_CONFIG["min_interval_ms"] / 1000 - now
+        if len(history) >= RUN_MANAGER_CONFIG["max_runs_per_minute"]:
+            wait = max(wait, history[0] + 60 - now)
+        return max(0, math.ceil(wait * 1000))
+
+    def start_pending(self):
+        if self.pending is None:
+            return
+        wait_ms = self.rate_limit_wait_ms()
+        if wait_ms > 0:
+            if self.pending_timer is None:
+                self.pending_timer = QTimer()
+                self.pending_timer.setSingleShot(True)
+                self.pending_timer.timeout.connect(self.start_pending)
+            self.pending_timer.start(wait_ms)
+            self.on_state(RUN_QUEUED, f"Queued - starts in {math.ceil(wait_ms / 1000)}s")
+            return
+
+        key, language, code = self.pending
+        self.pending = None
+        self.start(key, language, code)
+
+    def start(self, key, language, code):
+        if self.network_manager is None:
+            self.network_manager = QNetworkAccessManager()
+
+        request = QNetworkRequest(QUrl(RUN_MANAGER_CONFIG["compiler_url"]))
+        request.setHeader(QNetworkRequest.KnownHeaders.ContentTypeHeader,
+                          "application/x-www-form-urlencoded")
+        request.setTransferTimeout(RUN_MANAGER_CONFIG["timeout_ms"])
+
+        query = QUrlQuery()
+        query.addQueryItem("language", language)
+        query.addQueryItem("code", code)
+
+        self.run_history.setdefault(self.candidate_id, collections.deque()).append(time.monotonic())
+        reply = self.network_manager.post(request, query.toString().encode())
+        self.reply = reply
+        self.reply_key = key
+        self.stats["runs"] += 1
+        reply.finished.connect(lambda: self.finished(reply))
+        self.on_state(RUN_RUNNING, "Running...")
+
+    def finished(self, reply):
+        reply.deleteLater()
+        if reply is not self.reply:
+            return  # Superseded by a newer submission
+
+        key = self.reply_key
+        self.reply = None
+        self.reply_key = None
+        error = reply.error()
+        if error == QNetworkReply.NetworkError.NoError:
+            output = reply.readAll().data().decode()
+            self.cache[key] = output
+            while len(self.cache) > RUN_MANAGER_CONFIG["cache_size"]:
+                self.cache.popitem(last=False)
+            self.on_result(output)
+            self.on_state(RUN_IDLE, "")
+        elif error == QNetworkReply.NetworkError.TimeoutError:
+            self.stats["timeouts"] += 1
+            self.on_result(f"Error: the compiler did not answer within {RUN_MANAGER_CONFIG['timeout_ms'] / 1000:g}s.")
+            self.on_state(RUN_IDLE, "Timed out")
+        else:
+            self.on_result(f"Network Error: {reply.errorString()}")
+            self.on_state(RUN_IDLE, "")
+
+    def cancel(self):
+        """Drop the queued run and abort the in-flight one"""
+        if self.pending_timer is not None:
+            self.pending_timer.stop()
+        self.pending = None
+        if self.reply is not None:
+            reply = self.reply
+            self.reply = None
+            self.reply_key = None
+            self.stats["cancelled"] += 1
+            reply.abort()
+
+    def report(self):
+        logging.info(f"Run manager: {dict(self.stats)}")
+
+
 class ExamPage(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -2534,10 +5253,14 @@ class ExamPage(QWidget):
         self.user_id = None
         self.exam_submitted = False
         self.webcam_recorder = None
+        self.motion_analyzer = None
+        self.microphone_monitor = None
+        self.process_monitoring = False
+        self.device_monitoring = False
+        self.event_upload_pool = None
 
-        self.timer = QTimer(self)
+        self.timer = task_scheduler.register("exam_countdown", self.update_timer, 1000, TASK_PRIORITY_HIGH)
         self.remaining_seconds = 0
-        self.timer.timeout.connect(self.update_timer)
 
         self.setup_ui()
 
@@ -2726,10 +5449,15 @@ class ExamPage(QWidget):
             }
         """)
         self.run_code_button.clicked.connect(self.run_code)
+
+        # Run queue state: running, queued behind the rate limit, cached
+        self.run_status_label = QLabel("")
+        self.run_status_label.setStyleSheet("color: #666666; font-style: italic;")
     
         lang_row_layout.addWidget(lang_label)
         lang_row_layout.addWidget(self.language_selector)
         lang_row_layout.addStretch()
+        lang_row_layout.addWidget(self.run_status_label)
         lang_row_layout.addWidget(self.run_code_button)
         coding_layout.addLayout(lang_row_layout)
         
@@ -3027,384 +5755,6 @@ class ExamPage(QWidget):
         self.question_content_web.setMaximumHeight(content_height)
                
     def setup_modern_code_editor(self):
-        
-        # Create syntax highlighter for different languages
-        class VSCodeSyntaxHighlighter(QSyntaxHighlighter):
-            def __init__(self, parent=None, language="python"):
-                super().__init__(parent)
-                self.language = language.lower()
-                self.highlighting_rules = []
-                
-                # VS Code color scheme
-                self.colors = {
-                    "keyword": QColor("#569CD6"),       # blue
-                    "class": QColor("#4EC9B0"),         # teal
-                    "function": QColor("#DCDCAA"),      # yellow
-                    "string": QColor("#CE9178"),        # orange-brown
-                    "comment": QColor("#6A9955"),       # green
-                    "number": QColor("#B5CEA8"),        # light green
-                    "operator": QColor("#D4D4D4"),      # light gray
-                    "constant": QColor("#4FC1FF"),      # light blue
-                    "preprocessor": QColor("#C586C0"),  # purple
-                    "identifier": QColor("#9CDCFE"),    # light blue
-                    "bracket": QColor("#D4D4D4"),       # light gray
-                    "default": QColor("#D4D4D4")        # light gray
-                }
-                
-                self.setup_highlighting_rules()
-            
-            def setup_highlighting_rules(self):
-                # Clear rules first
-                self.highlighting_rules = []
-                
-                # Common formatting for different code elements
-                keyword_format = QTextCharFormat()
-                keyword_format.setForeground(self.colors["keyword"])
-                keyword_format.setFontWeight(QFont.Weight.Bold)
-                
-                class_format = QTextCharFormat()
-                class_format.setForeground(self.colors["class"])
-                
-                function_format = QTextCharFormat()
-                function_format.setForeground(self.colors["function"])
-                
-                string_format = QTextCharFormat()
-                string_format.setForeground(self.colors["string"])
-                
-                comment_format = QTextCharFormat()
-                comment_format.setForeground(self.colors["comment"])
-                
-                number_format = QTextCharFormat()
-                number_format.setForeground(self.colors["number"])
-                
-                operator_format = QTextCharFormat()
-                operator_format.setForeground(self.colors["operator"])
-                
-                # Set language-specific rules
-                if self.language == "python":
-                    # Python keywords
-                    keywords = [
-                        "and", "as", "assert", "async", "await", "break", "class", "continue", 
-                        "def", "del", "elif", "else", "except", "False", "finally", "for", 
-                        "from", "global", "if", "import", "in", "is", "lambda", "None", 
-                        "nonlocal", "not", "or", "pass", "raise", "return", "True", 
-                        "try", "while", "with", "yield"
-                    ]
-                    
-                    # Add keyword rules
-                    for keyword in keywords:
-                        pattern = QRegularExpression(r'\b' + keyword + r'\b')
-                        self.highlighting_rules.append((pattern, keyword_format))
-                    
-                    # Function calls pattern
-                    function_pattern = QRegularExpression(r'\b[A-Za-z0-9_]+(?=\()')
-                    self.highlighting_rules.append((function_pattern, function_format))
-                    
-                    # Class name pattern
-                    class_pattern = QRegularExpression(r'\bclass\s+([A-Za-z_][A-Za-z0-9_]*)')
-                    self.highlighting_rules.append((class_pattern, class_format))
-                    
-                    # String patterns - single and double quotes
-                    self.highlighting_rules.append((QRegularExpression(r'"[^"\\]*(\\.[^"\\]*)*"'), string_format))
-                    self.highlighting_rules.append((QRegularExpression(r"'[^'\\]*(\\.[^'\\]*)*'"), string_format))
-                    
-                    # Triple-quoted strings patterns
-                    self.highlighting_rules.append((QRegularExpression(r'""".*?"""', QRegularExpression.PatternOption.DotMatchesEverythingOption), string_format))
-                    self.highlighting_rules.append((QRegularExpression(r"'''.*?'''", QRegularExpression.PatternOption.DotMatchesEverythingOption), string_format))
-                    
-                    # Comment pattern
-                    self.highlighting_rules.append((QRegularExpression(r'#[^\n]*'), comment_format))
-                    
-                    # Number pattern
-                    self.highlighting_rules.append((QRegularExpression(r'\b\d+\b'), number_format))
-                    
-                    # Operators pattern
-                    self.highlighting_rules.append((QRegularExpression(r'[\+\-\*/=<>%&\|\^~!]'), operator_format))
-                
-                elif self.language == "javascript":
-                    # JavaScript keywords
-                    keywords = [
-                        "break", "case", "catch", "class", "const", "continue", "debugger", 
-                        "default", "delete", "do", "else", "export", "extends", "false", 
-                        "finally", "for", "function", "if", "import", "in", "instanceof", 
-                        "new", "null", "return", "super", "switch", "this", "throw", "true", 
-                        "try", "typeof", "var", "void", "while", "with", "yield", "let", "async", "await"
-                    ]
-                    
-                    # Add keyword rules
-                    for keyword in keywords:
-                        pattern = QRegularExpression(r'\b' + keyword + r'\b')
-                        self.highlighting_rules.append((pattern, keyword_format))
-                    
-                    # Function declarations and calls
-                    function_pattern = QRegularExpression(r'\b[A-Za-z0-9_]+(?=\()')
-                    self.highlighting_rules.append((function_pattern, function_format))
-                    
-                    # Class name pattern
-                    class_pattern = QRegularExpression(r'\bclass\s+([A-Za-z_][A-Za-z0-9_]*)')
-                    self.highlighting_rules.append((class_pattern, class_format))
-                    
-                    # String patterns - single and double quotes
-                    self.highlighting_rules.append((QRegularExpression(r'"[^"\\]*(\\.[^"\\]*)*"'), string_format))
-                    self.highlighting_rules.append((QRegularExpression(r"'[^'\\]*(\\.[^'\\]*)*'"), string_format))
-                    self.highlighting_rules.append((QRegularExpression(r"`[^`\\]*(\\.[^`\\]*)*`"), string_format))
-                    
-                    # Comment patterns
-                    self.highlighting_rules.append((QRegularExpression(r'//[^\n]*'), comment_format))
-                    self.highlighting_rules.append((QRegularExpression(r'/\*.*?\*/', QRegularExpression.PatternOption.DotMatchesEverythingOption), comment_format))
-                    
-                    # Number pattern
-                    self.highlighting_rules.append((QRegularExpression(r'\b\d+(\.\d+)?\b'), number_format))
-                    
-                    # Operators pattern
-                    self.highlighting_rules.append((QRegularExpression(r'[\+\-\*/=<>%&\|\^~!]'), operator_format))
-                
-                elif self.language == "java" or self.language == "c++" or self.language == "c":
-                    # C-like language keywords
-                    if self.language == "java":
-                        keywords = [
-                            "abstract", "assert", "boolean", "break", "byte", "case", "catch", 
-                            "char", "class", "const", "continue", "default", "do", "double", 
-                            "else", "enum", "extends", "final", "finally", "float", "for", 
-                            "goto", "if", "implements", "import", "instanceof", "int", 
-                            "interface", "long", "native", "new", "package", "private", 
-                            "protected", "public", "return", "short", "static", "strictfp", 
-                            "super", "switch", "synchronized", "this", "throw", "throws", 
-                            "transient", "try", "void", "volatile", "while", "true", "false", "null"
-                        ]
-                    elif self.language == "c++":
-                        keywords = [
-                            "alignas", "alignof", "and", "and_eq", "asm", "auto", "bitand", 
-                            "bitor", "bool", "break", "case", "catch", "char", "char16_t", 
-                            "char32_t", "class", "compl", "const", "constexpr", "const_cast", 
-                            "continue", "decltype", "default", "delete", "do", "double", 
-                            "dynamic_cast", "else", "enum", "explicit", "export", "extern", 
-                            "false", "float", "for", "friend", "goto", "if", "inline", "int", 
-                            "long", "mutable", "namespace", "new", "noexcept", "not", "not_eq", 
-                            "nullptr", "operator", "or", "or_eq", "private", "protected", 
-                            "public", "register", "reinterpret_cast", "return", "short", 
-                            "signed", "sizeof", "static", "static_assert", "static_cast", 
-                            "struct", "switch", "template", "this", "thread_local", "throw", 
-                            "true", "try", "typedef", "typeid", "typename", "union", "unsigned", 
-                            "using", "virtual", "void", "volatile", "wchar_t", "while", "xor", "xor_eq"
-                        ]
-                    else:  # C language
-                        keywords = [
-                            "auto", "break", "case", "char", "const", "continue", "default", 
-                            "do", "double", "else", "enum", "extern", "float", "for", "goto", 
-                            "if", "inline", "int", "long", "register", "restrict", "return", 
-                            "short", "signed", "sizeof", "static", "struct", "switch", 
-                            "typedef", "union", "unsigned", "void", "volatile", "while", 
-                            "_Alignas", "_Alignof", "_Atomic", "_Bool", "_Complex", 
-                            "_Generic", "_Imaginary", "_Noreturn", "_Static_assert", "_Thread_local"
-                        ]
-                    
-                    # Add keyword rules
-                    for keyword in keywords:
-                        pattern = QRegularExpression(r'\b' + keyword + r'\b')
-                        self.highlighting_rules.append((pattern, keyword_format))
-                    
-                    # Function declarations and calls
-                    function_pattern = QRegularExpression(r'\b[A-Za-z0-9_]+(?=\()')
-                    self.highlighting_rules.append((function_pattern, function_format))
-                    
-                    # Class/struct name pattern
-                    class_pattern = QRegularExpression(r'\b(?:class|struct|enum)\s+([A-Za-z_][A-Za-z0-9_]*)')
-                    self.highlighting_rules.append((class_pattern, class_format))
-                    
-                    # String patterns
-                    self.highlighting_rules.append((QRegularExpression(r'"[^"\\]*(\\.[^"\\]*)*"'), string_format))
-                    self.highlighting_rules.append((QRegularExpression(r"'[^'\\]*(\\.[^'\\]*)*'"), string_format))
-                    
-                    # Comment patterns
-                    self.highlighting_rules.append((QRegularExpression(r'//[^\n]*'), comment_format))
-                    self.highlighting_rules.append((QRegularExpression(r'/\*.*?\*/', QRegularExpression.PatternOption.DotMatchesEverythingOption), comment_format))
-                    
-                    # Preprocessor directives
-                    preprocessor_format = QTextCharFormat()
-                    preprocessor_format.setForeground(self.colors["preprocessor"])
-                    self.highlighting_rules.append((QRegularExpression(r'#\s*[a-zA-Z]+'), preprocessor_format))
-                    
-                    # Number pattern
-                    self.highlighting_rules.append((QRegularExpression(r'\b\d+(\.\d+)?[fFlL]?\b'), number_format))
-                    
-                    # Operators pattern
-                    self.highlighting_rules.append((QRegularExpression(r'[\+\-\*/=<>%&\|\^~!]'), operator_format))
-                
-                elif self.language == "html":
-                    # HTML tags
-                    tag_format = QTextCharFormat()
-                    tag_format.setForeground(self.colors["keyword"])
-                    self.highlighting_rules.append((QRegularExpression(r'<[/]?[a-zA-Z0-9]+'), tag_format))
-                    self.highlighting_rules.append((QRegularExpression(r'[/]?>'), tag_format))
-                    
-                    # HTML attributes
-                    attribute_format = QTextCharFormat()
-                    attribute_format.setForeground(self.colors["identifier"])
-                    self.highlighting_rules.append((QRegularExpression(r'\s[a-zA-Z0-9-]+='), attribute_format))
-                    
-                    # HTML strings
-                    self.highlighting_rules.append((QRegularExpression(r'"[^"\\]*(\\.[^"\\]*)*"'), string_format))
-                    self.highlighting_rules.append((QRegularExpression(r"'[^'\\]*(\\.[^'\\]*)*'"), string_format))
-                    
-                    # HTML comments
-                    self.highlighting_rules.append((QRegularExpression(r'<!--.*?-->', QRegularExpression.PatternOption.DotMatchesEverythingOption), comment_format))
-            
-            def set_language(self, language):
-                """Change the language for syntax highlighting"""
-                self.language = language.lower()
-                self.setup_highlighting_rules()
-                self.rehighlight()
-            
-            def highlightBlock(self, text):
-                """Apply syntax highlighting to the given block of text"""
-                # Apply the highlighting rules
-                for pattern, format in self.highlighting_rules:
-                    expression = pattern
-                    match = expression.match(text)
-                    index = match.capturedStart()
-                    
-                    while index >= 0:
-                        length = match.capturedLength()
-                        self.setFormat(index, length, format)
-                        match = expression.match(text, index + length)
-                        index = match.capturedStart()
-        
-        # Create a custom QPlainTextEdit subclass for code editing with line numbers
-        class CodeEditor(QPlainTextEdit):
-            def __init__(self, parent=None):
-                super().__init__(parent)
-                self.line_number_area = LineNumberArea(self)
-                
-                # Connect signals
-                self.blockCountChanged.connect(self.update_line_number_area_width)
-                self.updateRequest.connect(self.update_line_number_area)
-                self.cursorPositionChanged.connect(self.highlight_current_line)
-                
-                # Initial setup
-                self.update_line_number_area_width(0)
-                self.highlight_current_line()
-                
-                # Set monospace font for code
-                font = QFont("Consolas")
-                font.setStyleHint(QFont.StyleHint.Monospace)
-                self.setFont(font)
-                
-                # Set tab size to 4 spaces
-                self.setTabStopDistance(self.fontMetrics().horizontalAdvance(' ') * 4)
-                
-                # Modern style for the editor (VS Code-like dark theme)
-                self.setStyleSheet("""
-                    QPlainTextEdit {
-                        background-color: #1E1E1E;
-                        color: #D4D4D4;
-                        border: 1px solid #2D2D2D;
-                        border-radius: 4px;
-                        selection-background-color: #264F78;
-                        selection-color: #FFFFFF;
-                        font-family: Consolas, Monaco, 'Courier New', monospace;
-                        font-size: 14px;
-                    }
-                """)
-                
-                # Create syntax highlighter
-                self.highlighter = VSCodeSyntaxHighlighter(self.document(), "python")
-            
-            def set_language(self, language):
-                """Set language for syntax highlighting"""
-                self.highlighter.set_language(language)
-            
-            # Add setText method for compatibility with QTextEdit
-            def setText(self, text):
-                """Compatibility method to match QTextEdit's setText"""
-                self.setPlainText(text)
-                
-            def text(self):
-                """Compatibility method to match QTextEdit's text()"""
-                return self.toPlainText()
-                
-            def line_number_area_width(self):
-                """Calculate the width of the line number area"""
-                digits = 1
-                max_value = max(1, self.blockCount())
-                while max_value >= 10:
-                    max_value //= 10
-                    digits += 1
-                
-                space = 10 + self.fontMetrics().horizontalAdvance('9') * digits
-                return space
-            
-            def update_line_number_area_width(self, _):
-                """Update the margin reserved for the line number area"""
-                self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
-            
-            def update_line_number_area(self, rect, dy):
-                """Update the line number area when the viewport is scrolled"""
-                if dy:
-                    self.line_number_area.scroll(0, dy)
-                else:
-                    self.line_number_area.update(0, rect.y(), self.line_number_area.width(), rect.height())
-                
-                if rect.contains(self.viewport().rect()):
-                    self.update_line_number_area_width(0)
-            
-            def resizeEvent(self, event):
-                """Handle resize events"""
-                super().resizeEvent(event)
-                
-                cr = self.contentsRect()
-                self.line_number_area.setGeometry(QRect(cr.left(), cr.top(), self.line_number_area_width(), cr.height()))     
-
-            def highlight_current_line(self):
-                """Highlight the line where the cursor is positioned"""
-                extra_selections = []
-                
-                if not self.isReadOnly():
-                    selection = QTextEdit.ExtraSelection()
-                    line_color = QColor("#2A2A2A")  # Dark subtle highlight for current line
-                    
-                    selection.format.setBackground(line_color)
-                    selection.format.setProperty(QTextFormat.Property.FullWidthSelection, True)
-                    selection.cursor = self.textCursor()
-                    selection.cursor.clearSelection()
-                    extra_selections.append(selection)
-                
-                self.setExtraSelections(extra_selections)
-            
-            def line_number_area_paint_event(self, event):
-                """Paint the line numbers"""
-                painter = QPainter(self.line_number_area)
-                painter.fillRect(event.rect(), QColor("#1A1A1A"))  # VS Code-like line number background
-                
-                block = self.firstVisibleBlock()
-                block_number = block.blockNumber()
-                top = round(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
-                bottom = top + round(self.blockBoundingRect(block).height())
-                
-                while block.isValid() and top <= event.rect().bottom():
-                    if block.isVisible() and bottom >= event.rect().top():
-                        number = str(block_number + 1)
-                        painter.setPen(QColor("#6D6D6D"))  # VS Code-like line number color
-                        painter.drawText(0, top, self.line_number_area.width() - 5, self.fontMetrics().height(),
-                                        Qt.AlignmentFlag.AlignRight, number)
-                    
-                    block = block.next()
-                    top = bottom
-                    bottom = top + round(self.blockBoundingRect(block).height())
-                    block_number += 1
-        
-        # Line number area widget
-        class LineNumberArea(QWidget):
-            def __init__(self, editor):
-                super().__init__(editor)
-                self.code_editor = editor
-            
-            def sizeHint(self):
-                return QSize(self.code_editor.line_number_area_width(), 0)
-            
-            def paintEvent(self, event):
-                self.code_editor.line_number_area_paint_event(event)
-        
         # Replace the existing code editor with our enhanced version
         new_editor = CodeEditor()
         new_editor.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
@@ -3429,6 +5779,8 @@ class ExamPage(QWidget):
         # Add new editor to layout at same position
         code_output_layout.insertWidget(old_editor_index, new_editor, 7)
         self.code_editor = new_editor
+        new_editor.on_undo_reset = lambda: self.run_status_label.setText(
+            "Undo history was reset - earlier edits can no longer be undone")
         
         # Define methods for the main class (self)
         def set_code_text(text):
@@ -3446,17 +5798,8 @@ class ExamPage(QWidget):
             # Also update syntax highlighting
             self.code_editor.set_language(language)
             
-            templates = {
-                "python": '# Python code\n\ndef main():\n    print("Hello, World!")\n\nif __name__ == "__main__":\n    main()',
-                "java": '// Java code\n\npublic class Main {\n    public static void main(String[] args) {\n        System.out.println("Hello, World!");\n    }\n}',
-                "javascript": '// JavaScript code\n\nfunction main() {\n    console.log("Hello, World!");\n}\n\nmain();',
-                "c++": '// C++ code\n\n#include <iostream>\n\nint main() {\n    std::cout << "Hello, World!" << std::endl;\n    return 0;\n}',
-                "c": '// C code\n\n#include <stdio.h>\n\nint main() {\n    printf("Hello, World!\\n");\n    return 0;\n}',
-                "html": '<!-- HTML code -->\n\n<!DOCTYPE html>\n<html>\n<head>\n    <title>Hello World</title>\n</head>\n<body>\n    <h1>Hello, World!</h1>\n</body>\n</html>'
-            }
-            
-            if language in templates:
-                set_code_text(templates[language])
+            if language in LANGUAGE_TEMPLATES:
+                set_code_text(LANGUAGE_TEMPLATES[language])
         
         # Properly bind methods to self
         self.set_code_text = set_code_text
@@ -3468,44 +5811,193 @@ class ExamPage(QWidget):
 
     def start_recording(self):
         if not hasattr(self, 'webcam_recorder') or self.webcam_recorder is None:
-            self.webcam_recorder = BackgroundWebcamRecorder(
-                token=self.session_token,
-                exam_code=self.exam_code,
-                user_id=self.user_id,
-                exam_id=self.exam_id
-            )
+            details = self.exam_details or {}
+            mode = details.get("proctoring_mode", "video")
+            if mode in ("events", "events_lowrate"):
+                # On-device detection: upload events, plus optional low frame rate video
+                low_rate_recorder = None
+                if mode == "events_lowrate":
+                    low_rate_recorder = BackgroundWebcamRecorder(
+                        token=self.session_token,
+                        exam_code=self.exam_code,
+                        user_id=self.user_id,
+                        exam_id=self.exam_id,
+                        rotation_policy=SegmentRotationPolicy.from_config(details.get("recording_rotation"))
+                    )
+                    detection = details.get("detection_settings") or {}
+                    low_rate_recorder.frame_rate = float(detection.get("low_rate_fps", DETECTION_CONFIG["low_rate_fps"]))
+                self.webcam_recorder = ProctoringEventPipeline(
+                    token=self.session_token,
+                    exam_code=self.exam_code,
+                    user_id=self.user_id,
+                    exam_id=self.exam_id,
+                    config=details.get("detection_settings"),
+                    recorder=low_rate_recorder
+                )
+            elif mode == "snapshot":
+                # Low-bandwidth mode: periodic stills instead of continuous video
+                self.webcam_recorder = SnapshotProctor(
+                    token=self.session_token,
+                    exam_code=self.exam_code,
+                    user_id=self.user_id,
+                    exam_id=self.exam_id,
+                    config=details.get("snapshot_settings")
+                )
+            else:
+                self.webcam_recorder = BackgroundWebcamRecorder(
+                    token=self.session_token,
+                    exam_code=self.exam_code,
+                    user_id=self.user_id,
+                    exam_id=self.exam_id,
+                    rotation_policy=SegmentRotationPolicy.from_config(details.get("recording_rotation"))
+                )
             self.webcam_recorder.setup_recorder(shared_camera.get_session())
 
+            # Drop the frame rate (or skip stills) while the candidate sits still.
+            # Event modes already run at a low rate and are left alone.
+            if not isinstance(self.webcam_recorder, ProctoringEventPipeline):
+                self.motion_analyzer = MotionAnalyzer(details.get("motion_settings"))
+            if self.motion_analyzer is not None and self.motion_analyzer.attach(shared_camera):
+                if isinstance(self.webcam_recorder, SnapshotProctor):
+                    self.webcam_recorder.motion_analyzer = self.motion_analyzer
+                else:
+                    self.webcam_recorder.low_motion_frame_rate = self.motion_analyzer.settings["low_frame_rate"]
+                    self.motion_analyzer.add_listener(self.webcam_recorder.set_low_motion)
+
         if self.webcam_recorder.start_recording():
             logging.info("Exam recording started successfully")
         else:
             logging.error("Failed to start exam recording")
 
+        self.start_audio_monitoring()
+        self.start_process_monitoring()
 
-    def showEvent(self, event):
-        super().showEvent(event)
+    def start_audio_monitoring(self):
+        """Speech-activity events from the microphone, uploaded every event_interval_ms"""
+        details = self.exam_details or {}
+        if not details.get("audio_monitoring", True):
+            return
+        if self.microphone_monitor is None:
+            self.microphone_monitor = MicrophoneMonitor(config=details.get("audio_settings"))
+            self.speech_event_timer = task_scheduler.register(
+                "speech_events", self.upload_speech_events,
+                self.microphone_monitor.settings["event_interval_ms"], TASK_PRIORITY_LOW
+            )
+        if self.microphone_monitor.start():
+            self.speech_event_timer.start(self.microphone_monitor.settings["event_interval_ms"])
 
-        available_cameras = QMediaDevices.videoInputs()
-        if not available_cameras:
-            logging.error("No camera devices found")
+    def stop_audio_monitoring(self):
+        if self.microphone_monitor is None:
             return
+        self.speech_event_timer.stop()
+        self.microphone_monitor.stop()
+        self.upload_speech_events()
+
+    def upload_speech_events(self):
+        events = self.microphone_monitor.drain_events()
+        if events:
+            self.queue_proctoring_events(events)
+
+    def queue_proctoring_events(self, events):
+        """Upload thumbnail-less events (speech, processes) off the GUI thread"""
+        if self.event_upload_pool is None:
+            self.event_upload_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exam-events")
+        self.event_upload_pool.submit(
+            upload_proctoring_events, self.session_token, self.user_id, self.exam_id,
+            [(event, None) for event in events]
+        )
 
-        if not shared_camera.is_initialized:
-            camera_device = available_cameras[0]
-            if not shared_camera.initialize(camera_device):
-                logging.error("Failed to initialize shared camera")
-                return
+    def start_process_monitoring(self):
+        if not self.process_monitoring:
+            self.process_monitoring = True
+            process_monitor.add_listener(lambda event: self.queue_proctoring_events([event]))
+        process_monitor.start()
+
+
+    def start_device_monitoring(self):
+        """React to monitors being attached and the camera disappearing as it happens"""
+        if self.device_monitoring:
+            return
+        self.device_monitoring = True
+        device_registry.add_listener("screens", self.handle_screens_changed)
+        device_registry.add_listener("video", self.handle_cameras_changed)
+
+    def stop_device_monitoring(self):
+        if self.device_monitoring:
+            self.device_monitoring = False
+            device_registry.remove_listener("screens", self.handle_screens_changed)
+            device_registry.remove_listener("video", self.handle_cameras_changed)
+
+    def handle_screens_changed(self, screen_count):
+        event = {"type": "screen_count_changed", "detector": "device_registry",
+                 "timestamp": round(time.time(), 3), "details": {"screens": screen_count}}
+        self.queue_proctoring_events([event])
+        if screen_count > 1:
+            self.show_device_warning(
+                "Additional monitor detected",
+                f"{screen_count} displays are connected. Disconnect the extra monitor to continue your exam."
+            )
+
+    def handle_cameras_changed(self, cameras):
+        camera = shared_camera.camera
+        if camera is None:
+            return
+        current_id = camera.cameraDevice().id()
+        if any(device.id() == current_id for device in cameras):
+            return
 
-        if shared_camera.start_camera():
-            logging.info("Camera started successfully")
-            QTimer.singleShot(1000, self.start_recording)
+        event = {"type": "camera_disconnected", "detector": "device_registry",
+                 "timestamp": round(time.time(), 3), "details": {"available": len(cameras)}}
+        self.queue_proctoring_events([event])
+        if cameras:
+            # Fall back to another camera rather than record nothing
+            logging.warning(f"Camera disconnected - switching to {cameras[0].description()}")
+            shared_camera.switch_device(cameras[0])
         else:
+            self.show_device_warning("Camera disconnected", "Your camera was disconnected. Reconnect it to continue.")
+
+    def show_device_warning(self, title, text):
+        # Non-modal so the exam timer and recording keep running
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Warning)
+        box.setWindowTitle(title)
+        box.setText(text)
+        box.setWindowFlags(box.windowFlags() | Qt.WindowType.WindowStaysOnTopHint)
+        box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        box.show()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.start_device_monitoring()
+
+        # Normally already warm from the device preview / instructions page
+        if not shared_camera.warm_up():
             logging.error("Failed to start camera")
+            return
+
+        self.recording_requested_at = time.perf_counter()
+        shared_camera.when_active(self.start_recording_when_warm)
+
+    def start_recording_when_warm(self):
+        if not self.isVisible():
+            return
+        self.start_recording()
+        logging.info(f"Recording started {(time.perf_counter() - self.recording_requested_at) * 1000:.0f} ms "
+                     f"after the exam page appeared")
 
     def hideEvent(self, event):
         super().hideEvent(event)
         if self.webcam_recorder and self.webcam_recorder.is_ready():
             self.webcam_recorder.stop_recording()
+        if self.motion_analyzer:
+            self.motion_analyzer.report()
+        self.stop_audio_monitoring()
+        self.stop_device_monitoring()
+        process_monitor.stop()
+        # The upload worker finishes its queue before exiting
+        uploader = getattr(self.webcam_recorder, "uploader", None)
+        if uploader is not None:
+            uploader.shutdown()
 
     def update_word_count(self):
         """Update the word count for descriptive answers"""
@@ -4158,7 +6650,7 @@ class ExamPage(QWidget):
             return False
         
     def run_code(self):
-        """Execute the code using the remote compiler API with proper error handling"""
+        """Execute the code on the remote compiler through the run manager"""
         code = self.code_editor.toPlainText()
         language = self.language_selector.currentText().lower()
         
@@ -4166,50 +6658,19 @@ class ExamPage(QWidget):
             self.code_output.setPlainText("Error: No code to run.")
             return
         
-        # Show loading state
-        self.code_output.setPlainText("Running code, please wait...")
-        original_button_text = self.run_code_button.text()
-        self.run_code_button.setText("Running...")
-        self.run_code_button.setEnabled(False)
-        
-        # Use PyQt's QNetworkAccessManager for non-blocking API calls
+        if not hasattr(self, 'run_manager'):
+            self.run_manager = RunManager(self.user_id, self.show_run_result, self.show_run_state)
+        self.run_manager.submit(language, code)
 
-        
-        # Create network manager if it doesn't exist
-        if not hasattr(self, 'network_manager'):
-            self.network_manager = QNetworkAccessManager()
-        
-        # Prepare the request
-        url = QUrl("https://stageevaluate.sentientgeeks.us/wp-content/themes/questioner/app/compiler.php")
-        request = QNetworkRequest(url)
-        request.setHeader(QNetworkRequest.KnownHeaders.ContentTypeHeader, 
-                        "application/x-www-form-urlencoded")
-        
-        # Prepare form data
-        query = QUrlQuery()
-        query.addQueryItem("language", language)
-        query.addQueryItem("code", code)
-        post_data = query.toString().encode()
-        
-        # Send request
-        reply = self.network_manager.post(request, post_data)
-        
-        # Handle response
-        def handle_response():
-            self.run_code_button.setText(original_button_text)
-            self.run_code_button.setEnabled(True)
-            
-            if reply.error() == QNetworkReply.NetworkError.NoError:
-                response_data = reply.readAll().data().decode()
-                self.code_output.setPlainText(response_data)
-            else:
-                error_msg = f"Network Error: {reply.errorString()}"
-                self.code_output.setPlainText(error_msg)
-            
-            reply.deleteLater()
-        
-        # Connect to the finished signal
-        reply.finished.connect(handle_response)
+    def show_run_result(self, output):
+        self.code_output.setPlainText(output)
+
+    def show_run_state(self, state, message):
+        """Reflect the run manager's queue state on the Run button and status label"""
+        self.run_status_label.setText(message)
+        self.run_code_button.setText("Running..." if state == RUN_RUNNING else "Run")
+        if state == RUN_RUNNING:
+            self.code_output.setPlainText("Running code, please wait...")
 
     def go_previous(self):
         if self.current_question_index > 0:
@@ -4487,6 +6948,13 @@ class ExamPage(QWidget):
                 logging.error("Cannot send onstop notification: webcam_recorder not available")
                 return False
                 
+            # Video mode: queue behind the last chunk so the server sees it before onstop
+            uploader = getattr(self.webcam_recorder, "uploader", None)
+            if uploader is not None and uploader.is_running() and not uploader.shutting_down:
+                uploader.send_onstop(submit_reason)
+                logging.info(f"Onstop notification queued on upload worker (status: {uploader.status})")
+                return True
+
             # Get API endpoint and token from the webcam recorder
             api_endpoint = self.webcam_recorder.api_endpoint
             token = self.webcam_recorder.token
@@ -4577,6 +7045,10 @@ class ExamPage(QWidget):
         # Disable language selector and run button
         self.language_selector.setEnabled(False)
         self.run_code_button.setEnabled(False)
+        if hasattr(self, 'run_manager'):
+            self.run_manager.cancel()
+            self.run_manager.report()
+            self.show_run_state(RUN_IDLE, "")
         
         # Disable all radio buttons and checkboxes
         for i in range(self.options_layout.count()):
@@ -4704,9 +7176,6 @@ class MainWindow(QMainWindow):
         self.stack.addWidget(self.exam_page)
         self.stack.setCurrentIndex(0)
 
-        # Install Qt event filter for key blocking - this will catch Qt-specific events
-        self.installEventFilter(self)
-
         logging.info("MainWindow initialized; showing in full screen.")
         self.showFullScreen()
         
@@ -4746,103 +7215,19 @@ class MainWindow(QMainWindow):
         # Set focus policy to ensure our window maintains focus
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         
-        # Create a timer to periodically check and restore focus if needed
-        from PyQt6.QtCore import QTimer
-        self.focus_timer = QTimer(self)
-        self.focus_timer.timeout.connect(self.check_focus)
-        # Reduce check frequency to avoid competing with dialog handling
-        self.focus_timer.start(750)  # Check less frequently (increased from 500ms to 750ms)
+        # Restore focus when Qt reports it moved away, rather than polling for it
+        focus_guard.attach(self)
         
         # Add property to track if we're in a dialog interaction
         self.setProperty("in_dialog_interaction", False)
 
-    def improved_delayed_focus_restore(self):
-        """Improved delayed focus restoration that respects dialog states"""
-        global SUPPRESS_FOCUS_CHECKS
-        
-        # Don't restore focus if dialogs are active
-        if SUPPRESS_FOCUS_CHECKS:
-            logging.debug("Not restoring focus - dialog active")
-            return
-            
-        # Double-check for any visible dialogs
-        for widget in QApplication.topLevelWidgets():
-            if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
-                if widget.isVisible():
-                    global_suppress_focus_checks(True)
-                    logging.debug("Not restoring focus - dialog detected")
-                    return
-            
-            # Also check for modal dialogs
-            if hasattr(widget, 'isModal') and widget.isModal() and widget.isVisible():
-                global_suppress_focus_checks(True)
-                logging.debug("Not restoring focus - modal dialog detected")
-                return
-        
-        # It's safe to restore focus now
-        logging.debug("Delayed focus restore - activating window")
-        self.activateWindow()
-        self.raise_()
-
     def stop_focus_checking(self):
         """Stop all focus checking to prevent dialog box loops"""
-        if hasattr(self, 'focus_timer') and self.focus_timer.isActive():
-            self.focus_timer.stop()
-            logging.info("Stopped focus checking timer")
-        
-        # Also stop the app level timer if it exists
-        for timer in self.findChildren(QTimer):
-            if timer.isActive():
-                timer.stop()
-                logging.info("Stopped additional timer")
+        focus_guard.stop()
 
     def check_focus(self):
         """Check if our window has focus and restore it if not - with improved dialog awareness"""
-        # Don't try to restore focus if an exam is already submitted
-        if hasattr(self, 'exam_page') and hasattr(self.exam_page, 'exam_submitted') and self.exam_page.exam_submitted:
-            # Stop checking focus if exam is submitted
-            if hasattr(self, 'focus_timer') and self.focus_timer.isActive():
-                self.focus_timer.stop()
-                logging.info("Stopped focus checking - exam already submitted")
-            return
-        
-        # Skip focus check if any dialog is active - using the global flag
-        global SUPPRESS_FOCUS_CHECKS
-        if SUPPRESS_FOCUS_CHECKS:
-            logging.debug("Dialog active - skipping focus check")
-            return
-        
-        # Enhanced dialog detection
-        for widget in QApplication.topLevelWidgets():
-            if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
-                if widget.isVisible():
-                    # Dialog found - don't restore focus
-                    return
-                    
-            # Also check for modal dialogs
-            if hasattr(widget, 'isModal') and widget.isModal() and widget.isVisible():
-                return
-        
-        # Now safe to check and restore focus
-        active_window = QGuiApplication.focusWindow()
-        if active_window is not self:
-            # Make sure we're not stealing focus from a dialog component
-            focused_widget = QApplication.focusWidget()
-            if focused_widget:
-                # Check if the focused widget is part of a dialog
-                parent = focused_widget
-                while parent:
-                    if isinstance(parent, QDialog) or isinstance(parent, QMessageBox):
-                        # Don't restore focus if a dialog has focus
-                        return
-                    if hasattr(parent, 'parent'):
-                        parent = parent.parent()
-                    else:
-                        break
-            
-            logging.info("Window lost focus - restoring")
-            # Add a small delay before restoring focus
-            QTimer.singleShot(100, self.delayed_focus_restore)
+        focus_guard.check_now()
 
     def changeEvent(self, event):
         """Override to prevent window state changes like minimizing, with dialog awareness"""
@@ -4864,132 +7249,6 @@ class MainWindow(QMainWindow):
         super().changeEvent(event)
 
 
-    def patched_eventFilter(self, obj, event):
-        """Fixed event filter for MainWindow that prevents focus wars with dialogs"""
-        global SUPPRESS_FOCUS_CHECKS
-        
-        # Ignore WindowDeactivate events during dialog interaction
-        if event.type() == QEvent.Type.WindowDeactivate:
-            # Check if this is our main window being deactivated
-            if obj is self:
-                # If we're in a dialog interaction, don't try to reactivate
-                if SUPPRESS_FOCUS_CHECKS:
-                    logging.debug("Window deactivate during dialog - allowing")
-                    return super().eventFilter(obj, event)
-                    
-                # Check if deactivation is due to a dialog opening
-                for widget in QApplication.topLevelWidgets():
-                    if isinstance(widget, QDialog) or isinstance(widget, QMessageBox) or widget.inherits("QDialog"):
-                        if widget.isVisible():
-                            global_suppress_focus_checks(True)
-                            logging.debug("Window deactivate due to dialog - allowing")
-                            return super().eventFilter(obj, event)
-                    
-                    # Also check for modal dialogs
-                    if hasattr(widget, 'isModal') and widget.isModal() and widget.isVisible():
-                        global_suppress_focus_checks(True)
-                        logging.debug("Window deactivate due to modal dialog - allowing")
-                        return super().eventFilter(obj, event)
-                
-                # No dialog detected, schedule focus restore with a delay
-                logging.debug("Window deactivate event - scheduling delayed re-activation")
-                QTimer.singleShot(300, self.delayed_focus_restore)
-        
-        # Handle key events as before
-        elif event.type() == QEvent.Type.KeyPress:
-            key = event.key()
-            modifiers = event.modifiers()
-            
-            # Enhanced detection for emergency exit
-            is_ctrl = modifiers & Qt.KeyboardModifier.ControlModifier
-            is_shift = modifiers & Qt.KeyboardModifier.ShiftModifier
-            is_e_key = key == Qt.Key.Key_E
-            
-            # Check for emergency exit combination
-            if is_ctrl and is_shift and is_e_key:
-                logging.info("EMERGENCY EXIT combination detected in filter!")
-                # Try triggering the emergency submit function
-                self.trigger_emergency_submit()
-                # If we somehow get here, force exit
-                import os
-                os._exit(0)
-                return True  # Handled
-                
-            # Allow Ctrl+Shift+E for emergency submit
-            if (key == Qt.Key.Key_E and 
-                modifiers & Qt.KeyboardModifier.ControlModifier and 
-                modifiers & Qt.KeyboardModifier.ShiftModifier):
-                logging.info("Emergency submit key combination detected in Qt event filter")
-                # Don't block this event
-                return False
-            
-            # Allow regular keys needed for form input and UI interaction
-            if ((key >= Qt.Key.Key_A and key <= Qt.Key.Key_Z) or  # Letters
-                (key >= Qt.Key.Key_0 and key <= Qt.Key.Key_9) or  # Numbers
-                key == Qt.Key.Key_Space or                        # Space
-                key == Qt.Key.Key_Return or                      # Enter/Return
-                key == Qt.Key.Key_Backspace or                   # Backspace
-                key == Qt.Key.Key_Delete or                      # Delete
-                (key >= Qt.Key.Key_Left and key <= Qt.Key.Key_Down)):  # Arrow keys
-                return False  # Don't block these keys
-                
-            # Allow Escape key in dialogs
-            if key == Qt.Key.Key_Escape and SUPPRESS_FOCUS_CHECKS:
-                return False  # Don't block Escape in dialogs
-                
-            # Comprehensive blocking of problematic keys
-            # Block function keys
-            if key >= Qt.Key.Key_F1 and key <= Qt.Key.Key_F12:
-                logging.info(f"Blocked function key {key - Qt.Key.Key_F1 + 1} through Qt event filter")
-                return True  # Block the event
-                
-            # Block Escape outside of dialogs
-            if key == Qt.Key.Key_Escape and not SUPPRESS_FOCUS_CHECKS:
-                logging.info("Blocked Escape through Qt event filter")
-                return True
-                
-            # Block Tab
-            if key == Qt.Key.Key_Tab:
-                logging.info("Blocked Tab through Qt event filter")
-                return True
-                
-            # Block Alt modifiers
-            if modifiers & Qt.KeyboardModifier.AltModifier:
-                logging.info("Blocked Alt combination through Qt event filter")
-                return True
-                
-            # Block Windows key combinations
-            if modifiers & Qt.KeyboardModifier.MetaModifier:
-                logging.info("Blocked Windows key combination through Qt event filter")
-                return True
-                
-        return super().eventFilter(obj, event)
-    
-    def is_dialog_child(self, obj):
-        """Check if object is a child of a dialog"""
-        if hasattr(obj, 'parent'):
-            parent = obj.parent()
-            while parent:
-                if isinstance(parent, QDialog) or isinstance(parent, QMessageBox):
-                    return True
-                parent = parent.parent() if hasattr(parent, 'parent') else None
-        return False    
-    
-    def apply_focus_patches(main_window):
-        """Apply all focus checking patches"""
-        # Store the original method
-        if not hasattr(main_window, '_original_check_focus'):
-            main_window._original_check_focus = main_window.check_focus
-        
-        # Add the delayed focus restore method
-        main_window.delayed_focus_restore = lambda: delayed_focus_restore(main_window)
-        
-        # Apply the patched method
-        main_window.check_focus = lambda: patched_check_focus(main_window)
-        
-        logging.info("Applied focus check patches to main window")
-        
-        return main_window
     def animate_transition(self):
         animation = QPropertyAnimation(self.stack, b"geometry")
         animation.setDuration(300)
@@ -5152,44 +7411,31 @@ def main():
         # Create and configure main window
         try:
             window = MainWindow()
-            
-            # Apply the patched event filter method to the main window
-            # This overrides the default eventFilter with our security-enhanced version
-            window.eventFilter = types.MethodType(patched_eventFilter, window)
-            
-            # Add the delayed_focus_restore method to the window
-            window.delayed_focus_restore = types.MethodType(improved_delayed_focus_restore, window)
-            
-            # Patch the check_focus method if it exists
-            if hasattr(window, 'check_focus'):
-                window.check_focus = types.MethodType(patched_check_focus, window)
-                
-            logging.info("Main window created with security patches applied")
+            logging.info("Main window created")
         except Exception as e:
             logging.critical(f"Failed to create main window: {e}", exc_info=True)
             QMessageBox.critical(None, "Fatal Error", f"Could not create application window: {e}")
             return 1
             
         # Initialize dialog monitor for enhanced dialog handling
+        dialog_monitor = None
         try:
-            dialog_monitor = DialogMonitor()
+            # Single app-wide event filter: dialogs, focus and Qt-level key blocking
+            dialog_monitor = DialogMonitor(window)
             logging.info("Dialog monitor initialized")
         except Exception as e:
             logging.error(f"Failed to initialize dialog monitor: {e}", exc_info=True)
             # Continue anyway as this is an enhancement, not core functionality
         
-        # Create a timer to periodically check focus at the application level
-        focus_timer = QTimer()
-        focus_timer.timeout.connect(lambda: patched_check_app_focus(window))
-        focus_timer.start(1500)  # Check every 1.5 seconds
-        
         # Set up clean shutdown handler
         def clean_shutdown():
             logging.info("Performing clean shutdown...")
-            # Stop timers
-            focus_timer.stop()
-            if hasattr(dialog_monitor, 'check_timer'):
-                dialog_monitor.check_timer.stop()
+            # Stop focus enforcement
+            focus_guard.stop()
+            input_policy.report()
+            task_scheduler.report()
+            shared_camera.stop_camera()
+            shared_camera.frame_bus.close()
             
             # Stop key blocking thread if running
             if blocking_thread and blocking_thread.is_alive():
@@ -5219,5 +7465,8 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # Frozen (PyInstaller) builds have no separate script - the exe doubles as the upload worker
+    if "--upload-worker" in sys.argv:
+        sys.exit(upload_worker.main())
     # Wrap with sys.exit to return proper exit code
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,173 @@
+# === Standard Library ===
+import collections
+import logging
+# === PyQt6 Core ===
+from PyQt6.QtCore import Qt
+
+# One decision table shared by the global keyboard hook and the Qt event filter.
+# Modifier bits line up with Qt's KeyboardModifier bits (>> 25), so a Qt
+# modifier set converts with one shift and mask.
+#
+# Kept free of the keyboard hook and QtWidgets so the decisions can be tested
+# on their own; final.py installs the hook and the Qt filter.
+MOD_SHIFT = 1
+MOD_CTRL = 2
+MOD_ALT = 4
+MOD_WIN = 8
+MODIFIER_BITS = {"shift": MOD_SHIFT, "ctrl": MOD_CTRL, "alt": MOD_ALT, "windows": MOD_WIN}
+
+INPUT_ALLOW = 0
+INPUT_BLOCK = 1
+INPUT_EMERGENCY = 2  # Ctrl+Shift+E - allowed by the hook, triggers emergency submit in Qt
+
+INPUT_POLICY_CONFIG = {
+    # Modifier presses themselves always pass; AltGr is a character key, not Alt
+    "allowed_keys": ["shift", "ctrl", "alt", "alt gr"],
+    # Always blocked
+    "blocked_keys": [f"f{n}" for n in range(1, 13)] + ["esc", "tab", "windows", "print screen", "menu"],
+    # Blocked only while the modifier is held (the baseline hook and hotkey lists);
+    # every other key is allowed, so layout characters typed with modifiers keep working
+    "blocked_combinations": {
+        MOD_ALT: ["tab", "esc", "d", "e", "r", "q", "w"],
+        MOD_WIN: ["tab", "esc", "d", "e", "r", "m", "q", "w"],
+        MOD_CTRL: ["tab", "esc", "w", "q"],
+    },
+    # Blocked keys a dialog may still use (Esc closes it); everything else follows the rules above
+    "dialog_allowed_keys": ["esc"],
+}
+
+# Hook key names that differ from the policy's key ids
+HOOK_KEY_ALIASES = {
+    "escape": "esc", "return": "enter", "win": "windows", "left windows": "windows",
+    "right windows": "windows", "left ctrl": "ctrl", "right ctrl": "ctrl", "control": "ctrl",
+    "left shift": "shift", "right shift": "shift", "left alt": "alt", "right alt": "alt",
+    "altgr": "alt gr", "prtsc": "print screen", "snapshot": "print screen", "apps": "menu",
+}
+# Some hook backends report function keys only by their virtual key code
+HOOK_FUNCTION_KEY_CODES = {112 + n: f"f{n + 1}" for n in range(12)}
+# keyboard.KEY_DOWN - the hook's event_type for a press
+KEY_DOWN = "down"
+
+
+def build_qt_key_ids():
+    """Qt key code -> policy key id, for the keys the policy knows about"""
+    ids = {getattr(Qt.Key, f"Key_{c.upper()}").value: c for c in "abcdefghijklmnopqrstuvwxyz0123456789"}
+    ids.update({getattr(Qt.Key, f"Key_F{n}").value: f"f{n}" for n in range(1, 13)})
+    for name, key_id in (("Escape", "esc"), ("Tab", "tab"), ("Backtab", "tab"), ("Space", "space"),
+                         ("Return", "enter"), ("Enter", "enter"), ("Backspace", "backspace"),
+                         ("Delete", "delete"), ("Left", "left"), ("Right", "right"), ("Up", "up"),
+                         ("Down", "down"), ("Meta", "windows"), ("Super_L", "windows"),
+                         ("Super_R", "windows"), ("Print", "print screen"), ("Menu", "menu"),
+                         ("Alt", "alt"), ("AltGr", "alt gr"), ("Control", "ctrl"), ("Shift", "shift")):
+        ids[getattr(Qt.Key, f"Key_{name}").value] = key_id
+    return ids
+
+
+class InputPolicy:
+    """Compiled allow/block table keyed by (key id, modifier bitmask).
+
+    The keyboard hook tracks modifier state incrementally from its own key
+    up/down events instead of calling keyboard.is_pressed, and maps each scan
+    code to a key id once. While AltGr is held the Ctrl and Alt bits are
+    ignored, since Windows reports AltGr as Ctrl+Alt. Blocked keys are counted
+    in memory; only the first block of each key is logged.
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(INPUT_POLICY_CONFIG, **(config or {}))
+        self.table = {}
+        self.dialog_allowed = set()
+        self.compile()
+        self.qt_key_ids = build_qt_key_ids()
+        self.hook_key_ids = {}  # (scan_code, name) -> key id
+        self.modifiers = 0      # Hook-side modifier state
+        self.altgr = False      # Hook-side AltGr state
+        self.blocked = collections.Counter()
+        self.decisions = 0
+
+    def compile(self):
+        """Expand the rules into one entry per known key and modifier combination"""
+        allowed = set(self.config["allowed_keys"])
+        blocked = set(self.config["blocked_keys"])
+        combinations = {bit: set(keys) for bit, keys in self.config["blocked_combinations"].items()}
+        keys = allowed | blocked | set(MODIFIER_BITS) | {"e"}
+        for combination_keys in combinations.values():
+            keys |= combination_keys
+        self.table = {}
+        for mask in range(16):
+            for key_id in keys:
+                if key_id == "e" and mask & (MOD_CTRL | MOD_SHIFT) == MOD_CTRL | MOD_SHIFT:
+                    action = INPUT_EMERGENCY
+                elif key_id in allowed:
+                    action = INPUT_ALLOW
+                elif key_id in blocked:
+                    action = INPUT_BLOCK
+                elif any(mask & bit and key_id in combination_keys for bit, combination_keys in combinations.items()):
+                    action = INPUT_BLOCK
+                else:
+                    action = INPUT_ALLOW
+                self.table[(key_id, mask)] = action
+        self.dialog_allowed = set(self.config["dialog_allowed_keys"])
+
+    def decide(self, key_id, mask):
+        self.decisions += 1
+        # Keys the policy has no entry for are allowed with any modifier
+        return self.table.get((key_id, mask), INPUT_ALLOW)
+
+    def record_block(self, layer, key_id, mask):
+        counter_key = (layer, key_id, mask)
+        self.blocked[counter_key] += 1
+        if self.blocked[counter_key] == 1:
+            logging.info(f"Blocked {key_id} (modifiers {mask:#x}) via {layer}; further blocks are counted")
+
+    def hook_key_id(self, event):
+        cache_key = (event.scan_code, event.name)
+        key_id = self.hook_key_ids.get(cache_key)
+        if key_id is None:
+            name = (event.name or "").lower()
+            key_id = HOOK_KEY_ALIASES.get(name, name) or HOOK_FUNCTION_KEY_CODES.get(event.scan_code, "")
+            self.hook_key_ids[cache_key] = key_id
+        return key_id
+
+    def handle_hook_event(self, event):
+        """keyboard.hook callback: True lets the event through, False suppresses it"""
+        key_id = self.hook_key_id(event)
+        bit = MODIFIER_BITS.get(key_id, 0)
+        if event.event_type != KEY_DOWN:
+            self.modifiers &= ~bit
+            if key_id == "alt gr":
+                self.altgr = False
+            return True
+        self.modifiers |= bit
+        if key_id == "alt gr":
+            self.altgr = True
+        mask = self.modifiers & ~(MOD_CTRL | MOD_ALT) if self.altgr else self.modifiers
+        if self.decide(key_id, mask) == INPUT_BLOCK:
+            self.record_block("hook", key_id, mask)
+            return False
+        return True
+
+    def qt_decision(self, event, in_dialog=False):
+        """Decision for a Qt KeyPress event; Qt supplies the modifier state itself.
+        Inside a dialog the dialog_allowed_keys (Esc) are let through as well."""
+        key_id = self.qt_key_ids.get(event.key(), "")
+        modifiers = event.modifiers()
+        mask = (modifiers.value >> 25) & 0xF
+        # AltGr: X11 reports GroupSwitch, Windows reports Ctrl+Alt on a key that still types a character
+        text = event.text()
+        if modifiers & Qt.KeyboardModifier.GroupSwitchModifier or \
+                (mask & MOD_CTRL and mask & MOD_ALT and text and text.isprintable()):
+            mask &= ~(MOD_CTRL | MOD_ALT)
+        action = self.decide(key_id, mask)
+        if in_dialog and action == INPUT_BLOCK and key_id in self.dialog_allowed:
+            return INPUT_ALLOW
+        if action == INPUT_BLOCK:
+            self.record_block("qt", key_id, mask)
+        return action
+
+    def report(self):
+        """Log the block counters, most frequent first"""
+        total = sum(self.blocked.values())
+        top = ", ".join(f"{layer}:{key_id}/{mask:#x}={count}" for (layer, key_id, mask), count in self.blocked.most_common(10))
+        logging.info(f"Input policy: {self.decisions} decisions, {total} blocked ({top or 'none'})")
+        return dict(self.blocked)
@@ -0,0 +1,269 @@
+# === Standard Library ===
+import argparse
+import hashlib
+import json
+import logging
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# -----------------------------------------------------------------------------
+# Logging Setup
+# -----------------------------------------------------------------------------
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler()]
+)
+
+# Local stand-in for the Evaluate recording API.
+#
+# Run it and point the app at it:
+#     python stand_in_server.py --port 8765
+#     EVALUATE_API_BASE=http://127.0.0.1:8765/wp-json/api/v1 python final.py
+#
+# GET /stats reports received and duplicate bytes, so a crash/restart run can
+# be checked for zero duplicate uploads.
+API_PREFIX = "/wp-json/api/v1"
+
+# Stand-in for the shared code compiler:
+#     EVALUATE_COMPILER_URL=http://127.0.0.1:8765/compiler.php python final.py
+COMPILER_PATH = "/compiler.php"
+
+# Largest payload the network probe endpoint will serve in one response
+MAX_PROBE_BYTES = 8 * 1024 * 1024
+PROBE_BLOCK = bytes(range(256)) * 4096  # 1 MiB of filler, sliced per request
+
+
+class StandInState:
+    """Chunks stored by content hash plus byte counters, shared by all handler threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chunks = {}  # (exam_id, user_id) -> {sha256: size}
+        self.received_bytes = 0
+        self.duplicate_bytes = 0
+        self.uploads = 0
+        self.snapshot_frames = 0
+        self.snapshot_bytes = 0
+        self.events = []
+        self.event_bytes = 0
+        self.compiler_runs = 0
+        self.compiler_delay = 0.0
+
+    def store_chunk(self, exam_id, user_id, data, claimed_hash=None):
+        sha256 = hashlib.sha256(data).hexdigest()
+        if claimed_hash and claimed_hash != sha256:
+            logging.warning(f"Chunk hash mismatch: client said {claimed_hash}, content is {sha256}")
+        with self.lock:
+            stored = self.chunks.setdefault((exam_id, user_id), {})
+            self.uploads += 1
+            self.received_bytes += len(data)
+            if sha256 in stored:
+                self.duplicate_bytes += len(data)
+                logging.warning(f"Duplicate chunk {sha256[:12]} ({len(data)} bytes)")
+            stored[sha256] = len(data)
+        return sha256
+
+    def store_snapshots(self, frames):
+        with self.lock:
+            self.snapshot_frames += len(frames)
+            self.snapshot_bytes += sum(len(data) for data in frames)
+
+    def store_events(self, events, thumbnails):
+        with self.lock:
+            self.events.extend(events)
+            self.event_bytes += sum(len(data) for data in thumbnails)
+
+    def count_compiler_run(self):
+        with self.lock:
+            self.compiler_runs += 1
+            return self.compiler_runs
+
+    def acknowledged(self, exam_id, user_id, hashes):
+        with self.lock:
+            stored = self.chunks.get((exam_id, user_id), {})
+            return [h for h in hashes if h in stored]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "uploads": self.uploads,
+                "received_bytes": self.received_bytes,
+                "duplicate_bytes": self.duplicate_bytes,
+                "stored_chunks": sum(len(c) for c in self.chunks.values()),
+                "snapshot_frames": self.snapshot_frames,
+                "snapshot_bytes": self.snapshot_bytes,
+                "events": len(self.events),
+                "event_types": sorted({event.get("type") for event in self.events}),
+                "event_bytes": self.event_bytes,
+                "compiler_runs": self.compiler_runs,
+            }
+
+
+STATE = StandInState()
+
+
+def parse_multipart(content_type, body):
+    """Parse a multipart/form-data body into {name: (filename, bytes)}"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+    )
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            fields[name] = (part.get_filename(), part.get_payload(decode=True) or b"")
+    return fields
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def send_json(self, payload, status=200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/stats":
+            self.send_json(STATE.stats())
+        elif url.path == f"{API_PREFIX}/network-probe":
+            self.handle_probe_download(parse_qs(url.query))
+        else:
+            self.send_json({"status": False, "message": "not found"}, 404)
+
+    def do_POST(self):
+        if self.path == f"{API_PREFIX}/save-exam-recorded-video":
+            self.handle_save_chunk()
+        elif self.path == f"{API_PREFIX}/check-exam-recorded-chunks":
+            self.handle_check_chunks()
+        elif self.path == f"{API_PREFIX}/save-exam-snapshots":
+            self.handle_save_snapshots()
+        elif self.path == f"{API_PREFIX}/save-exam-events":
+            self.handle_save_events()
+        elif self.path == f"{API_PREFIX}/network-probe":
+            received = len(self.read_body())
+            self.send_json({"status": True, "received": received})
+        elif self.path == COMPILER_PATH:
+            self.handle_compile()
+        else:
+            self.send_json({"status": False, "message": "not found"}, 404)
+
+    def handle_save_chunk(self):
+        fields = parse_multipart(self.headers.get("Content-Type", ""), self.read_body())
+        exam_id = fields.get("exam_id", (None, b""))[1].decode()
+        user_id = fields.get("user_id", (None, b""))[1].decode()
+        upload_type = fields.get("type", (None, b""))[1].decode()
+
+        if upload_type == "onstop":
+            self.send_json({"status": True, "message": "Recording stopped successful"})
+            return
+
+        if "chunk" not in fields:
+            self.send_json({"status": False, "message": "missing chunk"}, 400)
+            return
+
+        claimed_hash = fields.get("chunk_hash", (None, b""))[1].decode() or None
+        sha256 = STATE.store_chunk(exam_id, user_id, fields["chunk"][1], claimed_hash)
+        self.send_json({"status": True, "message": "Chunk upload successful", "chunk_hash": sha256})
+
+    def handle_save_snapshots(self):
+        fields = parse_multipart(self.headers.get("Content-Type", ""), self.read_body())
+        frames = [data for name, (_, data) in fields.items() if name.startswith("snapshot_")]
+        if not frames:
+            self.send_json({"status": False, "message": "no snapshots"}, 400)
+            return
+        STATE.store_snapshots(frames)
+        self.send_json({"status": True, "message": f"{len(frames)} snapshots saved"})
+
+    def handle_probe_download(self, query):
+        try:
+            size = max(0, min(MAX_PROBE_BYTES, int(query.get("bytes", ["0"])[0])))
+        except ValueError:
+            size = 0
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        remaining = size
+        while remaining:
+            chunk = PROBE_BLOCK[:min(remaining, len(PROBE_BLOCK))]
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
+
+    def handle_save_events(self):
+        fields = parse_multipart(self.headers.get("Content-Type", ""), self.read_body())
+        try:
+            events = json.loads(fields.get("events", (None, b"[]"))[1] or b"[]")
+        except ValueError:
+            self.send_json({"status": False, "message": "invalid events"}, 400)
+            return
+        thumbnails = [data for name, (_, data) in fields.items() if name.startswith("thumbnail_")]
+        STATE.store_events(events, thumbnails)
+        self.send_json({"status": True, "message": f"{len(events)} events saved"})
+
+    def handle_compile(self):
+        form = parse_qs(self.read_body().decode())
+        language = form.get("language", [""])[0]
+        code = form.get("code", [""])[0]
+        run = STATE.count_compiler_run()
+        time.sleep(STATE.compiler_delay)
+        data = f"Run {run}: {language}, {len(code.splitlines())} lines\n".encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            logging.info(f"Compiler run {run} cancelled by the client")
+
+    def handle_check_chunks(self):
+        try:
+            payload = json.loads(self.read_body() or b"{}")
+        except ValueError:
+            self.send_json({"status": False, "message": "invalid json"}, 400)
+            return
+        acknowledged = STATE.acknowledged(
+            str(payload.get("exam_id", "")),
+            str(payload.get("user_id", "")),
+            payload.get("hashes", [])
+        )
+        self.send_json({"status": True, "acknowledged": acknowledged})
+
+    def log_message(self, format, *args):
+        logging.info("%s - %s" % (self.address_string(), format % args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Evaluate API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--compiler-delay", type=float, default=0.0,
+                        help="seconds each compiler run takes")
+    args = parser.parse_args()
+    STATE.compiler_delay = args.compiler_delay
+
+    server = ThreadingHTTPServer((args.host, args.port), StandInHandler)
+    logging.info(f"Stand-in API listening on http://{args.host}:{args.port}{API_PREFIX}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logging.info(f"Final stats: {STATE.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The app's modules live at the repository root, next to final.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Widgets and text layouts need a platform plugin; tests never open a window
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
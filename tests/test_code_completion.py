@@ -0,0 +1,80 @@
+import pytest
+from PyQt6.QtGui import QGuiApplication, QTextCursor, QTextDocument
+
+from code_completion import COMPLETION_CONFIG, CompletionIndex, CompletionTrie
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    return QGuiApplication.instance() or QGuiApplication([])
+
+
+def make_index(text, language="python"):
+    document = QTextDocument()
+    document.documentLayout()  # like an editor's document, so contentsChange fires
+    document.setPlainText(text)
+    return document, CompletionIndex(document, language)
+
+
+def test_trie_returns_matches_alphabetically():
+    trie = CompletionTrie(["print", "pass", "property", "range", "pr"])
+    assert trie.query("pr", 10) == ["pr", "print", "property"]
+    assert trie.query("p", 2) == ["pass", "pr"]
+    assert trie.query("x", 10) == []
+    assert trie.query("", 10) == ["pass", "pr", "print", "property", "range"]
+
+
+def test_language_trie_is_shared():
+    assert CompletionTrie.for_language("python") is CompletionTrie.for_language("python")
+    assert "while" in CompletionTrie.for_language("python").query("wh", 10)
+
+
+def test_keywords_come_before_buffer_identifiers():
+    _, index = make_index("results = 1\nresume_point = 2")
+    assert index.query("re") == ["return", "reversed", "results", "resume_point"]
+
+
+def test_typed_word_itself_and_short_words_are_not_offered():
+    _, index = make_index("counter = 1\nab = 2\ncounter += ab")
+    assert index.query("counter") == []
+    assert "ab" not in index.identifiers
+    assert index.query("") == []
+
+
+def test_limit():
+    _, index = make_index("\n".join(f"value_{n} = {n}" for n in range(50)))
+    assert len(index.query("value_")) == COMPLETION_CONFIG["max_results"]
+    assert index.query("value_", limit=3) == ["value_0", "value_1", "value_10"]
+
+
+def test_edits_update_only_the_touched_words():
+    document, index = make_index("alpha = 1\nbeta = 2\ngamma = alpha")
+    cursor = QTextCursor(document.findBlockByNumber(1))
+    cursor.select(QTextCursor.SelectionType.BlockUnderCursor)
+    cursor.removeSelectedText()  # drops "beta = 2" and its line break
+    assert index.identifiers == ["alpha", "gamma"]
+
+    cursor.movePosition(QTextCursor.MoveOperation.End)
+    cursor.insertText("\ndelta = alpha\nepsilon")
+    assert index.identifiers == ["alpha", "delta", "epsilon", "gamma"]
+    assert index.counts["alpha"] == 3
+
+    document.setPlainText("")
+    assert index.identifiers == []
+    assert index.counts == {}
+
+
+def test_index_matches_a_full_rebuild_after_edits():
+    document, index = make_index("def first():\n    return first_value\n")
+    cursor = QTextCursor(document)
+    for text in ("second_value = 1\n", "third", "_name\n\nfourth = first_value"):
+        cursor.insertText(text)
+    rebuilt = CompletionIndex(document, "python")
+    assert index.identifiers == rebuilt.identifiers
+    assert index.counts == rebuilt.counts
+
+
+def test_switching_language():
+    _, index = make_index("")
+    index.set_language("Java")
+    assert index.query("Str") == ["String", "StringBuilder"]
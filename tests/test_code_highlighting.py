@@ -0,0 +1,79 @@
+import pytest
+from PyQt6.QtGui import QGuiApplication, QTextCursor, QTextDocument
+
+from code_highlighting import HIGHLIGHT_COLORS, HighlightRules, VSCodeSyntaxHighlighter
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    return QGuiApplication.instance() or QGuiApplication([])
+
+
+def highlight(text, language):
+    document = QTextDocument()
+    document.documentLayout()  # like an editor's document, so edits are re-highlighted
+    document.setPlainText(text)
+    highlighter = VSCodeSyntaxHighlighter(document, language)
+    highlighter.rehighlight()
+    return document, highlighter
+
+
+def block_states(document):
+    return [document.findBlockByNumber(n).userState() for n in range(document.blockCount())]
+
+
+def colored(document, number):
+    """(text, color) for each formatted range of a block"""
+    block = document.findBlockByNumber(number)
+    units = block.text().encode("utf-16-le")  # Qt's offsets count UTF-16 units
+    return [(units[2 * r.start:2 * (r.start + r.length)].decode("utf-16-le"),
+             r.format.foreground().color().name().upper())
+            for r in block.layout().formats()]
+
+
+def test_python_triple_quoted_string_spans_blocks():
+    document, _ = highlight('x = """start\nmiddle\nend""" + 1\nreturn x', "python")
+    assert block_states(document) == [1, 1, 0, 0]
+    assert ("middle", HIGHLIGHT_COLORS["string"]) in colored(document, 1)
+    assert colored(document, 2)[0] == ('end"""', HIGHLIGHT_COLORS["string"])
+    assert ("return", HIGHLIGHT_COLORS["keyword"]) in colored(document, 3)
+
+
+def test_closing_the_string_restyles_the_following_blocks():
+    document, _ = highlight('"""\nif x:\n    pass', "python")
+    assert block_states(document) == [1, 1, 1]
+    cursor = QTextCursor(document.findBlockByNumber(0))
+    cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock)
+    cursor.insertText('"""')
+    assert block_states(document) == [0, 0, 0]
+    assert ("if", HIGHLIGHT_COLORS["keyword"]) in colored(document, 1)
+
+
+@pytest.mark.parametrize("language, text, state", [
+    ("javascript", "/* open\nstill comment\n*/ let x", 3),
+    ("c", "/* open\nstill comment\n*/ int x", 3),
+    ("html", "<!-- open\nstill comment\n--> <p>", 4),
+    ("javascript", "`open\nstill template\n` + x", 5),
+])
+def test_multiline_constructs_carry_their_state(language, text, state):
+    document, _ = highlight(text, language)
+    assert block_states(document) == [state, state, 0]
+    kind = "string" if state == 5 else "comment"
+    assert colored(document, 1) == [("still comment" if kind == "comment" else "still template", HIGHLIGHT_COLORS[kind])]
+
+
+def test_keywords_class_names_and_calls():
+    document, _ = highlight("class Point:\n    def norm(self): return abs(self)", "python")
+    assert colored(document, 0)[:2] == [("class", HIGHLIGHT_COLORS["keyword"]), ("Point", HIGHLIGHT_COLORS["class"])]
+    assert ("abs", HIGHLIGHT_COLORS["function"]) in colored(document, 1)
+    assert ("self", HIGHLIGHT_COLORS["keyword"]) not in colored(document, 1)
+
+
+def test_offsets_after_characters_outside_the_bmp():
+    document, _ = highlight("s = '\U0001F600' if x else y", "python")
+    assert ("if", HIGHLIGHT_COLORS["keyword"]) in colored(document, 0)
+
+
+def test_rules_are_compiled_once_per_language():
+    assert HighlightRules.for_language("python") is HighlightRules.for_language("python")
+    assert HighlightRules.for_language("unknown").pattern is None
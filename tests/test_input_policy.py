@@ -0,0 +1,78 @@
+import types
+
+from PyQt6.QtCore import QEvent, Qt
+from PyQt6.QtGui import QKeyEvent
+
+from input_policy import INPUT_ALLOW, INPUT_BLOCK, INPUT_EMERGENCY, MOD_ALT, MOD_CTRL, MOD_SHIFT, InputPolicy
+
+
+def hook_event(name, down=True, scan_code=0):
+    return types.SimpleNamespace(event_type="down" if down else "up", name=name, scan_code=scan_code)
+
+
+def press(policy, *names):
+    """Press names in order through the hook; returns the decision for the last one"""
+    allowed = True
+    for name in names:
+        allowed = policy.handle_hook_event(hook_event(name))
+    return allowed
+
+
+def qt_key(key, modifiers=Qt.KeyboardModifier.NoModifier, text=""):
+    return QKeyEvent(QEvent.Type.KeyPress, key.value, modifiers, text)
+
+
+def test_alt_press_is_allowed_but_alt_tab_is_blocked():
+    policy = InputPolicy()
+    assert press(policy, "alt")
+    assert not press(policy, "tab")
+    assert policy.decide("alt", MOD_ALT) == INPUT_ALLOW
+    assert policy.decide("tab", MOD_ALT) == INPUT_BLOCK
+
+
+def test_alt_with_ordinary_keys_is_allowed():
+    policy = InputPolicy()
+    assert press(policy, "left alt", "x")
+    assert policy.decide("f", MOD_ALT) == INPUT_ALLOW
+
+
+def test_altgr_characters_pass_the_hook():
+    policy = InputPolicy()
+    # Windows reports AltGr as a Ctrl press followed by AltGr
+    assert press(policy, "ctrl", "alt gr", "q")
+    assert press(policy, "7")
+    policy.handle_hook_event(hook_event("alt gr", down=False))
+    policy.handle_hook_event(hook_event("ctrl", down=False))
+    assert not press(policy, "alt", "q")
+
+
+def test_altgr_characters_pass_the_qt_filter():
+    policy = InputPolicy()
+    ctrl_alt = Qt.KeyboardModifier.ControlModifier | Qt.KeyboardModifier.AltModifier
+    assert policy.qt_decision(qt_key(Qt.Key.Key_Q, ctrl_alt, "@")) == INPUT_ALLOW
+    assert policy.qt_decision(qt_key(Qt.Key.Key_Q, Qt.KeyboardModifier.GroupSwitchModifier, "@")) == INPUT_ALLOW
+    assert policy.qt_decision(qt_key(Qt.Key.Key_Q, Qt.KeyboardModifier.AltModifier)) == INPUT_BLOCK
+
+
+def test_ctrl_shift_e_is_the_emergency_combination():
+    policy = InputPolicy()
+    assert policy.decide("e", MOD_CTRL | MOD_SHIFT) == INPUT_EMERGENCY
+    # The hook lets it through so the Qt side can trigger the emergency submit
+    assert press(policy, "ctrl", "shift", "e")
+    modifiers = Qt.KeyboardModifier.ControlModifier | Qt.KeyboardModifier.ShiftModifier
+    assert policy.qt_decision(qt_key(Qt.Key.Key_E, modifiers, "E")) == INPUT_EMERGENCY
+
+
+def test_escape_is_allowed_only_inside_dialogs():
+    policy = InputPolicy()
+    escape = qt_key(Qt.Key.Key_Escape)
+    assert policy.qt_decision(escape) == INPUT_BLOCK
+    assert policy.qt_decision(escape, in_dialog=True) == INPUT_ALLOW
+    assert policy.qt_decision(qt_key(Qt.Key.Key_Tab), in_dialog=True) == INPUT_BLOCK
+
+
+def test_blocks_are_counted():
+    policy = InputPolicy()
+    for _ in range(3):
+        policy.handle_hook_event(hook_event("f5"))
+    assert policy.report() == {("hook", "f5", 0): 3}
@@ -0,0 +1,84 @@
+import json
+import os
+
+from upload_worker import ChunkManifest
+
+
+def write_chunk(directory, name, data):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_pending_entries_survive_reload(tmp_path):
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = ChunkManifest(manifest_path)
+    first = manifest.add(write_chunk(tmp_path, "chunk_0.mp4", b"first"), 0)
+    second = manifest.add(write_chunk(tmp_path, "chunk_1.mp4", b"second"), 1)
+
+    reloaded = ChunkManifest(manifest_path)
+    assert sorted(sha256 for sha256, _ in reloaded.pending()) == sorted([first, second])
+    assert reloaded.next_chunk_number() == 2
+
+
+def test_mark_uploaded_drops_entry_and_file(tmp_path):
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = ChunkManifest(manifest_path)
+    chunk = write_chunk(tmp_path, "chunk_0.mp4", b"payload")
+    sha256 = manifest.add(chunk, 0)
+    manifest.mark_uploaded(sha256)
+
+    assert not os.path.exists(chunk)
+    reloaded = ChunkManifest(manifest_path)
+    assert reloaded.pending() == []
+    assert reloaded.is_uploaded(sha256)
+    assert reloaded.next_chunk_number() == 1
+
+
+def test_duplicate_segment_is_removed(tmp_path):
+    manifest = ChunkManifest(str(tmp_path / "manifest.json"))
+    sha256 = manifest.add(write_chunk(tmp_path, "chunk_0.mp4", b"same"), 0)
+    duplicate = write_chunk(tmp_path, "chunk_1.mp4", b"same")
+
+    assert manifest.add(duplicate, 1) == sha256
+    assert not os.path.exists(duplicate)
+    assert len(manifest.pending()) == 1
+
+
+def test_reload_after_truncated_journal(tmp_path):
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = ChunkManifest(manifest_path)
+    kept = manifest.add(write_chunk(tmp_path, "chunk_0.mp4", b"kept"), 0)
+    manifest.add(write_chunk(tmp_path, "chunk_1.mp4", b"torn"), 1)
+
+    # Crash in the middle of the last append
+    with open(manifest.journal_path, 'rb') as f:
+        journal = f.read()
+    with open(manifest.journal_path, 'wb') as f:
+        f.write(journal[:-20])
+
+    reloaded = ChunkManifest(manifest_path)
+    assert [sha256 for sha256, _ in reloaded.pending()] == [kept]
+
+    # Records appended after the recovery must not be glued to the torn line
+    later = reloaded.add(write_chunk(tmp_path, "chunk_2.mp4", b"later"), 2)
+    again = ChunkManifest(manifest_path)
+    assert sorted(sha256 for sha256, _ in again.pending()) == sorted([kept, later])
+    assert again.next_chunk_number() == 3
+
+
+def test_compaction_rewrites_snapshot_and_empties_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(ChunkManifest, "COMPACT_AFTER", 4)
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = ChunkManifest(manifest_path)
+    hashes = [manifest.add(write_chunk(tmp_path, f"chunk_{n}.mp4", f"data {n}".encode()), n) for n in range(3)]
+    manifest.mark_uploaded(hashes[0])
+
+    assert not os.path.exists(manifest.journal_path)
+    with open(manifest_path) as f:
+        snapshot = json.load(f)
+    assert sorted(snapshot["chunks"]) == sorted(hashes[1:])
+    assert snapshot["uploaded"] == [hashes[0]]
+    reloaded = ChunkManifest(manifest_path)
+    assert sorted(sha256 for sha256, _ in reloaded.pending()) == sorted(hashes[1:])
@@ -0,0 +1,495 @@
+# === Standard Library ===
+import collections
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+# === Third-party Modules ===
+import requests
+
+# Chunk upload worker, run as its own lightweight process by final.py's
+# UploadWorkerClient. It imports only the standard library and requests, so
+# starting it never loads Qt, the keyboard hook or the app's singletons.
+#
+# Protocol: the first stdin line is a JSON settings object, every further line
+# a JSON command ({"command": "chunk" | "backlog" | "onstop" | "status" |
+# "shutdown", ...}). Events go back as JSON lines on stdout; logging goes to
+# stderr. End of stdin means the GUI process is gone.
+
+# (connect, read) timeouts for one chunk upload; a stalled socket fails the
+# request instead of hanging the worker
+CHUNK_UPLOAD_TIMEOUT = (10, 60)
+# At most one "progress" event per this many seconds
+PROGRESS_EVENT_INTERVAL_S = 1.0
+
+# -----------------------------------------------------------------------------
+# Chunk Manifest
+# -----------------------------------------------------------------------------
+class ChunkManifest:
+    """Local on-disk record of finalised segments keyed by their SHA-256.
+
+    Each segment is hashed exactly once when it is finalised. The manifest
+    survives crashes, so pending segments can be replayed after a restart and
+    segments the server already stored are never sent again.
+
+    Changes are appended to a journal next to the snapshot; the snapshot is
+    only rewritten on compaction, which also prunes uploaded entries.
+    """
+
+    HASH_BLOCK_SIZE = 1024 * 1024
+    COMPACT_AFTER = 64  # journal records before the snapshot is rewritten
+    RECENT_UPLOADS = 256  # uploaded hashes remembered to spot re-recorded duplicates
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + ".log"
+        self.entries = {}  # sha256 -> {"file", "size", "chunk_number"}, pending upload only
+        self.uploaded = collections.deque(maxlen=self.RECENT_UPLOADS)
+        self.uploaded_count = 0
+        self.next_number = 0
+        self.journal_records = 0
+        self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    snapshot = json.load(f)
+                self.entries = {sha256: entry for sha256, entry in snapshot.get("chunks", {}).items()
+                                if not entry.get("uploaded")}
+                self.uploaded.extend(snapshot.get("uploaded", []))
+                self.uploaded_count = snapshot.get("uploaded_count", len(self.uploaded))
+                self.next_number = snapshot.get("next_chunk_number", 0)
+            torn = False
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'r') as f:
+                    for line in f:
+                        try:
+                            self.apply(json.loads(line))
+                        except ValueError:
+                            torn = True  # Torn last line from a crash mid-append
+                            break
+                        self.journal_records += 1
+            numbers = [entry["chunk_number"] for entry in self.entries.values()]
+            self.next_number = max([self.next_number] + [n + 1 for n in numbers])
+            if torn:
+                # Later appends would be glued onto the partial line, so start a clean journal
+                self.compact()
+            logging.info(f"Loaded chunk manifest with {len(self.entries)} pending entries")
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not read chunk manifest {self.path}: {e}")
+            self.entries = {}
+
+    def apply(self, record):
+        if "add" in record:
+            self.entries[record["add"]] = {
+                "file": record["file"],
+                "size": record["size"],
+                "chunk_number": record["chunk_number"],
+            }
+            # Uploaded entries leave the table, so remember the number here
+            self.next_number = max(self.next_number, record["chunk_number"] + 1)
+        elif "uploaded" in record:
+            if self.entries.pop(record["uploaded"], None) is not None:
+                self.uploaded.append(record["uploaded"])
+                self.uploaded_count += 1
+
+    def append(self, record):
+        self.apply(record)
+        try:
+            with open(self.journal_path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+            self.journal_records += 1
+        except OSError as e:
+            logging.error(f"Could not append to chunk manifest journal {self.journal_path}: {e}")
+        if self.journal_records >= self.COMPACT_AFTER:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the snapshot with pending entries only and empty the journal"""
+        # Write to a temp file first so a crash never leaves a truncated manifest
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    "chunks": self.entries,
+                    "uploaded": list(self.uploaded),
+                    "uploaded_count": self.uploaded_count,
+                    "next_chunk_number": self.next_number,
+                }, f, indent=1)
+            os.replace(tmp_path, self.path)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self.journal_records = 0
+        except OSError as e:
+            logging.error(f"Could not write chunk manifest {self.path}: {e}")
+
+    @classmethod
+    def hash_file(cls, file_path):
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(cls.HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def add(self, file_path, chunk_number):
+        """Hash a finalised segment and record it. Returns the hash or None."""
+        try:
+            size = os.path.getsize(file_path)
+            if size == 0:
+                logging.error(f"Not adding empty chunk to manifest: {file_path}")
+                return None
+            sha256 = self.hash_file(file_path)
+        except OSError as e:
+            logging.error(f"Could not hash chunk {file_path}: {e}")
+            return None
+
+        self.next_number = max(self.next_number, chunk_number + 1)
+        known = self.entries.get(sha256)
+        if known is None and sha256 not in self.uploaded:
+            self.append({"add": sha256, "file": file_path, "size": size, "chunk_number": chunk_number})
+        elif (known or {}).get("file") != file_path:
+            # Same bytes are already pending or uploaded - the new copy is redundant
+            logging.info(f"Chunk {chunk_number} duplicates {sha256[:12]} - removing {file_path}")
+            self.remove_file(file_path)
+        return sha256
+
+    def is_uploaded(self, sha256):
+        return sha256 in self.uploaded
+
+    def mark_uploaded(self, sha256):
+        entry = self.entries.get(sha256)
+        if entry:
+            self.append({"uploaded": sha256})
+            # The bytes are safely on the server - drop the local copy
+            self.remove_file(entry["file"])
+
+    @staticmethod
+    def remove_file(file_path):
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        except OSError as e:
+            logging.warning(f"Could not delete chunk {file_path}: {e}")
+
+    def pending(self):
+        """Return (sha256, entry) pairs that still need to reach the server"""
+        return [(sha256, entry) for sha256, entry in self.entries.items()
+                if os.path.exists(entry["file"])]
+
+    def next_chunk_number(self):
+        """First chunk number not used by a previous run, so restarts never overwrite backlog"""
+        return self.next_number
+
+
+class StreamingMultipartBody:
+    """multipart/form-data body that streams one file from disk.
+
+    requests sends any iterable with a length as a fixed Content-Length body,
+    so the file is read block by block and each block is reported to
+    on_progress as it goes out.
+    """
+
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, fields, file_field, file_name, file_path, mime_type, on_progress=None):
+        boundary = os.urandom(16).hex()
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        head = "".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+            for name, value in fields
+        )
+        head += (f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+                 f'filename="{file_name}"\r\nContent-Type: {mime_type}\r\n\r\n')
+        self.head = head.encode()
+        self.tail = f'\r\n--{boundary}--\r\n'.encode()
+        self.file_path = file_path
+        self.length = len(self.head) + os.path.getsize(file_path) + len(self.tail)
+        self.on_progress = on_progress
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        yield self.head
+        with open(self.file_path, 'rb') as f:
+            for block in iter(lambda: f.read(self.BLOCK_SIZE), b''):
+                if self.on_progress is not None:
+                    self.on_progress(len(block))
+                yield block
+        yield self.tail
+
+
+class ChunkUploader:
+    """Owns the chunk manifest and talks to the recording API"""
+
+    def __init__(self, token, user_id, exam_id, recording_dir, api_base, concurrency=1):
+        self.token = token
+        self.concurrency = max(1, int(concurrency))
+        self.user_id = user_id
+        self.exam_id = exam_id
+        self.api_endpoint = f"{api_base}/save-exam-recorded-video"
+        self.check_endpoint = f"{api_base}/check-exam-recorded-chunks"
+        self.on_progress = None  # called with a byte count while a chunk streams out
+
+        # Content-hash manifest - lets retries and backlog replays skip stored chunks
+        manifest_name = f"{self.user_id}-{self.exam_id}_manifest.json"
+        self.manifest = ChunkManifest(os.path.join(recording_dir, manifest_name))
+        self.manifest.compact()
+
+    def submit_chunk(self, chunk_file, chunk_number):
+        """Record a finished chunk in the manifest, then upload everything pending"""
+        sha256 = self.manifest.add(chunk_file, chunk_number)
+        if sha256 is None:
+            return False
+        self.upload_pending_chunks()
+        return self.manifest.is_uploaded(sha256)
+
+    def status(self):
+        pending = self.manifest.pending()
+        return {
+            "pending_chunks": len(pending),
+            "pending_bytes": sum(entry["size"] for _, entry in pending),
+            "uploaded_chunks": self.manifest.uploaded_count,
+        }
+
+    def send_onstop(self, submit_reason):
+        """Tell the server recording has ended - queued behind the last chunk upload"""
+        form_data = {
+            'exam_id': (None, str(self.exam_id)),
+            'user_id': (None, str(self.user_id)),
+            'type': (None, 'onstop'),
+            'file_name': (None, f"{self.user_id}-{self.exam_id}"),
+            'exam_submit_reason': (None, submit_reason)
+        }
+        try:
+            response = requests.post(
+                self.api_endpoint,
+                files=form_data,
+                headers={'Authorization': f'Bearer {self.token}'},
+                timeout=30
+            )
+            if response.status_code == 200 and response.json().get('status') is True:
+                logging.info("Successfully sent onstop notification")
+                return True
+            logging.warning(f"Onstop notification failed ({response.status_code}): {response.text}")
+        except (requests.RequestException, ValueError) as e:
+            logging.error(f"Request error sending onstop notification: {str(e)}")
+        return False
+
+    def fetch_acknowledged_hashes(self, hashes):
+        """Ask the server in one call which of the given chunk hashes it already stored"""
+        try:
+            response = requests.post(
+                self.check_endpoint,
+                json={
+                    "exam_id": str(self.exam_id),
+                    "user_id": str(self.user_id),
+                    "hashes": list(hashes)
+                },
+                headers={'Authorization': f'Bearer {self.token}'},
+                timeout=10
+            )
+            if response.status_code == 200:
+                acknowledged = response.json().get("acknowledged", [])
+                return set(acknowledged) & set(hashes)
+            logging.warning(f"Chunk check failed with status {response.status_code}")
+        except (requests.RequestException, ValueError) as e:
+            logging.warning(f"Chunk check request failed: {e}")
+        # If the check is unavailable, fall back to uploading everything pending
+        return set()
+
+    def upload_pending_chunks(self):
+        """Upload every manifest entry the server has not acknowledged yet"""
+        pending = self.manifest.pending()
+        if not pending:
+            return True
+
+        acknowledged = self.fetch_acknowledged_hashes([sha256 for sha256, _ in pending])
+        to_upload = []
+        for sha256, entry in pending:
+            if sha256 in acknowledged:
+                logging.info(f"Server already has chunk {entry['chunk_number']} - skipping upload")
+                self.manifest.mark_uploaded(sha256)
+            else:
+                to_upload.append((sha256, entry))
+
+        def upload(item):
+            sha256, entry = item
+            return self.upload_chunk(entry["file"], entry["chunk_number"], sha256)
+
+        if self.concurrency > 1 and len(to_upload) > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="chunk-upload") as pool:
+                outcomes = list(pool.map(upload, to_upload))
+        else:
+            outcomes = [upload(item) for item in to_upload]
+
+        # The manifest is only touched from this thread
+        for (sha256, _), uploaded in zip(to_upload, outcomes):
+            if uploaded:
+                self.manifest.mark_uploaded(sha256)
+        return all(outcomes)
+
+    def upload_chunk(self, chunk_file, chunk_index, sha256):
+        if not os.path.exists(chunk_file):
+            logging.error(f"Chunk file doesn't exist: {chunk_file}")
+            return False
+
+        try:
+            # Log file info before upload attempt
+            file_size = os.path.getsize(chunk_file)
+            logging.info(f"Preparing to upload chunk: {chunk_file} (Size: {file_size} bytes)")
+            
+            if file_size == 0:
+                logging.error("File size is 0 bytes, cannot upload empty file")
+                return False
+                
+            # Format chunk counter with leading zeros
+            chunk_number = f"chunk{chunk_index:04d}"
+            
+            # Create file_name for the API request
+            file_id = f"{self.user_id}-{self.exam_id}"
+            
+            # Same multipart fields as before, but the chunk streams from disk
+            # so progress is visible while a large segment is on the wire
+            body = StreamingMultipartBody(
+                fields=[
+                    ('exam_id', str(self.exam_id)),
+                    ('user_id', str(self.user_id)),
+                    ('type', 'ondataavailable'),
+                    ('file_name', file_id),
+                    ('chunk_number', chunk_number),
+                    ('chunk_hash', sha256),
+                ],
+                file_field='chunk',
+                file_name=f"{file_id}.mp4",
+                file_path=chunk_file,
+                mime_type='video/mp4',
+                on_progress=self.on_progress
+            )
+
+            # Set headers with token
+            headers = {
+                'Authorization': f'Bearer {self.token}',
+                'Content-Type': body.content_type
+            }
+
+            # Log the request details
+            logging.info(f"Sending request to: {self.api_endpoint}")
+
+            # Send POST request - the timeouts bound each connect/read, not the whole upload
+            response = requests.post(
+                self.api_endpoint,
+                data=body,
+                headers=headers,
+                timeout=CHUNK_UPLOAD_TIMEOUT
+            )
+            
+            # Check response
+            logging.info(f"Response status code: {response.status_code}")
+            logging.info(f"Response content: {response.text}")
+            
+            if response.status_code == 200:
+                try:
+                    json_response = response.json()
+                    if json_response.get('status') is True and "successful" in json_response.get('message', ''):
+                        logging.info(f"Successfully uploaded chunk {chunk_number}")
+                        # The manifest deletes the file once the upload is recorded
+                        return True
+                    else:
+                        logging.warning(f"Upload response not as expected: {json_response}")
+                        return False
+                except ValueError:
+                    logging.error("Could not parse response as JSON")
+                    return False
+            else:
+                logging.error(f"Failed to upload chunk. Status code: {response.status_code}")
+                logging.error(f"Response text: {response.text}")
+                return False
+                    
+        except requests.RequestException as req_err:
+            logging.error(f"Request error uploading chunk: {str(req_err)}")
+            return False
+        except IOError as io_err:
+            logging.error(f"I/O error handling chunk file: {str(io_err)}")
+            return False
+        except Exception as e:
+            logging.error(f"Unexpected error uploading chunk: {str(e)}")
+            logging.exception("Stack trace:")
+            return False
+
+
+def main():
+    """Worker entry point: read commands until "shutdown" or end of stdin"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - upload-worker - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+    output_lock = threading.Lock()
+
+    def emit(event, **fields):
+        with output_lock:
+            sys.stdout.write(json.dumps(dict(fields, event=event)) + "\n")
+            sys.stdout.flush()
+
+    settings_line = sys.stdin.readline()
+    if not settings_line:
+        return 1
+    settings = json.loads(settings_line)
+    uploader = ChunkUploader(settings["token"], settings["user_id"], settings["exam_id"],
+                             settings["recording_dir"], settings["api_base"],
+                             settings.get("upload_concurrency", 1))
+
+    last_progress = [0.0]
+
+    def report_progress(sent_bytes):
+        # Upload threads call this per block; the GUI only needs a heartbeat
+        now = time.monotonic()
+        if now - last_progress[0] >= PROGRESS_EVENT_INTERVAL_S:
+            last_progress[0] = now
+            emit("progress")
+
+    uploader.on_progress = report_progress
+    logging.info(f"Upload worker started (pid {os.getpid()})")
+
+    for line in sys.stdin:
+        try:
+            command = json.loads(line)
+        except ValueError:
+            logging.error(f"Ignoring malformed command: {line!r}")
+            continue
+        name = command.get("command")
+        if name == "shutdown":
+            break
+
+        emit("busy", command=name)
+        uploaded = False
+        try:
+            if name == "chunk":
+                uploaded = uploader.submit_chunk(command["file"], command["number"])
+            elif name == "backlog":
+                uploader.upload_pending_chunks()
+            elif name == "onstop":
+                uploader.send_onstop(command["reason"])
+        except Exception as e:
+            logging.error(f"Upload worker failed on {name}: {e}")
+            logging.exception("Stack trace:")
+        finally:
+            # Always settle the chunk, even on failure - it stays in the manifest
+            # for the next backlog pass rather than being resubmitted forever
+            if name == "chunk":
+                emit("chunk", file=command.get("file"), uploaded=uploaded)
+        emit("status", status=uploader.status())
+
+    emit("status", status=uploader.status())
+    logging.info("Upload worker stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())